@@ -0,0 +1,107 @@
+"""
+Latency benchmark: sklearn inference path vs the compiled NumPy forest.
+
+Usage:
+    python src/utils/benchmark_inference.py [--model models/random_forest_model.pkl] [--rows 1000]
+
+If the model file is missing, a RandomForestClassifier is fitted on
+data/processed/train.csv so the comparison can still be run.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+import joblib
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.fraud_dashboard.features import FEATURE_ORDER
+from src.utils.fraud_dashboard.forest import CompiledForest
+
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "random_forest_model.pkl")
+TRAIN_PATH = os.path.join(PROJECT_ROOT, "data", "processed", "train.csv")
+TEST_PATH = os.path.join(PROJECT_ROOT, "data", "processed", "test.csv")
+
+
+def load_model(path):
+    if os.path.exists(path):
+        print(f"Loading model from {path}")
+        return joblib.load(path)
+
+    from sklearn.ensemble import RandomForestClassifier
+    print(f"Model not found at {path}; fitting a RandomForestClassifier on {TRAIN_PATH}")
+    train = pd.read_csv(TRAIN_PATH)
+    model = RandomForestClassifier(n_estimators=100, random_state=42, class_weight="balanced")
+    return model.fit(train[FEATURE_ORDER], train["is_fraud"])
+
+
+def time_calls(fn, inputs):
+    """Per-call latencies in milliseconds."""
+    latencies = np.empty(len(inputs))
+    for i, item in enumerate(inputs):
+        start = time.perf_counter()
+        fn(item)
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+def report(name, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{name:<34} p50 {p50:9.3f} ms   p99 {p99:9.3f} ms   mean {latencies.mean():9.3f} ms")
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=1000, help="single-row calls to time per engine")
+    parser.add_argument("--batch", type=int, default=10000, help="rows in the batch throughput test")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    compiled = CompiledForest.from_sklearn(model)
+    print(f"Compiled {compiled.n_trees} trees, {len(compiled.feature)} nodes, max depth {compiled.max_depth}\n")
+
+    test = pd.read_csv(TEST_PATH)[FEATURE_ORDER]
+    X = test.to_numpy(np.float64)
+
+    # correctness against sklearn
+    diff = np.abs(model.predict_proba(test) - compiled.predict_proba(X)).max()
+    print(f"max |predict_proba difference| over {len(X)} rows: {diff:.3e}\n")
+
+    idx = np.arange(args.rows) % len(X)
+    records = test.to_dict("records")
+    single_rows = [records[i] for i in idx]
+    single_vectors = [X[i:i + 1] for i in idx]
+
+    def current_path(row):
+        # what /predict did before: one-row DataFrame, predict + predict_proba
+        df = pd.DataFrame([row])[FEATURE_ORDER]
+        model.predict(df)
+        model.predict_proba(df)
+
+    print(f"Single-row latency ({args.rows} calls):")
+    base_p50, base_p99 = report("sklearn predict + predict_proba", time_calls(current_path, single_rows))
+    report("sklearn predict_proba", time_calls(lambda row: model.predict_proba(pd.DataFrame([row])[FEATURE_ORDER]), single_rows))
+    comp_p50, comp_p99 = report("compiled forest", time_calls(compiled.predict_fraud_proba, single_vectors))
+    print(f"speedup vs current path: p50 x{base_p50 / comp_p50:.1f}, p99 x{base_p99 / comp_p99:.1f}\n")
+
+    print("Batch throughput:")
+    for size in (16, 256, args.batch):
+        batch = np.resize(X, (size, X.shape[1]))
+        batch_df = pd.DataFrame(batch, columns=FEATURE_ORDER)
+        for name, fn in [("sklearn predict_proba", lambda: model.predict_proba(batch_df)),
+                         ("compiled forest", lambda: compiled.predict_fraud_proba(batch))]:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            print(f"{size:>6} rows  {name:<26} {elapsed * 1000:9.1f} ms   {size / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
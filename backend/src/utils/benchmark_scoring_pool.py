@@ -0,0 +1,83 @@
+"""
+Throughput benchmark: in-process (thread) scoring vs the process scoring pool.
+
+Usage:
+    python src/utils/benchmark_scoring_pool.py [--rows 64] [--requests 2000] [--clients 16]
+
+Each client thread repeatedly scores a FEATURE_ORDER matrix of --rows rows
+(the size of one micro-batch) with the active registry model, first inline
+in the API process and then through ScoringPool with 1, 2, 4 ... workers up
+to the number of cores.
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.fraud_dashboard.features import FEATURE_ORDER
+from src.utils.fraud_dashboard.model_registry import ModelRegistry
+from src.utils.fraud_dashboard.scoring_pool import ScoringPool
+
+TEST_PATH = os.path.join(PROJECT_ROOT, "data", "processed", "test.csv")
+
+
+def run(score, matrices, clients):
+    """Rows per second with `clients` threads calling score() on every matrix."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(score, matrices))
+    elapsed = time.perf_counter() - start
+    return sum(len(m) for m in matrices) / elapsed, elapsed
+
+
+def worker_counts(limit):
+    counts, n = [], 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    return counts + [limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=64, help="rows per scoring call")
+    parser.add_argument("--requests", type=int, default=2000, help="scoring calls per configuration")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    current = ModelRegistry().active()
+    if current is None:
+        sys.exit("No model available in the registry.")
+    print(f"Model {current.version} ({'compiled' if current.compiled is not None else 'sklearn'}), "
+          f"{args.requests} calls x {args.rows} rows, {args.clients} client threads\n")
+
+    X = pd.read_csv(TEST_PATH)[FEATURE_ORDER].to_numpy(np.float64)
+    matrices = [np.resize(np.roll(X, -i * args.rows, axis=0), (args.rows, X.shape[1]))
+                for i in range(args.requests)]
+    expected = current.predict_fraud_proba(matrices[0], args.rows)
+
+    inline_rate, elapsed = run(lambda m: current.predict_fraud_proba(m, args.rows), matrices, args.clients)
+    print(f"{'inline (threads)':<22} {inline_rate:12,.0f} rows/s   {elapsed:6.2f} s")
+
+    for workers in worker_counts(args.max_workers):
+        pool = ScoringPool(workers=workers, queue_depth=4, submit_timeout_s=30, compiled_max_rows=args.rows)
+        pool.start(current)
+        assert np.allclose(pool.score(matrices[0], current), expected)
+        rate, elapsed = run(lambda m: pool.score(m, current), matrices, args.clients)
+        stats = pool.stats()
+        pool.stop()
+        print(f"{f'process pool x{workers}':<22} {rate:12,.0f} rows/s   {elapsed:6.2f} s   "
+              f"x{rate / inline_rate:4.1f} vs inline   inline fallbacks {stats['inline_fallbacks']}")
+
+
+if __name__ == "__main__":
+    main()
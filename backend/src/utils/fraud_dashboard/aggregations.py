@@ -0,0 +1,276 @@
+# src/utils/fraud_dashboard/aggregations.py
+#
+# Shared aggregation layer for the analytics endpoints. Every statistic they
+# serve is defined once here, either as a whole-collection accumulator
+# (SUMMARY_ACCUMULATORS, all computed by one $group) or as a grouping
+# (GROUPINGS, one sub-pipeline each). run_facets() puts exactly the pieces
+# an endpoint asks for into a single $facet stage, so a request reads the
+# transactions collection once however many groupings it combines.
+#
+# The same statistics are defined a second time over the rollups collection
+# (rollups.py), where every document already sums count / fraud_count /
+# amount / fraud_amount / legit_amount for one key, so the accumulators add
+# those up instead of counting rows. run_facets(..., rollup=True) uses them.
+
+import sys
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+SUMMARY = "summary"
+
+# The only fields the accumulators and groupings read
+FIELDS = (
+    "is_fraud", "transaction_amount", "timestamp", "day", "hour", "weekday",
+    "channel_atm", "channel_mobile", "channel_pos", "channel_web",
+)
+
+CHANNELS = ("mobile", "atm", "pos", "web")
+
+
+def _fraud_in_channel(channel: str) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [
+        {"$and": [{"$eq": ["$is_fraud", 1]}, {"$eq": [f"$channel_{channel}", 1]}]}, 1, 0,
+    ]}}
+
+
+# Whole-collection statistics, computed together in one $group
+SUMMARY_ACCUMULATORS: Dict[str, Dict[str, Any]] = {
+    "total_transactions": {"$sum": 1},
+    "fraud_transactions": {"$sum": {"$cond": ["$is_fraud", 1, 0]}},
+    "fraud_loss": {"$sum": {"$cond": [{"$eq": ["$is_fraud", 1]}, "$transaction_amount", 0]}},
+    "legit_volume": {"$sum": {"$cond": [{"$eq": ["$is_fraud", 0]}, "$transaction_amount", 0]}},
+    "total_fraud_loss": {"$sum": {"$cond": ["$is_fraud", "$transaction_amount", 0]}},
+    "avg_fraud_amount": {"$avg": {"$cond": ["$is_fraud", "$transaction_amount", None]}},
+    **{f"{channel}_fraud": _fraud_in_channel(channel) for channel in CHANNELS},
+    **{f"{channel}_total": {"$sum": f"$channel_{channel}"} for channel in CHANNELS},
+}
+
+# Rollup versions of the statistics above. Derived statistics are computed
+# after the $group from helper sums: name -> (helper accumulators, expression)
+ROLLUP_FIELDS = (
+    "year", "month", "day", "hour", "weekday", "channel",
+    "count", "fraud_count", "amount", "fraud_amount", "legit_amount",
+)
+
+
+def _rollup_in_channel(channel: str, measure: str) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [{"$eq": ["$channel", channel]}, f"${measure}", 0]}}
+
+
+ROLLUP_SUMMARY_ACCUMULATORS: Dict[str, Dict[str, Any]] = {
+    "total_transactions": {"$sum": "$count"},
+    "fraud_transactions": {"$sum": "$fraud_count"},
+    "fraud_loss": {"$sum": "$fraud_amount"},
+    "legit_volume": {"$sum": "$legit_amount"},
+    "total_fraud_loss": {"$sum": "$fraud_amount"},
+    **{f"{channel}_fraud": _rollup_in_channel(channel, "fraud_count") for channel in CHANNELS},
+    **{f"{channel}_total": _rollup_in_channel(channel, "count") for channel in CHANNELS},
+}
+ROLLUP_DERIVED: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {
+    "avg_fraud_amount": (
+        {"_fraud_n": {"$sum": "$fraud_count"}, "_fraud_amount": {"$sum": "$fraud_amount"}},
+        {"$cond": [{"$gt": ["$_fraud_n", 0]}, {"$divide": ["$_fraud_amount", "$_fraud_n"]}, None]},
+    ),
+}
+
+# Grouped statistics, one $facet sub-pipeline each
+GROUPINGS: Dict[str, List[Dict[str, Any]]] = {
+    # fraud per calendar day
+    "trend": [
+        {"$group": {
+            "_id": {
+                "day": "$day",
+                "year": {"$year": "$timestamp"},
+                "month": {"$month": "$timestamp"},
+            },
+            "fraud_count": {"$sum": {"$cond": ["$is_fraud", 1, 0]}},
+            "total": {"$sum": 1},
+            "fraud_amount": {"$sum": {"$cond": ["$is_fraud", "$transaction_amount", 0]}},
+        }},
+        {"$sort": {"_id.day": 1}},
+    ],
+    # amount per day of month
+    "volume_by_day": [
+        {"$group": {"_id": "$day", "volume": {"$sum": "$transaction_amount"}}},
+        {"$sort": {"_id": 1}},
+    ],
+    "hourly": [
+        {"$group": {"_id": "$hour", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ],
+    "weekday": [
+        {"$group": {"_id": "$weekday", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ],
+}
+
+ROLLUP_GROUPINGS: Dict[str, List[Dict[str, Any]]] = {
+    "trend": [
+        {"$group": {
+            "_id": {"day": "$day", "year": "$year", "month": "$month"},
+            "fraud_count": {"$sum": "$fraud_count"},
+            "total": {"$sum": "$count"},
+            "fraud_amount": {"$sum": "$fraud_amount"},
+        }},
+        {"$sort": {"_id.day": 1}},
+    ],
+    "volume_by_day": [
+        {"$group": {"_id": "$day", "volume": {"$sum": "$amount"}}},
+        {"$sort": {"_id": 1}},
+    ],
+    "hourly": [
+        {"$group": {"_id": "$hour", "count": {"$sum": "$count"}}},
+        {"$sort": {"_id": 1}},
+    ],
+    "weekday": [
+        {"$group": {"_id": "$weekday", "count": {"$sum": "$count"}}},
+        {"$sort": {"_id": 1}},
+    ],
+}
+
+
+def facet_pipeline(summary: Sequence[str] = (), groupings: Sequence[str] = (),
+                   match: Optional[Dict[str, Any]] = None, rollup: bool = False) -> List[Dict[str, Any]]:
+    """One-scan pipeline computing the named summary accumulators and groupings."""
+    accumulators = ROLLUP_SUMMARY_ACCUMULATORS if rollup else SUMMARY_ACCUMULATORS
+    derived = ROLLUP_DERIVED if rollup else {}
+    grouping_defs = ROLLUP_GROUPINGS if rollup else GROUPINGS
+    unknown = [s for s in summary if s not in accumulators and s not in derived] + \
+              [g for g in groupings if g not in grouping_defs]
+    if unknown:
+        raise ValueError(f"Unknown aggregations: {unknown}")
+    facets: Dict[str, List[Dict[str, Any]]] = {}
+    if summary:
+        group: Dict[str, Any] = {"_id": None}
+        group.update({name: accumulators[name] for name in summary if name in accumulators})
+        computed = {name: derived[name] for name in summary if name in derived}
+        for helpers, _ in computed.values():
+            group.update(helpers)
+        facets[SUMMARY] = [{"$group": group}]
+        if computed:
+            helper_names = {h for helpers, _ in computed.values() for h in helpers}
+            facets[SUMMARY] += [
+                {"$addFields": {name: expression for name, (_, expression) in computed.items()}},
+                {"$project": {h: 0 for h in sorted(helper_names)}},
+            ]
+    for name in groupings:
+        facets[name] = grouping_defs[name]
+
+    pipeline: List[Dict[str, Any]] = [{"$match": match}] if match else []
+    pipeline += [
+        {"$project": {field: 1 for field in (ROLLUP_FIELDS if rollup else FIELDS)}},
+        {"$facet": facets},
+    ]
+    return pipeline
+
+
+def run_facets(collection, summary: Sequence[str] = (), groupings: Sequence[str] = (),
+               match: Optional[Dict[str, Any]] = None, rollup: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run facet_pipeline() against `collection` (the rollups collection when
+    `rollup`). Returns the documents of each grouping by name and, under
+    SUMMARY, the single summary document (an empty list when the collection
+    is empty, like a plain $group).
+    """
+    result = list(collection.aggregate(facet_pipeline(summary, groupings, match, rollup), allowDiskUse=True))
+    if not result:
+        return {name: [] for name in ([SUMMARY] if summary else []) + list(groupings)}
+    return result[0]
+
+
+def pick(docs: List[Dict[str, Any]], fields: Mapping[str, str]) -> List[Dict[str, Any]]:
+    """Summary documents reduced to `fields` ({output name: summary name}), _id first."""
+    out = []
+    for doc in docs:
+        picked = {"_id": doc.get("_id")}
+        picked.update({name: doc.get(source) for name, source in fields.items()})
+        out.append(picked)
+    return out
+
+
+# -------------------------------------------
+# CUBE (arbitrary roll-ups of the rollups collection)
+# -------------------------------------------
+# Dimensions a cube query may group by. "date" is grouped as year/month/day
+# and formatted afterwards, since one determines the other.
+CUBE_DIMENSIONS = ("channel", "hour", "weekday", "kyc_verified", "date", "year", "month", "day", "source")
+CUBE_MEASURES: Dict[str, Dict[str, Any]] = {
+    "count": {"$sum": "$count"},
+    "fraud_count": {"$sum": "$fraud_count"},
+    "amount": {"$sum": "$amount"},
+    "fraud_amount": {"$sum": "$fraud_amount"},
+    "legit_amount": {"$sum": "$legit_amount"},
+}
+# measures derived from summed ones: name -> (sums needed, formula)
+CUBE_DERIVED = {
+    "fraud_rate": (("fraud_count", "count"), lambda c: c["fraud_count"] / c["count"] if c["count"] else None),
+}
+_DATE_PARTS = ("year", "month", "day")
+
+
+def date_key(value) -> int:
+    """A date as year * 10000 + month * 100 + day, the form cube date filters compare."""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def cube_pipeline(dimensions: Sequence[str], measures: Sequence[str],
+                  match: Optional[Dict[str, Any]] = None, start=None, end=None) -> List[Dict[str, Any]]:
+    """$group over the rollups summing `measures` per combination of `dimensions`, within [start, end]."""
+    unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS] + \
+              [m for m in measures if m not in CUBE_MEASURES and m not in CUBE_DERIVED]
+    if unknown:
+        raise ValueError(f"Unknown cube dimensions or measures: {unknown}")
+    group_by = []
+    for dimension in dimensions:
+        for field in (_DATE_PARTS if dimension == "date" else (dimension,)):
+            if field not in group_by:
+                group_by.append(field)
+    sums = []
+    for measure in measures:
+        for name in (CUBE_DERIVED[measure][0] if measure in CUBE_DERIVED else (measure,)):
+            if name not in sums:
+                sums.append(name)
+
+    conditions: List[Dict[str, Any]] = [match] if match else []
+    if start is not None or end is not None:
+        key = {"$add": [{"$multiply": ["$year", 10000]}, {"$multiply": ["$month", 100]}, "$day"]}
+        bounds = ([{"$gte": [key, date_key(start)]}] if start is not None else []) + \
+                 ([{"$lte": [key, date_key(end)]}] if end is not None else [])
+        conditions.append({"$expr": {"$and": bounds}})
+    pipeline: List[Dict[str, Any]] = []
+    if conditions:
+        pipeline.append({"$match": conditions[0] if len(conditions) == 1 else {"$and": conditions}})
+    group: Dict[str, Any] = {"_id": {field: f"${field}" for field in group_by} or None}
+    group.update({name: CUBE_MEASURES[name] for name in sums})
+    pipeline.append({"$group": group})
+    return pipeline
+
+
+def run_cube(collection, dimensions: Sequence[str], measures: Sequence[str],
+             match: Optional[Dict[str, Any]] = None, start=None, end=None) -> List[Dict[str, Any]]:
+    """
+    Cells of the cube rolled up to `dimensions`: one flat document per
+    combination present, holding the dimension values and `measures`,
+    sorted by the dimensions.
+    """
+    cells = []
+    for doc in collection.aggregate(cube_pipeline(dimensions, measures, match, start, end)):
+        key = doc.get("_id") or {}
+        cell: Dict[str, Any] = {}
+        for dimension in dimensions:
+            if dimension == "date":
+                cell["date"] = f"{key['year']:04d}-{key['month']:02d}-{key['day']:02d}"
+            else:
+                cell[dimension] = key.get(dimension)
+        for measure in measures:
+            cell[measure] = CUBE_DERIVED[measure][1](doc) if measure in CUBE_DERIVED else doc.get(measure, 0)
+        cells.append(cell)
+    cells.sort(key=lambda cell: tuple((cell[d] is None, cell[d]) for d in dimensions))
+    return cells
@@ -0,0 +1,172 @@
+# src/utils/fraud_dashboard/batcher.py
+#
+# Asyncio micro-batcher in front of the model. Concurrent /predict calls
+# each submit one feature row; a single worker task collects rows for up to
+# `max_wait_ms` (or until `max_batch_size` rows are queued), scores them with
+# one vectorized call and resolves every waiting request with its own result.
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+
+class MicroBatcher:
+
+    def __init__(self, score_fn: Callable[[np.ndarray], Sequence[Any]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 submit_timeout_s: float = 5.0, max_inflight: int = 1):
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.submit_timeout_s = submit_timeout_s
+        self.max_inflight = max(1, max_inflight)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+        # model calls run off the event loop; more than one batch at a time
+        # only helps when score_fn hands work to other processes
+        self._executor = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="micro-batcher")
+
+        # metrics
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self.total_queue_delay_s = 0.0
+        self._recent_delays_ms = deque(maxlen=2048)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # anything still queued is failed so callers fall back instead of hanging
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, row: np.ndarray) -> Any:
+        """Queue one FEATURE_ORDER row and wait for its entry of score_fn's output."""
+        future = self._loop.create_future()
+        await self._queue.put((np.asarray(row, dtype=np.float64).reshape(-1), future, time.perf_counter()))
+        return await future
+
+    def submit_threadsafe(self, row: np.ndarray) -> Any:
+        """Blocking submit for sync endpoints running in the threadpool."""
+        future = asyncio.run_coroutine_threadsafe(self.submit(row), self._loop)
+        return future.result(timeout=self.submit_timeout_s)
+
+    def in_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def _collect(self):
+        first = await self._queue.get()
+        batch = [first]
+        deadline = self._loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        # take whatever else is already waiting without extending the window
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._inflight.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._inflight.release()
+                raise
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            dispatched = time.perf_counter()
+            X = np.vstack([row for row, _, _ in batch])
+            try:
+                scores = await self._loop.run_in_executor(self._executor, self.score_fn, X)
+                for (_, future, _), score in zip(batch, scores):
+                    if not future.done():
+                        future.set_result(score)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self._record(batch, dispatched)
+        finally:
+            self._inflight.release()
+
+    def _record(self, batch, dispatched: float):
+        size = len(batch)
+        delays_ms = [(dispatched - enqueued) * 1000.0 for _, _, enqueued in batch]
+        with self._lock:
+            self.batches += 1
+            self.requests += size
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+            self.total_queue_delay_s += sum(delays_ms) / 1000.0
+            self._recent_delays_ms.extend(delays_ms)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            recent = np.array(self._recent_delays_ms) if self._recent_delays_ms else None
+            return {
+                "enabled": True,
+                "running": self.running,
+                "max_batch_size": self.max_batch_size,
+                "max_inflight": self.max_inflight,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self.batches,
+                "requests": self.requests,
+                "errors": self.errors,
+                "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "max_batch_size_seen": self.max_batch_seen,
+                "batch_size_histogram": dict(sorted(self.batch_size_counts.items())),
+                "avg_queue_delay_ms": self.total_queue_delay_s * 1000.0 / self.requests if self.requests else 0.0,
+                "p50_queue_delay_ms": float(np.percentile(recent, 50)) if recent is not None else 0.0,
+                "p99_queue_delay_ms": float(np.percentile(recent, 99)) if recent is not None else 0.0,
+            }
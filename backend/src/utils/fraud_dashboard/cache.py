@@ -3,6 +3,10 @@
 
 import sys
 import os
+import json
+import hashlib
+import inspect
+import functools
 import redis
 from dotenv import load_dotenv
 
@@ -15,10 +19,18 @@ dotenv_path = os.path.join(project_root, ".env")
 load_dotenv(dotenv_path=dotenv_path)
 # --- END OF NEW PATH FIX ---
 
+from src.utils.fraud_dashboard import telemetry
+
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 
+# Cached responses are keyed by the data generation, so they are dropped as
+# soon as the data changes; the TTL only bounds how long unused ones linger
+API_CACHE_PREFIX = "api:"
+API_CACHE_TTL_S = int(os.getenv("API_CACHE_TTL_S", 3600))
+DATA_GENERATION_KEY = "data_generation"
+
 redis_client = None
 
 def get_redis_client():
@@ -32,6 +44,7 @@ def get_redis_client():
                 decode_responses=True
             )
             redis_client.ping()
+            telemetry.instrument_redis(redis_client)
             print("Successfully connected to Redis.")
         except Exception as e:
             print(f"CRITICAL ERROR connecting to Redis: {e}")
@@ -48,7 +61,99 @@ def set_in_cache(client: redis.Redis, key: str, value: str, ttl_seconds: int = 3
 def get_from_cache(client: redis.Redis, key: str) -> str | None:
     if client:
         try:
-            return client.get(key)
+            value = client.get(key)
+            telemetry.count_cache_lookup("api", value is not None)
+            return value
         except Exception as e:
             print(f"Error getting cache for key '{key}': {e}")
-    return None
\ No newline at end of file
+    return None
+
+
+# -------------------------------------------
+# GENERATIONAL RESPONSE CACHE
+# -------------------------------------------
+def data_generation(client: redis.Redis) -> int:
+    """Current data generation (0 until the data first changes)."""
+    return int(client.get(DATA_GENERATION_KEY) or 0)
+
+
+def bump_data_generation(client: redis.Redis | None = None) -> int | None:
+    """
+    Mark the transaction data as changed: every response cached by @cached
+    before this call stops being served. Returns the new generation, or
+    None without Redis (nothing is cached then either).
+    """
+    client = client if client is not None else get_redis_client()
+    if client:
+        try:
+            return int(client.incr(DATA_GENERATION_KEY))
+        except Exception as e:
+            print(f"Error bumping the data generation: {e}")
+    return None
+
+
+def normalize_params(params: dict) -> str:
+    """Query parameters as a canonical string: unset ones dropped, strings trimmed, keys sorted."""
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        normalized[name] = value
+    return json.dumps(normalized, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def response_cache_key(name: str, generation: int, params: dict) -> str:
+    digest = hashlib.sha1(normalize_params(params).encode()).hexdigest()[:20]
+    return f"{API_CACHE_PREFIX}{name}:g{generation}:{digest}"
+
+
+def cached(ttl_seconds: int = API_CACHE_TTL_S):
+    """
+    Cache a read endpoint's JSON response in Redis under its name, its
+    normalized query parameters and the data generation. Error responses
+    ({"error": ...}) are not cached; without Redis the endpoint runs as is.
+    """
+    def decorate(endpoint):
+        name = f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+        signature = inspect.signature(endpoint)
+
+        def lookup(args, kwargs):
+            client = get_redis_client()
+            if client is None:
+                return None, None, None
+            try:
+                key = response_cache_key(name, data_generation(client), signature.bind(*args, **kwargs).arguments)
+            except Exception as e:
+                print(f"Error building cache key for '{name}': {e}")
+                return None, None, None
+            return client, key, get_from_cache(client, key)
+
+        def store(client, key, result):
+            if client is None or (isinstance(result, dict) and "error" in result):
+                return
+            from fastapi.encoders import jsonable_encoder
+            set_in_cache(client, key, json.dumps(jsonable_encoder(result)), ttl_seconds=ttl_seconds)
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def async_wrapper(*args, **kwargs):
+                client, key, value = lookup(args, kwargs)
+                if value is not None:
+                    return json.loads(value)
+                result = await endpoint(*args, **kwargs)
+                store(client, key, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            client, key, value = lookup(args, kwargs)
+            if value is not None:
+                return json.loads(value)
+            result = endpoint(*args, **kwargs)
+            store(client, key, result)
+            return result
+        return wrapper
+    return decorate
@@ -0,0 +1,574 @@
+# src/utils/fraud_dashboard/columnar.py
+#
+# Optional in-memory columnar engine for the dashboard queries
+# (ANALYTICS_ENGINE=columnar). The transactions collection, plus the
+# predictions when the rollups count them (rollups.ROLLUP_SOURCES), is loaded
+# once into compact NumPy columns:
+#
+#   channel one-hots        -> channel  uint8 code (CHANNEL_CODES, 4 = other)
+#   transaction/customer id -> int32 codes into a category list (-1 = none)
+#   timestamp               -> int64 nanoseconds, plus month uint16 (months since 1970)
+#   0/1 flags, hour/day/weekday -> uint8, counts -> int32, amounts -> float64
+#
+# Columns grow by doubling, so new documents are appended in place: every
+# refresh (at most once per COLUMNAR_REFRESH_INTERVAL_S, on the query path)
+# reads the documents whose ObjectId is newer than the last one loaded minus
+# COLUMNAR_SYNC_LAG_S, skipping the ones already loaded, which covers
+# writes that land late (write-behind). If a collection holds fewer
+# documents than that implies (load_to_mongo.py replaced it), everything is
+# reloaded in the background and the endpoints use MongoDB meanwhile.
+#
+# Queries work on a consistent snapshot of the first n rows with bincount
+# and boolean masks, and return exactly what the MongoDB paths return.
+#
+# Memory report and benchmark against the MongoDB aggregations:
+#     python src/utils/fraud_dashboard/columnar.py memory
+#     python src/utils/fraud_dashboard/columnar.py bench --repeat 20
+
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.features import CHANNELS, PROCESSED_COLUMNS
+from src.utils.fraud_dashboard import aggregations
+from src.utils.fraud_dashboard import rollups
+
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "mongo")
+COLUMNAR_ENABLED = ANALYTICS_ENGINE == "columnar"
+COLUMNAR_REFRESH_INTERVAL_S = float(os.getenv("COLUMNAR_REFRESH_INTERVAL_S", 1))
+COLUMNAR_SYNC_LAG_S = float(os.getenv("COLUMNAR_SYNC_LAG_S", 60))
+COLUMNAR_LOAD_CHUNK_ROWS = int(os.getenv("COLUMNAR_LOAD_CHUNK_ROWS", 100_000))
+COLUMNAR_INITIAL_CAPACITY = 1024
+
+# The sources the endpoints read: the rollup sources, or the raw transactions
+# when the rollups are off (the MongoDB fallback then scans transactions)
+ENGINE_SOURCES = rollups.ROLLUP_SOURCES if rollups.ROLLUP_ENABLED else (rollups.SOURCE_TRANSACTIONS,)
+SOURCE_CODES = {rollups.SOURCE_TRANSACTIONS: 0, rollups.SOURCE_PREDICTIONS: 1}
+CHANNEL_CODES = {name: code for code, name in enumerate(CHANNELS)}
+OTHER_CHANNEL_CODE = len(CHANNELS)
+
+COLUMN_TYPES = {
+    "source": np.uint8,
+    "transaction_id": np.int32,
+    "customer_id": np.int32,
+    "kyc_verified": np.uint8,
+    "account_age_days": np.float64,
+    "transaction_amount": np.float64,
+    "timestamp": np.int64,
+    "month": np.uint16,
+    "is_fraud": np.uint8,
+    "hour": np.uint8,
+    "day": np.uint8,
+    "weekday": np.uint8,
+    "channel": np.uint8,
+    "avg_txn_per_customer": np.float64,
+    "txns_count_per_customer": np.int32,
+    "amt_deviation": np.float64,
+    "high_amount_flag": np.uint8,
+    "is_night": np.uint8,
+    "is_weekend": np.uint8,
+}
+CATEGORICAL = ("transaction_id", "customer_id")
+# Columns read back as floats in documents; everything else is an int
+FLOAT_COLUMNS = frozenset(name for name, dtype in COLUMN_TYPES.items() if dtype == np.float64)
+
+
+class _Categories:
+    """value -> int32 code, in order of first appearance."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, values: Sequence) -> np.ndarray:
+        out = np.empty(len(values), dtype=np.int32)
+        codes, known = self.codes, self.values
+        for i, value in enumerate(values):
+            if value is None or value != value:  # missing / NaN
+                out[i] = -1
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(known)
+                known.append(value)
+            out[i] = code
+        return out
+
+    def nbytes(self) -> int:
+        # the strings plus a dict slot and a list slot each, roughly
+        return sum(sys.getsizeof(v) for v in self.values) + len(self.values) * (8 + 100)
+
+
+def frame_columns(frame: pd.DataFrame, source: str, categories: Dict[str, _Categories]) -> Dict[str, np.ndarray]:
+    """A processed-layout frame as engine columns."""
+    n = len(frame)
+    ts = pd.to_datetime(frame["timestamp"], format="ISO8601")
+    ns = ts.to_numpy("datetime64[ns]")
+    channel = np.full(n, OTHER_CHANNEL_CODE, dtype=np.uint8)
+    for name, code in CHANNEL_CODES.items():
+        channel[frame[f"channel_{name}"].to_numpy() == 1] = code
+    columns = {
+        "source": np.full(n, SOURCE_CODES[source], dtype=np.uint8),
+        "timestamp": ns.view(np.int64),
+        "month": ns.astype("datetime64[M]").astype(np.int64).astype(np.uint16),
+        "channel": channel,
+        "is_fraud": frame["is_fraud"].fillna(0).astype(bool).to_numpy(np.uint8),
+    }
+    for name in CATEGORICAL:
+        values = frame[name].tolist() if name in frame else [None] * n
+        columns[name] = categories[name].encode(values)
+    for name, dtype in COLUMN_TYPES.items():
+        if name not in columns:
+            columns[name] = frame[name].to_numpy(dtype)
+    return columns
+
+
+def _transaction_frames(db, since=None, chunk_rows: int = COLUMNAR_LOAD_CHUNK_ROWS):
+    yield from _frames(db[rollups.SOURCE_TRANSACTIONS], PROCESSED_COLUMNS, since, chunk_rows,
+                       lambda chunk: chunk.dropna(subset=["timestamp"]))
+
+
+def _prediction_frames(db, since=None, chunk_rows: int = COLUMNAR_LOAD_CHUNK_ROWS):
+    fields = list(rollups.PREDICTION_FIELDS) + ["customer_id"]
+
+    def convert(chunk: pd.DataFrame) -> pd.DataFrame:
+        frame = rollups.prediction_frame(chunk)
+        frame["customer_id"] = chunk.loc[frame.index, "customer_id"] if "customer_id" in chunk else None
+        frame["_id"] = chunk.loc[frame.index, "_id"]
+        return frame
+    yield from _frames(db[rollups.SOURCE_PREDICTIONS], fields, since, chunk_rows, convert)
+
+
+def _frames(collection, fields: Sequence[str], since, chunk_rows: int, convert):
+    """
+    (frame in the processed layout with an _id column, ObjectIds of every
+    document read) per chunk, in _id order. Rows that cannot be converted
+    are dropped from the frame but still counted in the ids.
+    """
+    query = {"_id": {"$gt": since}} if since is not None else {}
+    rows: List[Dict[str, Any]] = []
+
+    def emit():
+        chunk = pd.DataFrame(rows)
+        return convert(chunk), chunk["_id"].tolist()
+
+    for doc in collection.find(query, {field: 1 for field in fields}).sort("_id", 1).batch_size(10_000):
+        rows.append(doc)
+        if len(rows) >= chunk_rows:
+            yield emit()
+            rows = []
+    if rows:
+        yield emit()
+
+
+SOURCE_FRAMES = {
+    rollups.SOURCE_TRANSACTIONS: _transaction_frames,
+    rollups.SOURCE_PREDICTIONS: _prediction_frames,
+}
+
+
+class ColumnarEngine:
+
+    def __init__(self, sources: Sequence[str] = ENGINE_SOURCES,
+                 refresh_interval_s: float = COLUMNAR_REFRESH_INTERVAL_S,
+                 sync_lag_s: float = COLUMNAR_SYNC_LAG_S):
+        # filters and insights always read the transactions
+        self.sources = tuple(dict.fromkeys((rollups.SOURCE_TRANSACTIONS, *sources)))
+        self.refresh_interval_s = refresh_interval_s
+        self.sync_lag = timedelta(seconds=sync_lag_s)
+        self._lock = threading.RLock()
+        self._reset()
+        self.ready = False
+        self._loading = False
+        self._last_refresh = 0.0
+        self.loads = 0
+        self.appended = 0
+        self.load_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _reset(self):
+        self._columns = {name: np.empty(COLUMNAR_INITIAL_CAPACITY, dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+        self._n = 0
+        self._categories = {name: _Categories() for name in CATEGORICAL}
+        # per source: documents loaded, newest ObjectId and the ids within the sync lag of it
+        self._loaded = {source: 0 for source in self.sources}
+        self._newest = {source: None for source in self.sources}
+        self._recent: Dict[str, Set] = {source: set() for source in self.sources}
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---------- loading ----------
+    def append(self, columns: Dict[str, np.ndarray]):
+        """Append rows (a frame_columns() dict), growing the columns by doubling when full."""
+        rows = len(columns["source"])
+        if not rows:
+            return
+        with self._lock:
+            needed = self._n + rows
+            capacity = len(self._columns["source"])
+            if needed > capacity:
+                while capacity < needed:
+                    capacity *= 2
+                for name, column in self._columns.items():
+                    grown = np.empty(capacity, dtype=column.dtype)
+                    grown[:self._n] = column[:self._n]
+                    self._columns[name] = grown
+            for name, column in self._columns.items():
+                column[self._n:needed] = columns[name]
+            self._n = needed
+
+    def _add(self, source: str, frame: pd.DataFrame, ids: List):
+        self.append(frame_columns(frame, source, self._categories))
+        self._loaded[source] += len(ids)
+        if ids:
+            newest = ids[-1] if self._newest[source] is None else max(ids[-1], self._newest[source])
+            self._newest[source] = newest
+            horizon = newest.generation_time - self.sync_lag
+            self._recent[source] = {i for i in self._recent[source] | set(ids) if i.generation_time >= horizon}
+
+    def load(self, db=None) -> int:
+        """(Re)load every source from MongoDB; returns the rows loaded."""
+        db = db if db is not None else _database()
+        started = time.perf_counter()
+        with self._lock:
+            self.ready = False
+            self._reset()
+            for source in self.sources:
+                for frame, ids in SOURCE_FRAMES[source](db):
+                    self._add(source, frame, ids)
+            self.ready = True
+            self._last_refresh = time.monotonic()
+        self.loads += 1
+        self.load_seconds = time.perf_counter() - started
+        return self._n
+
+    def refresh(self, db=None) -> int:
+        """Append the documents written since the last refresh; returns the rows appended."""
+        from bson import ObjectId
+        db = db if db is not None else _database()
+        appended = 0
+        with self._lock:
+            for source in self.sources:
+                newest = self._newest[source]
+                since = ObjectId.from_datetime(newest.generation_time - self.sync_lag) if newest is not None else None
+                new_frames = []
+                for frame, ids in SOURCE_FRAMES[source](db, since):
+                    recent = self._recent[source]
+                    if recent:
+                        frame = frame[~frame["_id"].isin(recent)]
+                        ids = [i for i in ids if i not in recent]
+                    new_frames.append((frame, ids))
+                new = sum(len(ids) for _, ids in new_frames)
+                if db[source].estimated_document_count() < self._loaded[source] + new:
+                    # documents were removed: the collection was replaced
+                    self._reload_in_background(db)
+                    return 0
+                for frame, ids in new_frames:
+                    self._add(source, frame, ids)
+                appended += sum(len(frame) for frame, _ in new_frames)
+            self._last_refresh = time.monotonic()
+        self.appended += appended
+        return appended
+
+    def maybe_refresh(self):
+        if self.ready and time.monotonic() - self._last_refresh >= self.refresh_interval_s:
+            try:
+                self.refresh()
+            except Exception as e:
+                if str(e) != self.last_error:
+                    print(f"ERROR refreshing the columnar engine: {e}")
+                self.last_error = str(e)
+
+    def _reload_in_background(self, db=None):
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+            self.ready = False
+
+        def run():
+            try:
+                rows = self.load(db)
+                self.last_error = None
+                print(f"✓ Columnar engine loaded {rows} rows in {self.load_seconds:.1f}s")
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"ERROR loading the columnar engine, the endpoints keep using MongoDB. {e}")
+            finally:
+                self._loading = False
+
+        threading.Thread(target=run, name="columnar-loader", daemon=True).start()
+
+    def start(self):
+        """Load in the background; queries go to MongoDB until it is done."""
+        self._reload_in_background()
+
+    def available(self) -> bool:
+        """Ready to answer, after appending what was written since the last refresh."""
+        self.maybe_refresh()
+        return self.ready
+
+    # ---------- queries ----------
+    def _snapshot(self, sources: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        with self._lock:
+            n = self._n
+            columns = {name: column[:n] for name, column in self._columns.items()}
+        if sources is not None:
+            codes = [SOURCE_CODES[s] for s in sources if s in SOURCE_CODES]
+            mask = np.isin(columns["source"], codes)
+            if not mask.all():
+                columns = {name: column[mask] for name, column in columns.items()}
+        return columns
+
+    def facets(self, summary: Sequence[str] = (), groupings: Sequence[str] = (),
+               sources: Sequence[str] = ENGINE_SOURCES) -> Dict[str, List[Dict[str, Any]]]:
+        """Same result as aggregations.run_facets() for the named statistics."""
+        unknown = [s for s in summary if s not in aggregations.SUMMARY_ACCUMULATORS] + \
+                  [g for g in groupings if g not in GROUPING_QUERIES]
+        if unknown:
+            raise ValueError(f"Unknown aggregations: {unknown}")
+        columns = self._snapshot(sources)
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        if summary:
+            out[aggregations.SUMMARY] = [_summary(columns, summary)] if len(columns["source"]) else []
+        for name in groupings:
+            out[name] = GROUPING_QUERIES[name](columns)
+        return out
+
+    def amount_insights(self) -> Dict[str, Any]:
+        amount = self._snapshot((rollups.SOURCE_TRANSACTIONS,))["transaction_amount"]
+        if not len(amount):
+            return {"error": "No data found"}
+        return {"_id": None, "avg_amount": float(amount.mean()),
+                "max_amount": float(amount.max()), "min_amount": float(amount.min())}
+
+    def filter_transactions(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            channel: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Transactions (processed layout, without _id) between start and end, in one channel."""
+        columns = self._snapshot((rollups.SOURCE_TRANSACTIONS,))
+        mask = np.ones(len(columns["source"]), dtype=bool)
+        if start is not None and end is not None:
+            ts = columns["timestamp"]
+            mask &= (ts >= _ns(start)) & (ts <= _ns(end))
+        if channel:
+            code = CHANNEL_CODES.get(channel.lower())
+            if code is None:
+                return []
+            mask &= columns["channel"] == code
+        return self._documents({name: column[mask] for name, column in columns.items()})
+
+    def _documents(self, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        values: Dict[str, list] = {}
+        for name in PROCESSED_COLUMNS:
+            if name in CATEGORICAL:
+                known = self._categories[name].values
+                values[name] = [known[c] if c >= 0 else None for c in columns[name].tolist()]
+            elif name == "timestamp":
+                values[name] = pd.to_datetime(columns["timestamp"]).to_pydatetime().tolist()
+            elif name.startswith("channel_"):
+                values[name] = (columns["channel"] == CHANNEL_CODES[name[len("channel_"):]]).astype(np.int64).tolist()
+            elif name in FLOAT_COLUMNS:
+                values[name] = columns[name].tolist()
+            else:
+                values[name] = columns[name].astype(np.int64).tolist()
+        return [dict(zip(PROCESSED_COLUMNS, row)) for row in zip(*values.values())]
+
+    # ---------- reporting ----------
+    def memory_report(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self._n
+            capacity = len(self._columns["source"])
+            columns = {
+                name: {"dtype": str(column.dtype), "used_bytes": column.itemsize * n, "allocated_bytes": column.nbytes}
+                for name, column in self._columns.items()
+            }
+            categories = {name: {"values": len(c.values), "approx_bytes": c.nbytes()}
+                          for name, c in self._categories.items()}
+        allocated = sum(c["allocated_bytes"] for c in columns.values()) + sum(c["approx_bytes"] for c in categories.values())
+        return {
+            "ready": self.ready,
+            "rows": n,
+            "capacity": capacity,
+            "bytes_per_row": sum(c["used_bytes"] for c in columns.values()) / n if n else None,
+            "total_allocated_bytes": allocated,
+            "columns": columns,
+            "categories": categories,
+            "loads": self.loads,
+            "load_seconds": self.load_seconds,
+            "rows_appended": self.appended,
+            "last_error": self.last_error,
+        }
+
+
+# -------------------------------------------
+# VECTORIZED STATISTICS
+# -------------------------------------------
+def _ns(value: datetime) -> int:
+    if value.tzinfo is not None:  # stored timestamps are naive UTC, as MongoDB returns them
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(value, "ns").astype(np.int64))
+
+
+def _summary(columns: Dict[str, np.ndarray], names: Sequence[str]) -> Dict[str, Any]:
+    fraud = columns["is_fraud"].astype(bool)
+    amount = columns["transaction_amount"]
+    fraud_amount = amount[fraud]
+    channels = columns["channel"]
+    totals = np.bincount(channels, minlength=OTHER_CHANNEL_CODE + 1)
+    frauds = np.bincount(channels[fraud], minlength=OTHER_CHANNEL_CODE + 1)
+    values = {
+        "total_transactions": lambda: len(amount),
+        "fraud_transactions": lambda: int(fraud.sum()),
+        "fraud_loss": lambda: float(fraud_amount.sum()),
+        "legit_volume": lambda: float(amount[~fraud].sum()),
+        "total_fraud_loss": lambda: float(fraud_amount.sum()),
+        "avg_fraud_amount": lambda: float(fraud_amount.mean()) if len(fraud_amount) else None,
+    }
+    for name, code in CHANNEL_CODES.items():
+        values[f"{name}_fraud"] = lambda code=code: int(frauds[code])
+        values[f"{name}_total"] = lambda code=code: int(totals[code])
+    doc: Dict[str, Any] = {"_id": None}
+    doc.update({name: values[name]() for name in names})
+    return doc
+
+
+def _counts_by(column: np.ndarray, out_name: str, weights: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    present = np.bincount(column)
+    totals = present if weights is None else np.bincount(column, weights=weights)
+    return [
+        {"_id": key, out_name: int(totals[key]) if weights is None else float(totals[key])}
+        for key in np.flatnonzero(present).tolist()
+    ]
+
+
+def _trend(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    fraud = columns["is_fraud"].astype(bool)
+    key = columns["month"].astype(np.int64) * 32 + columns["day"]
+    keys, inverse = np.unique(key, return_inverse=True)
+    totals = np.bincount(inverse, minlength=len(keys))
+    frauds = np.bincount(inverse, weights=fraud, minlength=len(keys))
+    amounts = np.bincount(inverse, weights=np.where(fraud, columns["transaction_amount"], 0.0), minlength=len(keys))
+    months, days = keys // 32, keys % 32
+    docs = [
+        {"_id": {"day": int(d), "year": int(1970 + m // 12), "month": int(m % 12 + 1)},
+         "fraud_count": int(f), "total": int(t), "fraud_amount": float(a)}
+        for d, m, f, t, a in zip(days, months, frauds, totals, amounts)
+    ]
+    docs.sort(key=lambda doc: (doc["_id"]["day"], doc["_id"]["year"], doc["_id"]["month"]))
+    return docs
+
+
+GROUPING_QUERIES = {
+    "trend": _trend,
+    "volume_by_day": lambda c: _counts_by(c["day"], "volume", c["transaction_amount"]),
+    "hourly": lambda c: _counts_by(c["hour"], "count"),
+    "weekday": lambda c: _counts_by(c["weekday"], "count"),
+}
+
+
+def _database():
+    from src.utils.fraud_dashboard.database import get_database
+    return get_database()
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_engine: Optional[ColumnarEngine] = None
+
+
+def get_engine() -> Optional[ColumnarEngine]:
+    """The process's columnar engine, or None unless ANALYTICS_ENGINE=columnar."""
+    global _engine
+    if _engine is None and COLUMNAR_ENABLED:
+        _engine = ColumnarEngine()
+    return _engine
+
+
+def ready_engine() -> Optional[ColumnarEngine]:
+    """The engine when it can answer right now, else None (use MongoDB)."""
+    engine = get_engine()
+    return engine if engine is not None and engine.available() else None
+
+
+# -------------------------------------------
+# BENCHMARK
+# -------------------------------------------
+BENCH_QUERIES = {
+    "fraud_trend": ((), ("trend",)),
+    "fraud_by_channel": ([f"{c}_{k}" for c in aggregations.CHANNELS for k in ("fraud", "total")], ()),
+    "fraud_loss": (("total_fraud_loss", "avg_fraud_amount", "fraud_transactions"), ()),
+    "dashboard": (("total_transactions", "fraud_transactions", "fraud_loss", "legit_volume",
+                   *(f"{c}_total" for c in aggregations.CHANNELS)), ("volume_by_day", "hourly", "weekday")),
+}
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def benchmark(db, engine: ColumnarEngine, repeat: int = 10) -> List[Dict[str, Any]]:
+    """Best-of-`repeat` milliseconds per dashboard query: raw $facet scan, rollups and the engine."""
+    match = {"source": {"$in": [rollups.SOURCE_TRANSACTIONS]}}
+    rows = []
+    for name, (summary, groupings) in BENCH_QUERIES.items():
+        rows.append({
+            "query": name,
+            "mongo_scan_ms": _best_ms(lambda: aggregations.run_facets(
+                db[rollups.SOURCE_TRANSACTIONS], summary, groupings), repeat),
+            "mongo_rollups_ms": _best_ms(lambda: aggregations.run_facets(
+                db[rollups.ROLLUP_COLLECTION], summary, groupings, match=match, rollup=True), repeat),
+            "columnar_ms": _best_ms(lambda: engine.facets(
+                summary, groupings, (rollups.SOURCE_TRANSACTIONS,)), repeat),
+        })
+    rows.append({
+        "query": "filter_transactions(channel=atm)",
+        "mongo_scan_ms": _best_ms(lambda: list(db[rollups.SOURCE_TRANSACTIONS].find({"channel_atm": 1}, {"_id": 0})), repeat),
+        "mongo_rollups_ms": None,
+        "columnar_ms": _best_ms(lambda: engine.filter_transactions(channel="atm"), repeat),
+    })
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Columnar analytics engine: memory report and benchmark.")
+    parser.add_argument("command", choices=["memory", "bench"])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    database = _database()
+    engine = ColumnarEngine()
+    rows = engine.load(database)
+    print(f"Loaded {rows} rows in {engine.load_seconds:.2f}s")
+    if args.command == "memory":
+        report = engine.memory_report()
+        stats = database.command("collstats", rollups.SOURCE_TRANSACTIONS)
+        report["mongo_transactions_data_bytes"] = stats.get("size")
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print(f"{'query':36} {'mongo scan':>12} {'rollups':>12} {'columnar':>12}   (best of {args.repeat}, ms)")
+        for row in benchmark(database, engine, args.repeat):
+            rollup_ms = f"{row['mongo_rollups_ms']:12.2f}" if row["mongo_rollups_ms"] is not None else f"{'-':>12}"
+            print(f"{row['query']:36} {row['mongo_scan_ms']:12.2f} {rollup_ms} {row['columnar_ms']:12.2f}")
@@ -3,6 +3,7 @@
 
 import sys
 import os
+import time
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
@@ -24,6 +25,8 @@ print(f".env file exists: {os.path.exists(dotenv_path)}")
 load_dotenv(dotenv_path=dotenv_path)
 # --- END OF NEW PATH FIX ---
 
+from src.utils.fraud_dashboard import telemetry
+
 mongo_uri = os.getenv("MONGO_URI")
 db_name = os.getenv("MONGO_DB_NAME")
 
@@ -35,19 +38,38 @@ if not mongo_uri or not db_name:
     print("CRITICAL ERROR: MONGO_URI or MONGO_DB_NAME not found in .env file")
     sys.exit(1) # Exit if env variables are not set
 
-try:
-    client = MongoClient(mongo_uri)
-    # Test the connection
-    client.server_info()  # Will raise exception if cannot connect
-    db = client[db_name]
-    print(f"✓ MongoDB client initialized successfully.")
-    print(f"✓ Connected to database: {db_name}")
-except Exception as e:
-    print(f"CRITICAL ERROR connecting to MongoDB: {e}")
-    client = None
-    db = None
+# How long a connection attempt may block, and how often get_database()
+# retries after MongoDB was unreachable
+server_selection_timeout_ms = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+reconnect_interval_s = float(os.getenv("MONGO_RECONNECT_INTERVAL_S", 10))
+
+client = None
+db = None
+_last_connect_attempt = 0.0
+
+def connect() -> bool:
+    global client, db, _last_connect_attempt
+    _last_connect_attempt = time.monotonic()
+    try:
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=server_selection_timeout_ms,
+                             event_listeners=telemetry.mongo_event_listeners())
+        # Test the connection
+        client.server_info()  # Will raise exception if cannot connect
+        db = client[db_name]
+        print(f"✓ MongoDB client initialized successfully.")
+        print(f"✓ Connected to database: {db_name}")
+        return True
+    except Exception as e:
+        print(f"CRITICAL ERROR connecting to MongoDB: {e}")
+        client = None
+        db = None
+        return False
+
+connect()
 
 def get_database() -> Database:
+    if db is None and time.monotonic() - _last_connect_attempt >= reconnect_interval_s:
+        connect()
     if db is None:
         raise Exception("Database not initialized.")
     return db
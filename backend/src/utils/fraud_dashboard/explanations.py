@@ -0,0 +1,360 @@
+# src/utils/fraud_dashboard/explanations.py
+#
+# LLM explanations for predictions, generated off the request path.
+# /predict returns with explanation_status "pending"; an ExplanationWorker
+# calls the LLM with bounded concurrency and a timeout and hands the text
+# back through a callback that writes it onto the prediction record.
+# Explanations depend only on a small signature of the verdict, so they are
+# cached per signature (ExplanationCache) and most predictions skip the LLM.
+
+import os
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.fraud_dashboard import telemetry
+
+EXPLANATION_PENDING = "pending"
+EXPLANATION_READY = "ready"
+EXPLANATION_FAILED = "failed"
+EXPLANATION_SKIPPED = "skipped"
+# deterministic explanation built from the reasons when the LLM is slow or failing
+EXPLANATION_TEMPLATE = "template"
+
+GEMINI_MODEL_NAME = "models/gemini-2.5-flash"
+
+
+# -------------------------------------------
+# LLM CLIENTS
+# -------------------------------------------
+class GeminiClient:
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME, api_key: Optional[str] = None):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        request_options = {"timeout": timeout} if timeout else None
+        response = self._model.generate_content(prompt, request_options=request_options)
+        return response.text
+
+
+class StubLLMClient:
+    """
+    Local deterministic client for tests and offline development. Returns
+    `text` (or an echo of the prompt size), optionally after `delay_s`, or
+    raises when `fail` is set.
+    """
+
+    def __init__(self, text: Optional[str] = None, delay_s: float = 0.0, fail: bool = False):
+        self.text = text
+        self.delay_s = delay_s
+        self.fail = fail
+        self.calls = 0
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        self.calls += 1
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        if self.fail:
+            raise RuntimeError("stub LLM failure")
+        return self.text if self.text is not None else f"Stub explanation ({len(prompt)} prompt chars)."
+
+
+def get_llm_client():
+    """
+    LLM_CLIENT=gemini (default) or stub. None when Gemini cannot be set up:
+    the worker then delivers the failed / template explanation.
+    """
+    if os.getenv("LLM_CLIENT", "gemini").lower() == "stub":
+        return StubLLMClient()
+    try:
+        return GeminiClient()
+    except Exception as e:
+        print(f"CRITICAL ERROR initializing Gemini client, explanations will use the template. {e}")
+        return None
+
+
+# -------------------------------------------
+# SIGNATURE + PROMPT
+# -------------------------------------------
+# Width of the risk score buckets in explanation signatures; the prompt shows
+# the bucketed score, so every prediction with the same signature gets the
+# same prompt (0.01 matches the two decimals the prompt always displayed)
+RISK_SCORE_BUCKET = float(os.getenv("EXPLANATION_RISK_BUCKET", 0.01))
+
+Signature = Tuple[bool, float, str, Tuple[str, ...]]
+
+
+def explanation_signature(is_fraud: bool, risk_score: float, ml_reason: Optional[str],
+                          rule_reasons: List[str]) -> Signature:
+    """Normalized prompt inputs: verdict, risk bucket, ML reason, sorted unique rule reasons."""
+    bucket = round(round(risk_score / RISK_SCORE_BUCKET) * RISK_SCORE_BUCKET, 4)
+    return bool(is_fraud), bucket, ml_reason or "", tuple(sorted(set(rule_reasons)))
+
+
+def signature_key(signature: Signature) -> str:
+    return hashlib.sha1(json.dumps(signature).encode("utf-8")).hexdigest()
+
+
+def build_explanation_prompt(is_fraud: bool, risk_score: float, ml_reason: Optional[str],
+                             rule_reasons: List[str]) -> str:
+    ml_reason_text = ml_reason if ml_reason else ""
+    rule_reasons_text = "\n".join(f"- {r}" for r in rule_reasons) if rule_reasons else "None"
+
+    return f"""
+You are an experienced fraud analyst. Create a detailed yet concise explanation
+based only on the facts below. Never invent additional data.
+
+Summary:
+- Final Verdict: {is_fraud}
+- Risk Score: {risk_score:.2f}
+- ML Reason: "{ml_reason_text if ml_reason_text else "None"}"
+- Rule Reasons:
+{rule_reasons_text}
+
+Response requirements (PLAIN TEXT ONLY):
+1) Start with one sentence summarizing the outcome and confidence.
+2) Add a "Key Drivers:" section in plain text (no bullet symbols). List each driver on a new line starting with a dash (-), but do not use markdown or asterisks.
+3) Add an "Assessment:" section (max two sentences) explaining why the verdict matches the risk score and how rules/ML agree or conflict.
+4) Add a "Next Actions:" section with 1–2 concrete actions. If verdict is False and no indicators fired, say "No additional action required."
+5) Do NOT use markdown formatting, headings, asterisks, or numbered/bullet lists. Plain text only.
+
+Strict rules:
+- Do not change the verdict or risk score values.
+- Do not reference internal system names or models.
+- Only use the provided reasons and transaction context.
+"""
+
+
+def build_signature_prompt(signature: Signature) -> str:
+    is_fraud, risk_bucket, ml_reason, rule_reasons = signature
+    return build_explanation_prompt(is_fraud, risk_bucket, ml_reason, list(rule_reasons))
+
+
+def clean_explanation(text: str) -> str:
+    # hard-strip any stray markdown bullets if model still adds them
+    return text.strip().replace("*", "")
+
+
+def template_explanation(is_fraud: bool, risk_score: float, ml_reason: Optional[str],
+                         rule_reasons: List[str]) -> str:
+    """Plain-text explanation in the same layout the LLM is asked for, built only from the reasons."""
+    outcome = "was flagged as likely fraudulent" if is_fraud else "was assessed as legitimate"
+    lines = [f"The transaction {outcome} with a risk score of {risk_score:.2f}.", "Key Drivers:"]
+    drivers = ([ml_reason] if ml_reason else []) + list(rule_reasons)
+    lines += [f"- {d}" for d in drivers] if drivers else ["- No risk indicators fired."]
+
+    if rule_reasons:
+        assessment = (f"{len(rule_reasons)} rule-based indicator(s) fired, which drives the "
+                      f"{'fraud' if is_fraud else 'current'} verdict together with the model score.")
+    else:
+        assessment = "No rule-based indicators fired, so the verdict follows the model score."
+    lines.append(f"Assessment: {assessment}")
+
+    if is_fraud:
+        action = "Hold the transaction and verify it directly with the customer."
+    elif rule_reasons:
+        action = "Review the flagged indicators during routine monitoring."
+    else:
+        action = "No additional action required."
+    lines.append(f"Next Actions: {action}")
+    return "\n".join(lines)
+
+
+# -------------------------------------------
+# EXPLANATION CACHE
+# -------------------------------------------
+class ExplanationCache:
+    """
+    signature -> explanation text. In-process LRU in front of an optional
+    Redis tier with a TTL shared by all workers.
+    """
+
+    REDIS_PREFIX = "explanation:"
+
+    def __init__(self, max_entries: int = 1024, redis_client=None, ttl_seconds: int = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis_client
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _put_local(self, key: str, text: str):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, signature: Signature) -> Optional[str]:
+        key = signature_key(signature)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return text
+
+        if self._redis is not None:
+            try:
+                text = self._redis.get(self.REDIS_PREFIX + key)
+            except Exception as e:
+                print(f"Error getting cached explanation '{key}': {e}")
+                text = None
+            if text is not None:
+                self._put_local(key, text)
+                with self._lock:
+                    self.redis_hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, signature: Signature, text: str):
+        key = signature_key(signature)
+        self._put_local(key, text)
+        if self._redis is not None:
+            try:
+                self._redis.setex(self.REDIS_PREFIX + key, self.ttl_seconds, text)
+            except Exception as e:
+                print(f"Error caching explanation '{key}': {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+            }
+
+
+# -------------------------------------------
+# BACKGROUND WORKER
+# -------------------------------------------
+class ExplanationWorker:
+    """
+    Bounded pool of LLM calls. `on_result(key, status, text)` is invoked
+    from a worker thread once the explanation is ready; if the LLM fails,
+    exceeds the timeout or no client is configured (client=None) the job's
+    fallback text is delivered with status "template". After `breaker_failures` consecutive failures the LLM is
+    skipped for `breaker_cooldown_s` and fallbacks are delivered directly.
+    """
+
+    def __init__(self, client, on_result: Callable[[object, str, Optional[str]], None],
+                 max_workers: int = 4, max_pending: int = 1000, timeout_s: float = 20.0,
+                 breaker_failures: int = 5, breaker_cooldown_s: float = 30.0):
+        self.client = client
+        self.on_result = on_result
+        self.max_pending = max_pending
+        self.timeout_s = timeout_s
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self._consecutive_failures = 0
+        self._breaker_open_until = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explanations")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.short_circuited = 0
+        self.total_llm_s = 0.0
+
+    def breaker_open(self) -> bool:
+        return time.monotonic() < self._breaker_open_until
+
+    def submit(self, key, prompt: str, fallback: Optional[str] = None) -> bool:
+        """Queue an explanation; False if the queue is full (caller marks it skipped)."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        try:
+            self._executor.submit(self._run, key, prompt, fallback)
+        except RuntimeError:
+            # executor already shut down
+            self._slots.release()
+            return False
+        return True
+
+    def _run(self, key, prompt: str, fallback: Optional[str]):
+        start = time.perf_counter()
+        called = False
+        try:
+            if self.client is None:
+                raise RuntimeError("LLM client is not available")
+            if self.breaker_open():
+                with self._lock:
+                    self.short_circuited += 1
+                raise RuntimeError("LLM circuit open")
+            called = True
+            text = clean_explanation(self.client.generate(prompt, timeout=self.timeout_s))
+            elapsed = time.perf_counter() - start
+            if elapsed > self.timeout_s:
+                raise TimeoutError(f"LLM call took {elapsed:.1f}s (timeout {self.timeout_s:.1f}s)")
+            status = EXPLANATION_READY
+            with self._lock:
+                self._consecutive_failures = 0
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            if fallback is not None:
+                text, status = fallback, EXPLANATION_TEMPLATE
+            else:
+                text, status = f"LLM explanation failed: {e}", EXPLANATION_FAILED
+            if called:
+                with self._lock:
+                    self.failed += 1
+                    if isinstance(e, TimeoutError):
+                        self.timed_out += 1
+                    self._consecutive_failures += 1
+                    if self._consecutive_failures >= self.breaker_failures:
+                        self._breaker_open_until = time.monotonic() + self.breaker_cooldown_s
+                        self._consecutive_failures = 0
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            self.completed += 1
+            if called:
+                self.total_llm_s += elapsed
+        if called:
+            telemetry.observe_stage("llm_explanation", elapsed)
+        try:
+            self.on_result(key, status, text)
+        except Exception as e:
+            print(f"ERROR: failed to store explanation for {key}: {e}")
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "rejected": self.rejected,
+                "short_circuited": self.short_circuited,
+                "breaker_open": self.breaker_open(),
+                "in_flight": self.submitted - self.completed,
+                "avg_llm_ms": self.total_llm_s * 1000.0 / (self.completed - self.short_circuited)
+                if self.completed > self.short_circuited else 0.0,
+            }
@@ -0,0 +1,272 @@
+# src/utils/fraud_dashboard/features.py
+#
+# Shared feature pipeline for online scoring (single + batch) and for
+# regenerating the processed CSVs the model is trained on.
+#
+# Run directly to refit the scaling parameters from data/raw/transactions.csv,
+# write models/feature_pipeline.json and regenerate data/processed/*.csv:
+#     python src/utils/fraud_dashboard/features.py
+
+import sys
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+FEATURE_ORDER = [
+    'kyc_verified', 'account_age_days', 'transaction_amount', 'hour', 'day',
+    'weekday', 'channel_atm', 'channel_mobile', 'channel_pos',
+    'channel_web', 'avg_txn_per_customer', 'txns_count_per_customer',
+    'amt_deviation', 'high_amount_flag', 'is_night', 'is_weekend'
+]
+
+CHANNELS = ["atm", "mobile", "pos", "web"]
+
+# Column order of data/processed/transactions_processed.csv
+PROCESSED_COLUMNS = [
+    'transaction_id', 'customer_id', 'kyc_verified', 'account_age_days',
+    'transaction_amount', 'timestamp', 'is_fraud', 'hour', 'day', 'weekday',
+    'channel_atm', 'channel_mobile', 'channel_pos', 'channel_web',
+    'avg_txn_per_customer', 'txns_count_per_customer', 'amt_deviation',
+    'high_amount_flag', 'is_night', 'is_weekend'
+]
+
+ARTIFACT_PATH = os.path.join(project_root, "models", "feature_pipeline.json")
+RAW_DATA_PATH = os.path.join(project_root, "data", "raw", "transactions.csv")
+PROCESSED_DIR = os.path.join(project_root, "data", "processed")
+
+# Quantiles used when fitting: amounts are clipped at the 99th percentile and
+# the high amount flag fires above the 95th percentile of clipped amounts.
+AMOUNT_CLIP_QUANTILE = 0.99
+HIGH_AMOUNT_QUANTILE = 0.95
+
+# Night = 22:00-05:59, matching the training data
+NIGHT_START_HOUR = 22
+NIGHT_END_HOUR = 5
+
+# Customer aggregates used online when no customer history is supplied
+DEFAULT_AVG_TXN_PER_CUSTOMER = 0.12
+DEFAULT_TXNS_COUNT_PER_CUSTOMER = 5
+
+TRAIN_TEST_SPLIT = 0.2
+SPLIT_RANDOM_STATE = 42
+
+
+def normalize_raw(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce raw transaction columns to the types the pipeline expects.
+    Accepts both the CSV layout (kyc 'Yes'/'No', 'Mobile') and the API
+    layout (kyc 0/1, 'mobile').
+    """
+    out = frame.copy()
+    kyc = out["kyc_verified"]
+    if not pd.api.types.is_numeric_dtype(kyc):
+        kyc = kyc.astype(str).str.strip().str.lower().isin(["1", "yes", "true"])
+    out["kyc_verified"] = kyc.astype(np.int64)
+    out["account_age_days"] = out["account_age_days"].astype(np.float64)
+    out["transaction_amount"] = out["transaction_amount"].astype(np.float64)
+    out["channel"] = out["channel"].astype(str).str.lower()
+    out["timestamp"] = pd.to_datetime(out["timestamp"], format="ISO8601")
+    return out
+
+
+class FeaturePipeline:
+    """
+    Fitted scaling parameters plus the vectorized transforms that turn raw
+    transactions into the FEATURE_ORDER matrix.
+    """
+
+    PARAM_NAMES = [
+        "amount_clip_upper", "amount_min", "amount_max",
+        "account_age_min", "account_age_max", "high_amount_threshold",
+    ]
+
+    def __init__(self, params: Dict[str, float]):
+        missing = [p for p in self.PARAM_NAMES if p not in params]
+        if missing:
+            raise ValueError(f"Feature pipeline params missing: {missing}")
+        self.params = {p: float(params[p]) for p in self.PARAM_NAMES}
+
+    @classmethod
+    def fit(cls, raw: pd.DataFrame) -> "FeaturePipeline":
+        raw = normalize_raw(raw)
+        clip_upper = raw["transaction_amount"].quantile(AMOUNT_CLIP_QUANTILE)
+        clipped = raw["transaction_amount"].clip(upper=clip_upper)
+        return cls({
+            "amount_clip_upper": clip_upper,
+            "amount_min": clipped.min(),
+            "amount_max": clipped.max(),
+            "account_age_min": raw["account_age_days"].min(),
+            "account_age_max": raw["account_age_days"].max(),
+            "high_amount_threshold": clipped.quantile(HIGH_AMOUNT_QUANTILE),
+        })
+
+    # ---------- persistence ----------
+    def save(self, path: str = ARTIFACT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        artifact = {
+            "feature_order": FEATURE_ORDER,
+            "params": self.params,
+            "fitted_at": datetime.utcnow().isoformat(),
+        }
+        with open(path, "w") as f:
+            json.dump(artifact, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str = ARTIFACT_PATH) -> "FeaturePipeline":
+        with open(path) as f:
+            artifact = json.load(f)
+        if artifact.get("feature_order") != FEATURE_ORDER:
+            raise ValueError(f"Feature order in {path} does not match FEATURE_ORDER")
+        return cls(artifact["params"])
+
+    # ---------- transforms ----------
+    def clip_amount(self, amount: np.ndarray) -> np.ndarray:
+        return np.minimum(amount, self.params["amount_clip_upper"])
+
+    def scale_amount(self, clipped_amount: np.ndarray) -> np.ndarray:
+        lo, hi = self.params["amount_min"], self.params["amount_max"]
+        return (clipped_amount - lo) / (hi - lo) if hi > lo else np.zeros_like(clipped_amount)
+
+    def scale_account_age(self, age: np.ndarray) -> np.ndarray:
+        lo, hi = self.params["account_age_min"], self.params["account_age_max"]
+        return (age - lo) / (hi - lo) if hi > lo else np.zeros_like(age)
+
+    def transform(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Engineer the FEATURE_ORDER columns for a whole frame of raw
+        transactions. Customer aggregates are read from the optional
+        'avg_txn_per_customer' / 'txns_count_per_customer' columns and fall
+        back to the online defaults when absent.
+        """
+        raw = normalize_raw(raw)
+        n = len(raw)
+
+        timestamps = raw["timestamp"].dt
+        hour = timestamps.hour.to_numpy(np.int64)
+        weekday = timestamps.weekday.to_numpy(np.int64)
+        channel = raw["channel"].to_numpy()
+
+        clipped = self.clip_amount(raw["transaction_amount"].to_numpy(np.float64))
+
+        if "avg_txn_per_customer" in raw:
+            avg_txn = raw["avg_txn_per_customer"].to_numpy(np.float64)
+        else:
+            avg_txn = np.full(n, DEFAULT_AVG_TXN_PER_CUSTOMER)
+        if "txns_count_per_customer" in raw:
+            txn_count = raw["txns_count_per_customer"].to_numpy(np.int64)
+        else:
+            txn_count = np.full(n, DEFAULT_TXNS_COUNT_PER_CUSTOMER, dtype=np.int64)
+
+        columns = {
+            "kyc_verified": raw["kyc_verified"].to_numpy(np.int64),
+            "account_age_days": self.scale_account_age(raw["account_age_days"].to_numpy(np.float64)),
+            "transaction_amount": self.scale_amount(clipped),
+            "hour": hour,
+            "day": timestamps.day.to_numpy(np.int64),
+            "weekday": weekday,
+        }
+        for name in CHANNELS:
+            columns[f"channel_{name}"] = (channel == name).astype(np.int64)
+        columns.update({
+            "avg_txn_per_customer": avg_txn,
+            "txns_count_per_customer": txn_count,
+            "amt_deviation": clipped - avg_txn,
+            "high_amount_flag": (clipped > self.params["high_amount_threshold"]).astype(np.int64),
+            "is_night": ((hour >= NIGHT_START_HOUR) | (hour <= NIGHT_END_HOUR)).astype(np.int64),
+            "is_weekend": (weekday >= 5).astype(np.int64),
+        })
+        return pd.DataFrame(columns, index=raw.index)[FEATURE_ORDER]
+
+    def transform_matrix(self, raw: pd.DataFrame) -> np.ndarray:
+        return self.transform(raw).to_numpy(np.float64)
+
+    def customer_aggregates(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Offline customer aggregates over a full dataset: mean clipped amount
+        and transaction count per customer, broadcast back to every row.
+        """
+        raw = normalize_raw(raw)
+        clipped = pd.Series(self.clip_amount(raw["transaction_amount"].to_numpy(np.float64)), index=raw.index)
+        grouped = clipped.groupby(raw["customer_id"])
+        return pd.DataFrame({
+            "avg_txn_per_customer": grouped.transform("mean"),
+            "txns_count_per_customer": grouped.transform("count").astype(np.int64),
+        }, index=raw.index)
+
+    def build_processed(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """Rebuild the transactions_processed.csv layout from raw transactions."""
+        raw = normalize_raw(raw)
+        features = self.transform(raw.join(self.customer_aggregates(raw)))
+        processed = pd.concat(
+            [raw[["transaction_id", "customer_id", "timestamp", "is_fraud"]], features],
+            axis=1,
+        )
+        return processed[PROCESSED_COLUMNS]
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_pipeline: Optional[FeaturePipeline] = None
+
+
+def get_pipeline() -> FeaturePipeline:
+    """
+    Pipeline used by the API. Loaded from the persisted artifact; if the
+    artifact is missing it is refit from the raw CSV and saved.
+    """
+    global _pipeline
+    if _pipeline is None:
+        try:
+            _pipeline = FeaturePipeline.load(ARTIFACT_PATH)
+        except FileNotFoundError:
+            print(f"WARNING: {ARTIFACT_PATH} not found, fitting feature pipeline from {RAW_DATA_PATH}")
+            _pipeline = FeaturePipeline.fit(pd.read_csv(RAW_DATA_PATH))
+            _pipeline.save(ARTIFACT_PATH)
+    return _pipeline
+
+
+def regenerate_processed(raw_path: str = RAW_DATA_PATH, out_dir: str = PROCESSED_DIR,
+                         artifact_path: str = ARTIFACT_PATH) -> Dict[str, int]:
+    """Refit the pipeline and rewrite the processed CSVs and the artifact."""
+    from sklearn.model_selection import train_test_split
+
+    raw = pd.read_csv(raw_path)
+    cleaned = raw.dropna().drop_duplicates(subset=["transaction_id"])
+
+    pipeline = FeaturePipeline.fit(cleaned)
+    pipeline.save(artifact_path)
+
+    processed = pipeline.build_processed(cleaned)
+    model_columns: List[str] = FEATURE_ORDER + ["is_fraud"]
+    train, test = train_test_split(
+        processed[model_columns],
+        test_size=TRAIN_TEST_SPLIT,
+        random_state=SPLIT_RANDOM_STATE,
+        stratify=processed["is_fraud"],
+    )
+
+    os.makedirs(out_dir, exist_ok=True)
+    cleaned.to_csv(os.path.join(out_dir, "transactions_raw_cleaned.csv"), index=False)
+    processed.to_csv(os.path.join(out_dir, "transactions_processed.csv"), index=False)
+    train.to_csv(os.path.join(out_dir, "train.csv"), index=False)
+    test.to_csv(os.path.join(out_dir, "test.csv"), index=False)
+
+    return {"raw": len(raw), "processed": len(processed), "train": len(train), "test": len(test)}
+
+
+if __name__ == "__main__":
+    counts = regenerate_processed()
+    print(f"Feature pipeline saved to {ARTIFACT_PATH}")
+    print(f"Regenerated processed CSVs in {PROCESSED_DIR}: {counts}")
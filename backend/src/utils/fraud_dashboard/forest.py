@@ -0,0 +1,143 @@
+# src/utils/fraud_dashboard/forest.py
+#
+# Array-based inference for tree ensembles. The fitted sklearn forest is
+# flattened into contiguous NumPy node arrays (feature, threshold, children,
+# leaf class distribution) and every tree of every row is advanced one level
+# per step, so scoring a row costs at most max_depth vectorized steps instead
+# of a DataFrame validation plus a joblib dispatch per tree.
+
+import json
+import os
+from typing import Any, Optional
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots", "classes")
+
+
+class CompiledForest:
+    """
+    Flattened random forest. Leaves point to themselves, so a (row, tree)
+    cursor that reached its leaf stays there; traversal takes at most
+    `max_depth` steps.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 max_depth: int, classes: np.ndarray, n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features = n_features
+        self.n_trees = len(roots)
+        self.is_leaf = left == np.arange(len(left))
+        # column of the positive (fraud) class in predict_proba
+        positive = np.flatnonzero(classes == 1)
+        self.positive_index = int(positive[0]) if len(positive) else len(classes) - 1
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "CompiledForest":
+        """Compile a fitted RandomForestClassifier / ExtraTreesClassifier."""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or not hasattr(estimators[0], "tree_"):
+            raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(offset, offset + n, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+
+            # per-node class distribution, normalized like DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            values.append(value / totals)
+
+            roots.append(offset)
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+        )
+
+    def save(self, directory: str):
+        """Write the node arrays as .npy files so they can be memory-mapped by `load`."""
+        os.makedirs(directory, exist_ok=True)
+        arrays = dict(zip(ARRAY_NAMES, (self.feature, self.threshold, self.left, self.right,
+                                        self.value, self.roots, self.classes_)))
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(directory, "forest.json"), "w") as f:
+            json.dump({"max_depth": self.max_depth, "n_features": self.n_features}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "CompiledForest":
+        """
+        Load arrays written by `save`. With mmap_mode="r" the node arrays are
+        read-only file mappings, shared by every worker process that loads them.
+        """
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ARRAY_NAMES}
+        with open(os.path.join(directory, "forest.json")) as f:
+            meta = json.load(f)
+        return cls(max_depth=meta["max_depth"], n_features=meta["n_features"], **arrays)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index reached by every row in every tree, shape (n_rows, n_trees)."""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        n_rows = X.shape[0]
+        nodes = np.tile(self.roots, n_rows)
+        row_of = np.repeat(np.arange(n_rows), self.n_trees)
+
+        # advance only the (row, tree) cursors that have not reached a leaf yet
+        active = np.arange(nodes.size)
+        while active.size:
+            current = nodes[active]
+            go_left = X[row_of[active], self.feature[current]] <= self.threshold[current]
+            nxt = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = nxt
+            active = active[~self.is_leaf[nxt]]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities, shape (n_rows, n_classes), as in sklearn."""
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict_fraud_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probability of the fraud class for each row, shape (n_rows,)."""
+        leaves = self.apply(X)
+        return self.value[leaves, self.positive_index].mean(axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,250 @@
+# src/utils/fraud_dashboard/idempotency.py
+#
+# Idempotent /predict. A request is identified by its Idempotency-Key header
+# or, without one, by a fingerprint of (customer_id, timestamp,
+# transaction_amount, channel). The first request computes the result; later
+# ones get the stored result from an in-process TTL cache or Redis, without
+# rescoring, re-updating the customer profile or writing new documents.
+# Duplicates that arrive while the first is still running wait for it: on
+# an in-process event, or across workers by polling Redis while a
+# SET NX lock is held. A duplicate is only computed again if the first
+# attempt raised; if it is still running after IDEMPOTENCY_WAIT_S the
+# duplicate gets RequestInProgress (HTTP 409) instead.
+
+import sys
+import os
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "1") == "1"
+IDEMPOTENCY_TTL_S = int(os.getenv("IDEMPOTENCY_TTL_S", 86400))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_WAIT_S = float(os.getenv("IDEMPOTENCY_WAIT_S", 10))
+
+
+def transaction_fingerprint(customer_id: str, timestamp: str, transaction_amount: float, channel: str) -> str:
+    raw = "|".join([str(customer_id), str(timestamp), repr(float(transaction_amount)), str(channel).strip().lower()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def request_key(idempotency_key: Optional[str], payload: Dict[str, Any]) -> str:
+    """Cache key: the client's Idempotency-Key if given, else the transaction fingerprint."""
+    if idempotency_key:
+        return "key:" + hashlib.sha256(idempotency_key.encode("utf-8")).hexdigest()
+    return "fp:" + transaction_fingerprint(
+        payload["customer_id"], payload["timestamp"], payload["transaction_amount"], payload["channel"]
+    )
+
+
+class RequestInProgress(Exception):
+    """The first request with this key is still running; the caller should retry later."""
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class IdempotencyCache:
+    """
+    key -> stored JSON result. In-process TTL + LRU dict in front of an
+    optional Redis tier shared by all workers.
+    """
+
+    REDIS_PREFIX = "idempotency:"
+    LOCK_SUFFIX = ":lock"
+
+    def __init__(self, redis_client=None, ttl_seconds: int = IDEMPOTENCY_TTL_S,
+                 max_entries: int = IDEMPOTENCY_CACHE_SIZE, wait_s: float = IDEMPOTENCY_WAIT_S):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_s = wait_s
+        self._redis = redis_client
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.redis_waits = 0
+
+    # ---------- storage ----------
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put_local(self, key: str, result: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_redis(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._redis is None:
+            return None
+        try:
+            data = self._redis.get(self.REDIS_PREFIX + key)
+        except Exception as e:
+            print(f"Error reading idempotency key '{key}' from Redis: {e}")
+            return None
+        return json.loads(data) if data else None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._get_local(key)
+        if result is None:
+            result = self._get_redis(key)
+            if result is not None:
+                with self._lock:
+                    self._put_local(key, result)
+        return result
+
+    def set(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._put_local(key, result)
+        if self._redis is not None:
+            try:
+                self._redis.setex(self.REDIS_PREFIX + key, self.ttl_seconds, json.dumps(result, default=str))
+            except Exception as e:
+                print(f"Error storing idempotency key '{key}' in Redis: {e}")
+
+    # ---------- cross-worker lock ----------
+    def _acquire_redis_lock(self, key: str) -> bool:
+        """True if this worker may compute `key` (or Redis is unavailable)."""
+        if self._redis is None:
+            return True
+        try:
+            lock_ttl = max(1, int(self.wait_s * 2))
+            return bool(self._redis.set(self.REDIS_PREFIX + key + self.LOCK_SUFFIX, "1", nx=True, ex=lock_ttl))
+        except Exception as e:
+            print(f"Error taking idempotency lock '{key}': {e}")
+            return True
+
+    def _release_redis_lock(self, key: str):
+        if self._redis is None:
+            return
+        try:
+            self._redis.delete(self.REDIS_PREFIX + key + self.LOCK_SUFFIX)
+        except Exception as e:
+            print(f"Error releasing idempotency lock '{key}': {e}")
+
+    def _wait_redis(self, key: str, deadline: float) -> Optional[Dict[str, Any]]:
+        """
+        Poll for the result another worker is computing. None if that worker
+        gave up its lock without a result; RequestInProgress at `deadline`.
+        """
+        delay = 0.005
+        while time.monotonic() < deadline:
+            result = self._get_redis(key)
+            if result is not None:
+                return result
+            try:
+                if not self._redis.exists(self.REDIS_PREFIX + key + self.LOCK_SUFFIX):
+                    # the other worker failed (or stored its result just now)
+                    return self._get_redis(key)
+            except Exception:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        raise RequestInProgress(key)
+
+    # ---------- entry point ----------
+    def run(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Stored result for `key`, or compute() it once. Returns
+        (result, replayed) where replayed is True if compute() did not run
+        for this call. Raises RequestInProgress when another request for
+        `key` is still computing after wait_s.
+        """
+        result = self.get(key)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+            return result, True
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            if not inflight.done.wait(self.wait_s):
+                raise RequestInProgress(key)
+            if inflight.error is None:
+                return inflight.result, True
+            if isinstance(inflight.error, RequestInProgress):
+                raise RequestInProgress(key)
+            # the first attempt raised: try again (coalescing with other retries)
+            return self.run(key, compute)
+
+        try:
+            deadline = time.monotonic() + self.wait_s
+            while True:
+                locked = self._acquire_redis_lock(key)
+                if locked:
+                    break
+                with self._lock:
+                    self.redis_waits += 1
+                result = self._wait_redis(key, deadline)
+                if result is not None:
+                    inflight.result = result
+                    with self._lock:
+                        self._put_local(key, result)
+                    return result, True
+                # the other worker released its lock without a result: its attempt raised
+
+            with self._lock:
+                self.misses += 1
+            try:
+                result = compute()
+                self.set(key, result)
+                inflight.result = result
+                return result, False
+            finally:
+                if locked:
+                    self._release_redis_lock(key)
+        except BaseException as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.done.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "redis_waits": self.redis_waits,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -2,8 +2,9 @@
 
 import sys
 import os
+import time
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,9 +13,18 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.utils.fraud_dashboard.cache import get_redis_client
+from src.utils.fraud_dashboard import write_behind
+from src.utils.fraud_dashboard import wal
+from src.utils.fraud_dashboard import telemetry
+from src.utils.fraud_dashboard import backtest
+from src.utils.fraud_dashboard.rule_store import get_rule_store
+from src.utils.fraud_dashboard.rule_stats import get_rule_stats
+from src.utils.fraud_dashboard import rollups
+from src.utils.fraud_dashboard import columnar
 from src.utils.fraud_dashboard.routers import analytics, overview, alerts, insights, filters
 from src.utils.fraud_dashboard.routers import prediction
 from src.utils.fraud_dashboard.routers import feedback
+from src.utils.fraud_dashboard.routers import rules
 from src.utils.fraud_dashboard.routers import auth
 
 
@@ -37,9 +47,61 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template, not raw path, to keep cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        telemetry.observe_request(request.method, route, status, time.perf_counter() - start)
+
+
 @app.on_event("startup")
 async def startup_event():
     app.redis_client = get_redis_client()
+    # load the serving model in the background and follow ACTIVE for hot swaps
+    prediction.model_registry.warm()
+    prediction.model_registry.start_watcher()
+    prediction.start_scoring_pool()
+    prediction.start_shadow_scorer()
+    # compiled rules from MongoDB, reloaded when their version changes
+    get_rule_store().start()
+    if get_rule_stats() is not None:
+        get_rule_stats().start()
+    # pre-aggregated dashboard metrics, built once if missing
+    rollups.bootstrap()
+    if rollups.get_rollup_writer() is not None:
+        rollups.get_rollup_writer().start()
+    # optional in-memory analytics engine, loaded in the background
+    if columnar.get_engine() is not None:
+        columnar.get_engine().start()
+    prediction.bootstrap_customer_profiles()
+    await prediction.start_micro_batcher()
+    # replays prediction/alert writes logged while MongoDB was unavailable
+    wal.start_wal()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await prediction.stop_micro_batcher()
+    prediction.model_registry.stop_watcher()
+    prediction.stop_scoring_pool()
+    prediction.stop_shadow_scorer()
+    get_rule_store().stop()
+    if get_rule_stats() is not None:
+        get_rule_stats().stop()
+    if rollups.get_rollup_writer() is not None:
+        rollups.get_rollup_writer().stop()
+    backtest.shutdown_pool()
+    prediction.shutdown_explanation_worker()
+    # write out buffered predictions and alerts before the process exits
+    write_behind.stop_all()
+    wal.stop_wal()
    
 
 app.include_router(analytics.router, prefix="/api")
@@ -48,9 +110,15 @@ app.include_router(alerts.router, prefix="/api")
 app.include_router(insights.router, prefix="/api")
 app.include_router(filters.router, prefix="/api")
 app.include_router(feedback.router, prefix="/api")
+app.include_router(rules.router, prefix="/api")
 app.include_router(prediction.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Latency histograms, request counts, cache and storage metrics in Prometheus text format."""
+    return Response(telemetry.render(), media_type=telemetry.CONTENT_TYPE)
+
 # app.include_router(analytics_router)
 @app.get("/")
 async def root():
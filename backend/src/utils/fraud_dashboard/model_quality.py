@@ -0,0 +1,193 @@
+# src/utils/fraud_dashboard/model_quality.py
+#
+# Live model quality from analyst feedback. Each model version has one
+# document in `model_quality` holding its confusion matrix:
+#
+#   {"_id": "v2", "tp": 12, "fp": 3, "tn": 940, "fn": 5, "updated_at": ...}
+#
+# The matrix measures the model alone: a prediction is counted by its
+# ml_fraud (the model's decision), not by is_fraud, which also includes the
+# rule score. /feedback/submit stamps actual_status on the prediction and
+# moves the prediction into its cell with a single $inc (and out of its old cell if
+# the analyst changes their mind), so accuracy / precision / recall / F1
+# are read from counters instead of joining feedback with predictions.
+#
+# Counters for feedback submitted before this existed come from a one-time
+# backfill, which rebuilds every version's matrix from scratch:
+#   python src/utils/fraud_dashboard/model_quality.py backfill
+
+import sys
+import os
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.database import get_collection
+
+QUALITY_COLLECTION = "model_quality"
+# predictions written before model versions were recorded
+UNVERSIONED = "unversioned"
+CELLS = ("tp", "fp", "tn", "fn")
+BACKFILL_CHUNK = 1000
+
+
+def model_version_of(prediction: Dict) -> str:
+    return prediction.get("model_version") or UNVERSIONED
+
+
+def model_decision(prediction: Dict, legacy: bool = False) -> Optional[bool]:
+    """
+    The model's own verdict on a prediction. Records written before ml_fraud
+    was stored only carry the combined is_fraud, used when `legacy` is set;
+    otherwise they have no model decision (None).
+    """
+    if prediction.get("ml_fraud") is not None:
+        return bool(prediction["ml_fraud"])
+    if legacy:
+        return bool(prediction.get("is_fraud"))
+    return None
+
+
+def confusion_cell(predicted_fraud: Any, actual_status: str) -> str:
+    """'tp' / 'fp' / 'tn' / 'fn' for a prediction and its feedback label ('fraud' / 'legit')."""
+    actual_fraud = actual_status == "fraud"
+    if bool(predicted_fraud):
+        return "tp" if actual_fraud else "fp"
+    return "fn" if actual_fraud else "tn"
+
+
+def record_feedback(prediction: Dict, actual_status: str, previous_status: Optional[str] = None):
+    """
+    Count feedback `actual_status` against `prediction` (needs ml_fraud and
+    model_version). `previous_status` is the label the prediction carried
+    before, whose count is moved rather than duplicated. Records without
+    ml_fraud are left to backfill().
+    """
+    predicted_fraud = model_decision(prediction)
+    if predicted_fraud is None:
+        return
+    new_cell = confusion_cell(predicted_fraud, actual_status)
+    inc = {new_cell: 1}
+    if previous_status:
+        old_cell = confusion_cell(predicted_fraud, previous_status)
+        if old_cell == new_cell:
+            return
+        inc[old_cell] = -1
+    get_collection(QUALITY_COLLECTION).update_one(
+        {"_id": model_version_of(prediction)},
+        {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def compute_metrics(counts: Dict) -> Dict:
+    tp, fp, tn, fn = (int(counts.get(cell, 0)) for cell in CELLS)
+    total = tp + fp + tn + fn
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "accuracy_score": round((tp + tn) / total, 5) if total else 0.0,
+        "precision_score": round(precision, 5),
+        "recall_score": round(recall, 5),
+        "f1_score": round(f1, 5),
+        "confusion_matrix": {"tp": tp, "fp": fp, "tn": tn, "fn": fn},
+        "samples": total,
+    }
+
+
+def quality_by_version() -> Dict[str, Dict]:
+    """Metrics for every model version that has received feedback."""
+    return {
+        doc["_id"]: dict(compute_metrics(doc), updated_at=doc.get("updated_at"))
+        for doc in get_collection(QUALITY_COLLECTION).find()
+    }
+
+
+# -------------------------------------------
+# BACKFILL
+# -------------------------------------------
+def _latest_feedback() -> Dict[str, str]:
+    """prediction_id -> the most recent actual_status submitted for it."""
+    latest = {}
+    cursor = get_collection("feedback").find(
+        {}, {"prediction_id": 1, "actual_status": 1}
+    ).sort("submitted_at", 1)
+    for doc in cursor:
+        status = str(doc.get("actual_status", "")).lower()
+        if status in ("fraud", "legit") and ObjectId.is_valid(str(doc.get("prediction_id"))):
+            latest[str(doc["prediction_id"])] = status
+    return latest
+
+
+def backfill() -> Dict[str, Any]:
+    """
+    Stamp the latest feedback on every prediction and rebuild all
+    confusion matrices from it. Predictions without ml_fraud (written before
+    it was stored) are counted by their combined is_fraud. Run once with the API stopped (or idle):
+    feedback counted while it runs is overwritten.
+    """
+    latest = _latest_feedback()
+    predictions = get_collection("predictions")
+    counts: Dict[str, Dict[str, int]] = {}
+    matched = 0
+
+    ids = list(latest)
+    for start in range(0, len(ids), BACKFILL_CHUNK):
+        chunk = [ObjectId(pid) for pid in ids[start:start + BACKFILL_CHUNK]]
+        updates: List[UpdateOne] = []
+        projection = {"ml_fraud": 1, "is_fraud": 1, "model_version": 1}
+        for prediction in predictions.find({"_id": {"$in": chunk}}, projection):
+            status = latest[str(prediction["_id"])]
+            cells = counts.setdefault(model_version_of(prediction), dict.fromkeys(CELLS, 0))
+            cells[confusion_cell(model_decision(prediction, legacy=True), status)] += 1
+            updates.append(UpdateOne({"_id": prediction["_id"]}, {"$set": {"actual_status": status}}))
+        if updates:
+            predictions.bulk_write(updates, ordered=False)
+            matched += len(updates)
+
+    quality = get_collection(QUALITY_COLLECTION)
+    now = datetime.utcnow()
+    quality.delete_many({"_id": {"$nin": list(counts)}})
+    for version, cells in counts.items():
+        quality.replace_one({"_id": version}, dict(cells, updated_at=now), upsert=True)
+
+    return {
+        "feedback_predictions": len(latest),
+        "matched_predictions": matched,
+        "versions": {version: compute_metrics(cells) for version, cells in counts.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model quality counters built from feedback.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill")
+    sub.add_parser("show")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        result = backfill()
+        print(f"Counted feedback for {result['matched_predictions']} of "
+              f"{result['feedback_predictions']} predictions.")
+        versions = result["versions"]
+    else:
+        versions = quality_by_version()
+    for version, metrics in sorted(versions.items()):
+        print(f"{version:<14} n={metrics['samples']:<8} accuracy={metrics['accuracy_score']:.4f} "
+              f"precision={metrics['precision_score']:.4f} recall={metrics['recall_score']:.4f} "
+              f"f1={metrics['f1_score']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
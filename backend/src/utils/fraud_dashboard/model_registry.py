@@ -0,0 +1,368 @@
+# src/utils/fraud_dashboard/model_registry.py
+#
+# Versioned model artifacts and the model that is currently serving.
+#
+#   models/registry/
+#       ACTIVE                 name of the serving version
+#       v1/model.joblib        uncompressed joblib dump (loadable with mmap_mode)
+#       v1/compiled/*.npy      flattened forest arrays (forest.CompiledForest)
+#       v1/metadata.json       version, created_at, source, sha256, model info
+#
+# Models are loaded lazily on first use (or by warm() in the background at
+# startup), with mmap_mode="r" so worker processes share the file pages.
+# activate() builds the new model completely before swapping a single
+# reference, so requests in flight finish on the model they started with.
+# Every worker polls ACTIVE, so activating in one worker (admin endpoint or
+# the CLI below) switches all of them.
+#
+# Usage:
+#   python src/utils/fraud_dashboard/model_registry.py list
+#   python src/utils/fraud_dashboard/model_registry.py register path/to/model.pkl [--activate]
+#   python src/utils/fraud_dashboard/model_registry.py activate v2
+
+import sys
+import os
+import argparse
+import hashlib
+import json
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.features import FEATURE_ORDER
+from src.utils.fraud_dashboard.forest import CompiledForest
+
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(project_root, "models", "registry"))
+LEGACY_MODEL_PATH = os.path.join(project_root, "models", "random_forest_model.pkl")
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", 5))
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+
+ACTIVE_FILE = "ACTIVE"
+MODEL_FILE = "model.joblib"
+COMPILED_DIR = "compiled"
+METADATA_FILE = "metadata.json"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, text: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class LoadedModel:
+    """
+    One registry version ready to score. The compiled forest is loaded
+    eagerly; the sklearn estimator only when a caller needs it (large batches,
+    or models that cannot be compiled).
+    """
+
+    def __init__(self, version: str, directory: str, metadata: Dict[str, Any], compile_model: bool = True):
+        self.version = version
+        self.directory = directory
+        self.metadata = metadata
+        self.loaded_at = datetime.now()
+        self._sklearn = None
+        self._sklearn_lock = threading.Lock()
+
+        self.compiled: Optional[CompiledForest] = None
+        compiled_dir = os.path.join(directory, COMPILED_DIR)
+        if compile_model and os.path.isdir(compiled_dir):
+            try:
+                self.compiled = CompiledForest.load(compiled_dir, mmap_mode=MODEL_MMAP_MODE)
+            except Exception as e:
+                print(f"WARNING: could not load compiled forest for model {version}, using sklearn. {e}")
+        if self.compiled is None:
+            # nothing else can score this version
+            self.load_sklearn()
+
+    @property
+    def sklearn(self):
+        return self.load_sklearn()
+
+    def load_sklearn(self):
+        if self._sklearn is None:
+            with self._sklearn_lock:
+                if self._sklearn is None:
+                    self._sklearn = joblib.load(os.path.join(self.directory, MODEL_FILE), mmap_mode=MODEL_MMAP_MODE)
+        return self._sklearn
+
+    def predict_fraud_proba(self, X: np.ndarray, compiled_max_rows: int) -> np.ndarray:
+        """Fraud probability for each row of a FEATURE_ORDER matrix."""
+        if self.compiled is not None and len(X) <= compiled_max_rows:
+            return self.compiled.predict_fraud_proba(X)
+        return self.sklearn.predict_proba(pd.DataFrame(X, columns=FEATURE_ORDER))[:, 1]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            **self.metadata,
+            "loaded_at": self.loaded_at.isoformat(),
+            "engine": "compiled" if self.compiled is not None else "sklearn",
+        }
+
+
+class ModelRegistry:
+
+    def __init__(self, root: str = REGISTRY_DIR, compile_models: bool = True):
+        self.root = root
+        self.compile_models = compile_models
+        self._active: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        self._active_mtime: Optional[float] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+
+    # ---------- artifacts ----------
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        found = [v for v in os.listdir(self.root)
+                 if os.path.isfile(os.path.join(self.root, v, METADATA_FILE))]
+        return sorted(found, key=lambda v: (len(v), v))
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self._version_dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def _next_version(self) -> str:
+        numbers = [int(v[1:]) for v in self.versions() if v.startswith("v") and v[1:].isdigit()]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def register(self, model: Any, version: Optional[str] = None, source: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store a fitted model as a new version. The model is dumped
+        uncompressed (required for mmap_mode) next to its compiled arrays.
+        """
+        version = version or self._next_version()
+        directory = self._version_dir(version)
+        if os.path.exists(directory):
+            raise ValueError(f"Model version '{version}' already exists")
+
+        staging = f"{directory}.staging"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        model_path = os.path.join(staging, MODEL_FILE)
+        joblib.dump(model, model_path)
+
+        compiled = False
+        if self.compile_models:
+            try:
+                CompiledForest.from_sklearn(model).save(os.path.join(staging, COMPILED_DIR))
+                compiled = True
+            except Exception as e:
+                print(f"WARNING: model {version} cannot be compiled, it will be served by sklearn. {e}")
+
+        metadata = {
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "source": source,
+            "sha256": _sha256(model_path),
+            "model_type": type(model).__name__,
+            "n_estimators": len(getattr(model, "estimators_", []) or []),
+            "n_features": int(getattr(model, "n_features_in_", len(FEATURE_ORDER))),
+            "feature_order": FEATURE_ORDER,
+            "compiled": compiled,
+            **(extra or {}),
+        }
+        with open(os.path.join(staging, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(staging, directory)
+        return version
+
+    def register_file(self, path: str, **kwargs) -> str:
+        return self.register(joblib.load(path), source=os.path.abspath(path), **kwargs)
+
+    # ---------- active model ----------
+    def _active_path(self) -> str:
+        return os.path.join(self.root, ACTIVE_FILE)
+
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(self._active_path()) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            versions = self.versions()
+            return versions[-1] if versions else None
+
+    def _ensure_registry(self):
+        """Import models/random_forest_model.pkl as v1 the first time the registry is used."""
+        if self.versions() or not os.path.exists(LEGACY_MODEL_PATH):
+            return
+        print(f"Registering {LEGACY_MODEL_PATH} as model v1.")
+        version = self.register_file(LEGACY_MODEL_PATH, version="v1")
+        _write_atomic(self._active_path(), version)
+
+    def active(self) -> Optional[LoadedModel]:
+        """The model currently serving; loads it on first use."""
+        current = self._active
+        if current is not None:
+            return current
+        with self._lock:
+            if self._active is None:
+                try:
+                    self._ensure_registry()
+                    version = self.active_version()
+                    if version is None:
+                        print("CRITICAL ERROR: no model registered.")
+                        return None
+                    self._active = self._load(version)
+                    self._active_mtime = self._pointer_mtime()
+                    print(f"Model {version} loaded from the registry.")
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"CRITICAL ERROR loading model. {e}")
+            return self._active
+
+    def _load(self, version: str) -> LoadedModel:
+        directory = self._version_dir(version)
+        loaded = LoadedModel(version, directory, self.metadata(version), self.compile_models)
+        # fail before the swap, not on the first request
+        loaded.predict_fraud_proba(np.zeros((1, loaded.metadata["n_features"])), compiled_max_rows=1)
+        return loaded
+
+    def load(self, version: str) -> LoadedModel:
+        """Load any registered version without serving it (e.g. a shadow challenger)."""
+        if version not in self.versions():
+            raise KeyError(f"Unknown model version '{version}'")
+        return self._load(version)
+
+    def activate(self, version: str, persist: bool = True) -> LoadedModel:
+        """Load `version` fully, then swap it in atomically."""
+        loaded = self.load(version)
+        with self._lock:
+            previous = self._active
+            self._active = loaded
+            if persist:
+                _write_atomic(self._active_path(), version)
+            self._active_mtime = self._pointer_mtime()
+            self.swaps += 1
+        print(f"Model swapped: {previous.version if previous else None} -> {version}")
+        return loaded
+
+    def warm(self):
+        """Load the active model off the request path (called at startup)."""
+        threading.Thread(target=self.active, name="model-warmup", daemon=True).start()
+
+    # ---------- file watcher ----------
+    def _pointer_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self._active_path()).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def start_watcher(self, interval_s: float = MODEL_WATCH_INTERVAL_S):
+        if interval_s <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval_s,), name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self, interval_s: float):
+        while not self._stop.wait(interval_s):
+            mtime = self._pointer_mtime()
+            if mtime is None or mtime == self._active_mtime:
+                continue
+            version = self.active_version()
+            current = self._active
+            try:
+                if current is None or version != current.version:
+                    self.activate(version, persist=False)
+                else:
+                    self._active_mtime = mtime
+            except Exception as e:
+                self.last_error = str(e)
+                self._active_mtime = mtime
+                print(f"ERROR: could not switch to model {version}, keeping {current.version if current else None}. {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        current = self._active
+        return {
+            "active": current.describe() if current is not None else None,
+            "versions": self.versions(),
+            "swaps": self.swaps,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "last_error": self.last_error,
+        }
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_registry: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(compile_models=os.getenv("INFERENCE_ENGINE", "compiled").lower() == "compiled")
+    return _registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned fraud model artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    reg = sub.add_parser("register")
+    reg.add_argument("path")
+    reg.add_argument("--version")
+    reg.add_argument("--activate", action="store_true")
+    act = sub.add_parser("activate")
+    act.add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == "list":
+        active = registry.active_version()
+        for version in registry.versions():
+            meta = registry.metadata(version)
+            marker = "*" if version == active else " "
+            print(f"{marker} {version:<8} {meta['created_at']}  {meta['model_type']}  {meta.get('source') or ''}")
+    elif args.command == "register":
+        version = registry.register_file(args.path, version=args.version)
+        print(f"Registered {args.path} as {version}")
+        if args.activate:
+            _write_atomic(registry._active_path(), version)
+            print(f"Activated {version}; running servers pick it up within {MODEL_WATCH_INTERVAL_S}s")
+    elif args.command == "activate":
+        if args.version not in registry.versions():
+            sys.exit(f"Unknown model version '{args.version}'")
+        _write_atomic(registry._active_path(), args.version)
+        print(f"Activated {args.version}; running servers pick it up within {MODEL_WATCH_INTERVAL_S}s")
+
+
+if __name__ == "__main__":
+    main()
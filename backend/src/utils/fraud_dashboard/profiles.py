@@ -0,0 +1,209 @@
+# src/utils/fraud_dashboard/profiles.py
+#
+# Per-customer running amount statistics (count / mean / variance) used for
+# the customer features and the HIGH_AMOUNT_VS_AVG rule. Updates are O(1)
+# Welford steps; the in-process dict is the primary tier and an optional
+# Redis hash per customer is shared between workers.
+
+import sys
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+PROFILE_KEY_PREFIX = "customer_profile:"
+PROFILE_REDIS_ENABLED = os.getenv("PROFILE_STORE_REDIS", "0") == "1"
+
+# Atomic Welford step on the Redis hash so concurrent workers never lose updates
+_WELFORD_LUA = """
+local count = tonumber(redis.call('HGET', KEYS[1], 'count') or '0')
+local mean = tonumber(redis.call('HGET', KEYS[1], 'mean') or '0')
+local m2 = tonumber(redis.call('HGET', KEYS[1], 'm2') or '0')
+local x = tonumber(ARGV[1])
+count = count + 1
+local delta = x - mean
+mean = mean + delta / count
+m2 = m2 + delta * (x - mean)
+local out = {string.format('%d', count), string.format('%.17g', mean), string.format('%.17g', m2)}
+redis.call('HSET', KEYS[1], 'count', out[1], 'mean', out[2], 'm2', out[3])
+return out
+"""
+
+
+def welford_update(count: int, mean: float, m2: float, x: float) -> Tuple[int, float, float]:
+    count += 1
+    delta = x - mean
+    mean += delta / count
+    m2 += delta * (x - mean)
+    return count, mean, m2
+
+
+def merge_moments(a: Tuple[int, float, float], b: Tuple[int, float, float]) -> Tuple[int, float, float]:
+    """Combine two (count, mean, m2) summaries (Chan et al. parallel update)."""
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return n, mean, m2
+
+
+def to_profile(count: int, mean: float, m2: float) -> Dict[str, float]:
+    variance = m2 / count if count > 0 else 0.0
+    return {
+        "txn_count": count,
+        "avg_txn_amount": mean,
+        "variance": variance,
+        "std_txn_amount": variance ** 0.5,
+    }
+
+
+class CustomerProfileStore:
+    """
+    customer_id -> (count, mean, m2) of the customer's (clipped) amounts.
+    """
+
+    def __init__(self, redis_client=None):
+        self._profiles: Dict[str, Tuple[int, float, float]] = {}
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._welford = redis_client.register_script(_WELFORD_LUA) if redis_client else None
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def _redis_get(self, customer_id: str) -> Optional[Tuple[int, float, float]]:
+        if not self._redis:
+            return None
+        try:
+            data = self._redis.hgetall(PROFILE_KEY_PREFIX + customer_id)
+        except Exception as e:
+            print(f"Error reading customer profile '{customer_id}' from Redis: {e}")
+            return None
+        if not data:
+            return None
+        return int(data["count"]), float(data["mean"]), float(data["m2"])
+
+    def get(self, customer_id: str) -> Optional[Dict[str, float]]:
+        """Current profile of a customer, or None if the customer is unknown."""
+        moments = self._profiles.get(customer_id)
+        if moments is None:
+            moments = self._redis_get(customer_id)
+            if moments is None:
+                return None
+            with self._lock:
+                self._profiles.setdefault(customer_id, moments)
+        return to_profile(*moments)
+
+    def update(self, customer_id: str, amount: float) -> Dict[str, float]:
+        """Add one transaction amount to the customer's profile and return it."""
+        moments = None
+        if self._welford is not None:
+            try:
+                count, mean, m2 = self._welford(keys=[PROFILE_KEY_PREFIX + customer_id], args=[amount])
+                moments = (int(count), float(mean), float(m2))
+            except Exception as e:
+                print(f"Error updating customer profile '{customer_id}' in Redis: {e}")
+
+        with self._lock:
+            if moments is None:
+                moments = welford_update(*self._profiles.get(customer_id, (0, 0.0, 0.0)), amount)
+            self._profiles[customer_id] = moments
+        return to_profile(*moments)
+
+    def load(self, summaries: Dict[str, Tuple[int, float, float]]):
+        """Bulk-merge precomputed (count, mean, m2) summaries into the store."""
+        with self._lock:
+            for customer_id, moments in summaries.items():
+                current = self._profiles.get(customer_id)
+                self._profiles[customer_id] = merge_moments(current, moments) if current else moments
+
+        if self._redis and summaries:
+            try:
+                # Redis may already hold live state from other workers; only seed missing customers
+                ids = list(summaries)
+                pipe = self._redis.pipeline(transaction=False)
+                for customer_id in ids:
+                    pipe.exists(PROFILE_KEY_PREFIX + customer_id)
+                exists = pipe.execute()
+                pipe = self._redis.pipeline(transaction=False)
+                for customer_id, found in zip(ids, exists):
+                    if not found:
+                        count, mean, m2 = self._profiles[customer_id]
+                        pipe.hset(PROFILE_KEY_PREFIX + customer_id,
+                                  mapping={"count": count, "mean": repr(mean), "m2": repr(m2)})
+                pipe.execute()
+            except Exception as e:
+                print(f"Error seeding customer profiles in Redis: {e}")
+
+    def bootstrap(self, transactions_collection, predictions_collection=None, amount_clip_upper: float = None) -> int:
+        """
+        Build profiles in bulk from MongoDB with one aggregation per
+        collection. Processed transaction documents already carry the
+        customer mean and each row's deviation from it; scored predictions
+        carry raw amounts, which are clipped like the training data.
+        """
+        summaries: Dict[str, Tuple[int, float, float]] = {}
+
+        if transactions_collection is not None:
+            pipeline = [
+                {"$group": {
+                    "_id": "$customer_id",
+                    "count": {"$sum": 1},
+                    "mean": {"$avg": {"$add": ["$avg_txn_per_customer", "$amt_deviation"]}},
+                    "m2": {"$sum": {"$multiply": ["$amt_deviation", "$amt_deviation"]}},
+                }}
+            ]
+            for doc in transactions_collection.aggregate(pipeline, allowDiskUse=True):
+                if doc["_id"] is not None:
+                    summaries[doc["_id"]] = (int(doc["count"]), float(doc["mean"] or 0.0), float(doc["m2"] or 0.0))
+
+        if predictions_collection is not None:
+            amount = "$transaction_amount"
+            if amount_clip_upper is not None:
+                amount = {"$min": ["$transaction_amount", amount_clip_upper]}
+            pipeline = [
+                {"$group": {
+                    "_id": "$customer_id",
+                    "count": {"$sum": 1},
+                    "mean": {"$avg": amount},
+                    "sumsq": {"$sum": {"$multiply": [amount, amount]}},
+                }}
+            ]
+            for doc in predictions_collection.aggregate(pipeline, allowDiskUse=True):
+                if doc["_id"] is None:
+                    continue
+                count, mean = int(doc["count"]), float(doc["mean"] or 0.0)
+                m2 = max(float(doc["sumsq"] or 0.0) - count * mean * mean, 0.0)
+                current = summaries.get(doc["_id"])
+                moments = (count, mean, m2)
+                summaries[doc["_id"]] = merge_moments(current, moments) if current else moments
+
+        self.load(summaries)
+        return len(summaries)
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_store: Optional[CustomerProfileStore] = None
+
+
+def get_profile_store() -> CustomerProfileStore:
+    global _store
+    if _store is None:
+        redis_client = None
+        if PROFILE_REDIS_ENABLED:
+            from src.utils.fraud_dashboard.cache import get_redis_client
+            redis_client = get_redis_client()
+        _store = CustomerProfileStore(redis_client)
+    return _store
@@ -0,0 +1,386 @@
+# src/utils/fraud_dashboard/rollups.py
+#
+# Pre-aggregated dashboard metrics. The rollups collection holds one
+# document per combination of
+#
+#   source        "transactions" (ingested by load_to_mongo.py) or
+#                 "predictions" (recorded by /prediction/predict and /predict_batch)
+#   year, month, day, hour, weekday, channel, kyc_verified
+#
+# with the measures count, fraud_count, amount, fraud_amount and
+# legit_amount. Amounts are the scaled transaction_amount of the processed
+# layout, so ingested and predicted transactions add up the same way, and a
+# transaction is fraud when its is_fraud label (or the prediction's verdict)
+# is truthy. The number of documents grows with the days covered, not with
+# the number of transactions, so the analytics endpoints read a few
+# thousand documents however large the transactions collection gets.
+#
+# Documents are only ever changed by $inc upserts (_id = the key joined
+# with '|'). Predictions are added in process and flushed every
+# ROLLUP_FLUSH_INTERVAL_S as one bulk write; if a flush fails the counts
+# are kept for the next one. Every write that changes the rollups bumps the
+# data generation (cache.py), so cached analytics responses are dropped.
+#
+# Recompute everything from the transactions and predictions collections
+# (written to a scratch collection, then swapped in by rename):
+#     python src/utils/fraud_dashboard/rollups.py rebuild
+
+import sys
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.features import CHANNELS
+
+ROLLUP_COLLECTION = "rollups"
+ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "1") == "1"
+# Sources the analytics endpoints read
+ROLLUP_SOURCES = tuple(s.strip() for s in os.getenv("ROLLUP_SOURCES", "transactions,predictions").split(",") if s.strip())
+ROLLUP_FLUSH_INTERVAL_S = float(os.getenv("ROLLUP_FLUSH_INTERVAL_S", 2))
+ROLLUP_REBUILD_CHUNK_ROWS = int(os.getenv("ROLLUP_REBUILD_CHUNK_ROWS", 100_000))
+
+SOURCE_TRANSACTIONS = "transactions"
+SOURCE_PREDICTIONS = "predictions"
+OTHER_CHANNEL = "other"
+
+DIMENSIONS = ("source", "year", "month", "day", "hour", "weekday", "channel", "kyc_verified")
+MEASURES = ("count", "fraud_count", "amount", "fraud_amount", "legit_amount")
+
+Key = Tuple[Any, ...]
+
+
+def doc_id(key: Key) -> str:
+    return "|".join(str(part) for part in key)
+
+
+def channel_name(flags: Dict[str, Any]) -> str:
+    """Channel of a processed row from its channel_* one-hot columns."""
+    for name in CHANNELS:
+        if flags.get(f"channel_{name}") == 1:
+            return name
+    return OTHER_CHANNEL
+
+
+def row_key(source: str, timestamp, features: Dict[str, Any]) -> Key:
+    """Rollup key of one transaction: its raw timestamp plus its engineered features."""
+    ts = pd.Timestamp(timestamp)
+    return (source, ts.year, ts.month, int(features["day"]), int(features["hour"]),
+            int(features["weekday"]), channel_name(features), int(features["kyc_verified"]))
+
+
+def row_measures(amount: float, is_fraud: bool) -> List[float]:
+    amount = float(amount)
+    return [1, 1 if is_fraud else 0, amount, amount if is_fraud else 0.0, 0.0 if is_fraud else amount]
+
+
+def frame_rollups(frame: pd.DataFrame, source: str) -> pd.DataFrame:
+    """
+    Roll up a frame in the processed layout (timestamp, day, hour, weekday,
+    channel_*, kyc_verified, transaction_amount, is_fraud): one row per key
+    with the DIMENSIONS and MEASURES as columns.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=list(DIMENSIONS + MEASURES))
+    ts = pd.to_datetime(frame["timestamp"], format="ISO8601")
+    fraud = frame["is_fraud"].fillna(0).astype(bool).to_numpy()
+    amount = frame["transaction_amount"].to_numpy(np.float64)
+    channel = np.select(
+        [frame[f"channel_{name}"].to_numpy() == 1 for name in CHANNELS], CHANNELS, OTHER_CHANNEL
+    )
+    rows = pd.DataFrame({
+        "source": source,
+        "year": ts.dt.year.to_numpy(np.int64),
+        "month": ts.dt.month.to_numpy(np.int64),
+        "day": frame["day"].to_numpy(np.int64),
+        "hour": frame["hour"].to_numpy(np.int64),
+        "weekday": frame["weekday"].to_numpy(np.int64),
+        "channel": channel,
+        "kyc_verified": frame["kyc_verified"].to_numpy(np.int64),
+        "count": 1,
+        "fraud_count": fraud.astype(np.int64),
+        "amount": amount,
+        "fraud_amount": np.where(fraud, amount, 0.0),
+        "legit_amount": np.where(fraud, 0.0, amount),
+    })
+    return rows.groupby(list(DIMENSIONS), as_index=False, sort=False)[list(MEASURES)].sum()
+
+
+def bump_data_generation():
+    """Invalidate cached responses built from the previous rollups."""
+    from src.utils.fraud_dashboard.cache import bump_data_generation as bump
+    bump()
+
+
+def _grouped_items(grouped: pd.DataFrame) -> Iterator[Tuple[Key, List[float]]]:
+    for row in grouped.itertuples(index=False):
+        values = row._asdict()
+        key = tuple(_plain(values[d]) for d in DIMENSIONS)
+        yield key, [_plain(values[m]) for m in MEASURES]
+
+
+def _plain(value):
+    """numpy scalars as Python numbers, for BSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _document(key: Key, measures: Sequence[float]) -> Dict[str, Any]:
+    doc: Dict[str, Any] = {"_id": doc_id(key)}
+    doc.update(zip(DIMENSIONS, key))
+    doc.update(zip(MEASURES, measures))
+    return doc
+
+
+def increment_ops(items: Dict[Key, List[float]]) -> List[UpdateOne]:
+    """One $inc upsert per key."""
+    now = datetime.now()
+    ops = []
+    for key, measures in items.items():
+        ops.append(UpdateOne(
+            {"_id": doc_id(key)},
+            {
+                "$inc": dict(zip(MEASURES, measures)),
+                "$set": {"updated_at": now},
+                "$setOnInsert": dict(zip(DIMENSIONS, key)),
+            },
+            upsert=True,
+        ))
+    return ops
+
+
+def add_frame(collection, frame: pd.DataFrame, source: str) -> int:
+    """Add a processed-layout frame to the rollups in `collection`; returns the keys written."""
+    ops = increment_ops(dict(_grouped_items(frame_rollups(frame, source))))
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def replace_source(collection, frame: pd.DataFrame, source: str) -> int:
+    """Drop the rollups of `source` and add `frame` in their place (full reloads)."""
+    collection.delete_many({"source": source})
+    return add_frame(collection, frame, source)
+
+
+# -------------------------------------------
+# REBUILD
+# -------------------------------------------
+TRANSACTION_FIELDS = ("timestamp", "day", "hour", "weekday", "kyc_verified", "transaction_amount",
+                      "is_fraud", *(f"channel_{name}" for name in CHANNELS))
+PREDICTION_FIELDS = ("timestamp", "channel", "kyc_verified", "account_age_days", "transaction_amount", "is_fraud")
+
+
+def _chunks(collection, fields: Sequence[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    rows: List[Dict[str, Any]] = []
+    for doc in collection.find({}, {field: 1 for field in fields}, batch_size=min(chunk_rows, 10_000)):
+        doc.pop("_id", None)
+        rows.append(doc)
+        if len(rows) >= chunk_rows:
+            yield pd.DataFrame(rows)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+
+def prediction_frame(records: pd.DataFrame) -> pd.DataFrame:
+    """Stored prediction records (raw fields + verdict) in the processed layout."""
+    from src.utils.fraud_dashboard.features import get_pipeline
+    records = records.dropna(subset=["timestamp", "channel", "kyc_verified", "account_age_days", "transaction_amount"])
+    frame = get_pipeline().transform(records)
+    frame["timestamp"] = pd.to_datetime(records["timestamp"], format="ISO8601")
+    frame["is_fraud"] = records["is_fraud"].fillna(False).astype(bool)
+    return frame
+
+
+def _source_frames(db, source: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if source == SOURCE_TRANSACTIONS:
+        for chunk in _chunks(db[SOURCE_TRANSACTIONS], TRANSACTION_FIELDS, chunk_rows):
+            yield chunk.dropna(subset=["timestamp"])
+    elif source == SOURCE_PREDICTIONS:
+        for chunk in _chunks(db[SOURCE_PREDICTIONS], PREDICTION_FIELDS, chunk_rows):
+            yield prediction_frame(chunk)
+    else:
+        raise ValueError(f"Unknown rollup source '{source}'")
+
+
+def rebuild(db, sources: Sequence[str] = (SOURCE_TRANSACTIONS, SOURCE_PREDICTIONS),
+            chunk_rows: int = ROLLUP_REBUILD_CHUNK_ROWS) -> Dict[str, int]:
+    """
+    Recompute the rollups of `sources` from their collections in `db` and
+    swap them in. Rollups of other sources are carried over unchanged.
+    Increments flushed while the rebuild runs are lost, so run it while
+    ingestion is paused or follow it with nothing newer than the scan.
+    """
+    totals: Optional[pd.DataFrame] = None
+    rows = 0
+    for source in sources:
+        for chunk in _source_frames(db, source, chunk_rows):
+            rows += len(chunk)
+            grouped = frame_rollups(chunk, source)
+            if totals is not None:
+                grouped = pd.concat([totals, grouped], ignore_index=True) \
+                    .groupby(list(DIMENSIONS), as_index=False, sort=False)[list(MEASURES)].sum()
+            totals = grouped
+
+    scratch = db[f"{ROLLUP_COLLECTION}_rebuild_{uuid.uuid4().hex[:8]}"]
+    docs = [_document(key, measures) for key, measures in _grouped_items(totals)] if totals is not None else []
+    docs += list(db[ROLLUP_COLLECTION].find({"source": {"$nin": list(sources)}}))
+    if not docs:
+        db[ROLLUP_COLLECTION].delete_many({})
+        bump_data_generation()
+        return {"rows": rows, "keys": 0}
+    scratch.insert_many(docs)
+    scratch.rename(ROLLUP_COLLECTION, dropTarget=True)
+    bump_data_generation()
+    return {"rows": rows, "keys": len(docs)}
+
+
+# -------------------------------------------
+# IN-PROCESS WRITER (request path)
+# -------------------------------------------
+class RollupWriter:
+
+    def __init__(self, flush_interval_s: float = ROLLUP_FLUSH_INTERVAL_S):
+        self.flush_interval_s = flush_interval_s
+        self._pending: Dict[Key, List[float]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.flushes = 0
+        self.last_error: Optional[str] = None
+
+    def _merge(self, key: Key, measures: Sequence[float]):
+        current = self._pending.get(key)
+        if current is None:
+            self._pending[key] = list(measures)
+        else:
+            for i, value in enumerate(measures):
+                current[i] += value
+
+    def add(self, source: str, timestamp, features: Dict[str, Any], is_fraud: bool):
+        """One transaction: its raw timestamp, engineered features and fraud verdict."""
+        key = row_key(source, timestamp, features)
+        measures = row_measures(features["transaction_amount"], is_fraud)
+        with self._lock:
+            self._merge(key, measures)
+
+    def add_frame(self, frame: pd.DataFrame, source: str):
+        items = list(_grouped_items(frame_rollups(frame, source)))
+        with self._lock:
+            for key, measures in items:
+                self._merge(key, measures)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Add the pending increments to MongoDB; returns the number of keys written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        from src.utils.fraud_dashboard.database import get_collection
+        try:
+            get_collection(ROLLUP_COLLECTION).bulk_write(increment_ops(pending), ordered=False)
+        except Exception as e:
+            if str(e) != self.last_error:
+                print(f"ERROR flushing rollups, keeping them for the next flush. {e}")
+            self.last_error = str(e)
+            with self._lock:
+                for key, measures in pending.items():
+                    self._merge(key, measures)
+            return 0
+        self.flushes += 1
+        self.last_error = None
+        bump_data_generation()
+        return len(pending)
+
+    def start(self):
+        if self.flush_interval_s <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rollup-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_s):
+            self.flush()
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_writer: Optional[RollupWriter] = None
+
+
+def get_rollup_writer() -> Optional[RollupWriter]:
+    """The process's rollup writer, or None when ROLLUP_ENABLED=0."""
+    global _writer
+    if _writer is None and ROLLUP_ENABLED:
+        _writer = RollupWriter()
+        if _writer.flush_interval_s <= 0:
+            print("WARNING: ROLLUP_FLUSH_INTERVAL_S <= 0, predictions reach the rollups only at shutdown")
+    return _writer
+
+
+def bootstrap() -> Optional[Dict[str, int]]:
+    """Build the rollups on first start: when they are empty but transactions exist."""
+    if not ROLLUP_ENABLED:
+        return None
+    from src.utils.fraud_dashboard.database import get_database
+    try:
+        db = get_database()
+        if db[ROLLUP_COLLECTION].estimated_document_count() or \
+                not db[SOURCE_TRANSACTIONS].estimated_document_count():
+            return None
+        print("Rollups are empty, building them from the transactions and predictions collections...")
+        result = rebuild(db)
+        print(f"✓ Rolled up {result['rows']} transactions into {result['keys']} documents.")
+        return result
+    except Exception as e:
+        print(f"ERROR building rollups: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Maintain the dashboard rollups collection.")
+    parser.add_argument("command", choices=["rebuild", "show"])
+    parser.add_argument("--source", action="append", choices=[SOURCE_TRANSACTIONS, SOURCE_PREDICTIONS],
+                        help="rebuild only this source (repeatable; default: all)")
+    parser.add_argument("--chunk-rows", type=int, default=ROLLUP_REBUILD_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    from src.utils.fraud_dashboard.database import get_database
+    database = get_database()
+    if args.command == "rebuild":
+        started = datetime.now()
+        result = rebuild(database, args.source or (SOURCE_TRANSACTIONS, SOURCE_PREDICTIONS), args.chunk_rows)
+        print(f"Rebuilt rollups from {result['rows']} rows into {result['keys']} documents "
+              f"in {(datetime.now() - started).total_seconds():.1f}s")
+    else:
+        pipeline = [{"$group": {"_id": "$source", "documents": {"$sum": 1},
+                                **{m: {"$sum": f"${m}"} for m in MEASURES}}}]
+        for doc in database[ROLLUP_COLLECTION].aggregate(pipeline):
+            print(json.dumps(doc, default=str))
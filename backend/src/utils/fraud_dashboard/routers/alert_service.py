@@ -1,27 +1,46 @@
 # src/utils/fraud_dashboard/alert_service.py
 from datetime import datetime
 from typing import Dict, Any, List
-from database import get_collection  # use your database helper
+from src.utils.fraud_dashboard import write_behind
+from src.utils.fraud_dashboard import wal
 
 ALERT_COLLECTION_NAME = "fraud_alerts"
 
+def build_alert_doc(transaction_id: str, customer_id: str, risk_score: float, reasons: List[str], details: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "transaction_id": transaction_id,
+        "customer_id": customer_id,
+        "risk_score": float(risk_score),
+        "reasons": reasons,          # simple list of codes
+        "details": details,          # structured reasons with severity and messages
+        "created_at": datetime.utcnow()
+    }
+
 def save_alert(transaction_id: str, customer_id: str, risk_score: float, reasons: List[str], details: List[Dict[str, Any]]):
     """
     Persist an alert document to MongoDB (collection: fraud_alerts).
+    Alerts go through the write-behind buffer when it is enabled.
     """
     try:
-        collection = get_collection(ALERT_COLLECTION_NAME)
-        alert_doc = {
-            "transaction_id": transaction_id,
-            "customer_id": customer_id,
-            "risk_score": float(risk_score),
-            "reasons": reasons,          # simple list of codes
-            "details": details,          # structured reasons with severity and messages
-            "created_at": datetime.utcnow()
-        }
-        collection.insert_one(alert_doc)
-        return True
+        alert_doc = build_alert_doc(transaction_id, customer_id, risk_score, reasons, details)
+        buffer = write_behind.get_buffer(ALERT_COLLECTION_NAME)
+        if buffer is not None:
+            return buffer.enqueue(alert_doc)
+        return wal.insert_or_log(ALERT_COLLECTION_NAME, [alert_doc])
     except Exception as e:
         # do not crash the API if alert saving fails; log and continue
         print(f"ERROR: failed to save alert to MongoDB: {e}")
         return False
+
+def save_alerts(alerts: List[Dict[str, Any]]):
+    """
+    Persist many alerts with a single insert_many. Each item holds the
+    keyword arguments of save_alert.
+    """
+    if not alerts:
+        return True
+    try:
+        return wal.insert_or_log(ALERT_COLLECTION_NAME, [build_alert_doc(**a) for a in alerts])
+    except Exception as e:
+        print(f"ERROR: failed to save alerts to MongoDB: {e}")
+        return False
@@ -33,6 +33,7 @@ if project_root not in sys.path:
 # It imports the FUNCTION from the correct 'utilities' folder
 from src.utils.fraud_dashboard.database import get_collection
 from src.utils.fraud_dashboard.utils import convert_objectid
+from src.utils.fraud_dashboard.cache import cached
 # -----------------------------------
 
 router = APIRouter(prefix="/alerts")
@@ -47,6 +48,7 @@ except Exception as e:
 # ---------------------------
 
 @router.get("/suspicious")
+@cached()
 def suspicious_transactions():
     if collection is None:
         return {"error": "Database connection failed"}
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 from math import floor
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
 # --- NEW PATH FIX ---
 # This code manually adds your project's root folder to the Python path
@@ -18,6 +18,10 @@ if project_root not in sys.path:
 # --- THIS IMPORT IS NOW CORRECT ---
 # It imports the FUNCTION from the correct 'utilities' folder
 from src.utils.fraud_dashboard.database import get_collection
+from src.utils.fraud_dashboard import aggregations
+from src.utils.fraud_dashboard import rollups
+from src.utils.fraud_dashboard import columnar
+from src.utils.fraud_dashboard.cache import cached
 # -----------------------------------
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
@@ -34,177 +38,75 @@ except Exception as e:
 # ---------------------------
 
 
+# Each endpoint runs one $facet aggregation (src/utils/fraud_dashboard/
+# aggregations.py) over the rollups collection, whose size does not grow
+# with the number of transactions. With ROLLUP_ENABLED=0 the rollups are not
+# maintained and the same statistics are computed from the transactions.
+# With ANALYTICS_ENGINE=columnar they come from the in-memory engine
+# (columnar.py) once it has loaded.
+def run_facets(summary: List[str] = (), groupings: List[str] = ()) -> Dict[str, List[Dict[str, Any]]]:
+    engine = columnar.ready_engine()
+    if engine is not None:
+        return engine.facets(summary, groupings, columnar.ENGINE_SOURCES)
+    if rollups.ROLLUP_ENABLED:
+        return aggregations.run_facets(
+            get_collection(rollups.ROLLUP_COLLECTION), summary, groupings,
+            match={"source": {"$in": list(rollups.ROLLUP_SOURCES)}}, rollup=True,
+        )
+    return aggregations.run_facets(collection, summary, groupings)
+
+
+CHANNEL_FIELDS = {f"{c}_fraud": f"{c}_fraud" for c in aggregations.CHANNELS}
+CHANNEL_FIELDS.update({f"{c}_total": f"{c}_total" for c in aggregations.CHANNELS})
+LOSS_FIELDS = {
+    "total_fraud_loss": "total_fraud_loss",
+    "avg_fraud_amount": "avg_fraud_amount",
+    "fraud_count": "fraud_transactions",
+}
+DASHBOARD_SUMMARY = [
+    "total_transactions", "fraud_transactions", "fraud_loss", "legit_volume",
+    *(f"{c}_total" for c in aggregations.CHANNELS),
+]
+DASHBOARD_GROUPINGS = ["volume_by_day", "hourly", "weekday"]
+CHANNEL_COLORS = {"mobile": ("Mobile", "#3B82F6"), "atm": ("ATM", "#10B981"),
+                  "pos": ("POS", "#F59E0B"), "web": ("Web", "#EF4444")}
+
+
 @router.get("/fraud_trend", tags=["Analytics"])
+@cached()
 def fraud_trend():
     """Get fraud trends over time"""
     if collection is None:
         return {"error": "Database connection failed"}
 
-    pipeline = [
-        {
-            "$group": {
-                "_id": {
-                    "day": "$day",
-                    "year": {"$year": "$timestamp"},
-                    "month": {"$month": "$timestamp"},
-                },
-                "fraud_count": {
-                    "$sum": {"$cond": ["$is_fraud", 1, 0]}
-                },
-                "total": {"$sum": 1},
-                "fraud_amount": {
-                    "$sum": {
-                        "$cond": ["$is_fraud", "$transaction_amount", 0]
-                    }
-                },
-            }
-        },
-        {"$sort": {"_id.day": 1}},
-    ]
-    return list(collection.aggregate(pipeline))
+    return run_facets(groupings=["trend"])["trend"]
 
 
 @router.get("/fraud_by_channel")
+@cached()
 def fraud_by_channel():
     """Get fraud distribution by channel"""
     if collection is None:
         return {"error": "Database connection failed"}
 
-    pipeline = [
-        {
-            "$group": {
-                "_id": None,
-                "mobile_fraud": {
-                    "$sum": {
-                        "$cond": [
-                            {
-                                "$and": [
-                                    {"$eq": ["$is_fraud", 1]},
-                                    {"$eq": ["$channel_mobile", 1]},
-                                ]
-                            },
-                            1,
-                            0,
-                        ]
-                    }
-                },
-                "atm_fraud": {
-                    "$sum": {
-                        "$cond": [
-                            {
-                                "$and": [
-                                    {"$eq": ["$is_fraud", 1]},
-                                    {"$eq": ["$channel_atm", 1]},
-                                ]
-                            },
-                            1,
-                            0,
-                        ]
-                    }
-                },
-                "pos_fraud": {
-                    "$sum": {
-                        "$cond": [
-                            {
-                                "$and": [
-                                    {"$eq": ["$is_fraud", 1]},
-                                    {"$eq": ["$channel_pos", 1]},
-                                ]
-                            },
-                            1,
-                            0,
-                        ]
-                    }
-                },
-                "web_fraud": {
-                    "$sum": {
-                        "$cond": [
-                            {
-                                "$and": [
-                                    {"$eq": ["$is_fraud", 1]},
-                                    {"$eq": ["$channel_web", 1]},
-                                ]
-                            },
-                            1,
-                            0,
-                        ]
-                    }
-                },
-                "mobile_total": {"$sum": "$channel_mobile"},
-                "atm_total": {"$sum": "$channel_atm"},
-                "pos_total": {"$sum": "$channel_pos"},
-                "web_total": {"$sum": "$channel_web"},
-            }
-        }
-    ]
-    return list(collection.aggregate(pipeline))
+    facets = run_facets(summary=list(CHANNEL_FIELDS.values()))
+    return aggregations.pick(facets[aggregations.SUMMARY], CHANNEL_FIELDS)
 
 
 @router.get("/fraud_loss")
+@cached()
 def fraud_loss():
     """Get total fraud loss amount"""
     if collection is None:
         return {"error": "Database connection failed"}
 
-    pipeline = [
-        {
-            "$group": {
-                "_id": None,
-                "total_fraud_loss": {
-                    "$sum": {"$cond": ["$is_fraud", "$transaction_amount", 0]}
-                },
-                "avg_fraud_amount": {
-                    "$avg": {"$cond": ["$is_fraud", "$transaction_amount", None]}
-                },
-                "fraud_count": {
-                    "$sum": {"$cond": ["$is_fraud", 1, 0]}
-                },
-            }
-        }
-    ]
-    return list(collection.aggregate(pipeline))
-
-
-@router.get("/dashboard")
-def dashboard():
-    """Return aggregated analytics data expected by the frontend dashboard"""
-    if collection is None:
-        return {"error": "Database connection failed"}
+    facets = run_facets(summary=list(LOSS_FIELDS.values()))
+    return aggregations.pick(facets[aggregations.SUMMARY], LOSS_FIELDS)
 
-    total_stats = list(
-        collection.aggregate(
-            [
-                {
-                    "$group": {
-                        "_id": None,
-                        "total_transactions": {"$sum": 1},
-                        "fraud_transactions": {
-                            "$sum": {"$cond": ["$is_fraud", 1, 0]}
-                        },
-                        "fraud_loss": {
-                            "$sum": {
-                                "$cond": [
-                                    {"$eq": ["$is_fraud", 1]},
-                                    "$transaction_amount",
-                                    0,
-                                ]
-                            }
-                        },
-                        "legit_volume": {
-                            "$sum": {
-                                "$cond": [
-                                    {"$eq": ["$is_fraud", 0]},
-                                    "$transaction_amount",
-                                    0,
-                                ]
-                            }
-                        },
-                    }
-                }
-            ]
-        )
-    )
 
+def build_dashboard(facets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Dashboard response from the DASHBOARD_SUMMARY / DASHBOARD_GROUPINGS facets."""
+    total_stats = facets[aggregations.SUMMARY]
     if not total_stats:
         return {
             "analytics_metrics": {
@@ -234,75 +136,26 @@ def dashboard():
         "legitimateVolume": stats.get("legit_volume", 0),
     }
 
-    volume_data = list(
-        collection.aggregate(
-            [
-                {
-                    "$group": {
-                        "_id": "$day",
-                        "volume": {"$sum": "$transaction_amount"},
-                    }
-                },
-                {"$sort": {"_id": 1}},
-            ]
-        )
-    )
     volume_by_day_data = [
         {"name": f"Day {item.get('_id')}", "volume": item.get("volume", 0)}
-        for item in volume_data
+        for item in facets["volume_by_day"]
         if item.get("_id") is not None
     ]
 
-    channel_stats = list(
-        collection.aggregate(
-            [
-                {
-                    "$group": {
-                        "_id": None,
-                        "mobile": {"$sum": "$channel_mobile"},
-                        "atm": {"$sum": "$channel_atm"},
-                        "pos": {"$sum": "$channel_pos"},
-                        "web": {"$sum": "$channel_web"},
-                    }
-                }
-            ]
-        )
-    )
-    channel_data = []
-    if channel_stats:
-        channels = channel_stats[0]
-        channel_data = [
-            {"name": "Mobile", "value": channels.get("mobile", 0), "color": "#3B82F6"},
-            {"name": "ATM", "value": channels.get("atm", 0), "color": "#10B981"},
-            {"name": "POS", "value": channels.get("pos", 0), "color": "#F59E0B"},
-            {"name": "Web", "value": channels.get("web", 0), "color": "#EF4444"},
-        ]
-
-    hourly_data = list(
-        collection.aggregate(
-            [
-                {"$group": {"_id": "$hour", "count": {"$sum": 1}}},
-                {"$sort": {"_id": 1}},
-            ]
-        )
-    )
+    channel_data = [
+        {"name": name, "value": stats.get(f"{channel}_total", 0), "color": color}
+        for channel, (name, color) in CHANNEL_COLORS.items()
+    ]
+
     hourly = [
         {"name": f"{item.get('_id')}:00", "transactions": item.get("count", 0)}
-        for item in hourly_data
+        for item in facets["hourly"]
         if item.get("_id") is not None
     ]
 
-    daily_data = list(
-        collection.aggregate(
-            [
-                {"$group": {"_id": "$weekday", "count": {"$sum": 1}}},
-                {"$sort": {"_id": 1}},
-            ]
-        )
-    )
     day_names = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
     daily: List[Dict[str, Any]] = []
-    for item in daily_data:
+    for item in facets["weekday"]:
         idx = item.get("_id")
         if isinstance(idx, int) and 0 <= idx < len(day_names):
             daily.append({"name": day_names[idx], "transactions": item.get("count", 0)})
@@ -315,12 +168,66 @@ def dashboard():
     }
 
 
+@router.get("/dashboard")
+@cached()
+def dashboard():
+    """Return aggregated analytics data expected by the frontend dashboard"""
+    if collection is None:
+        return {"error": "Database connection failed"}
+
+    return build_dashboard(run_facets(summary=DASHBOARD_SUMMARY, groupings=DASHBOARD_GROUPINGS))
+
+
+@router.get("/cube")
+@cached()
+def cube(
+    dimensions: List[str] = Query(["channel"], description=f"Group-by dimensions: {', '.join(aggregations.CUBE_DIMENSIONS)}"),
+    measures: List[str] = Query(["count", "fraud_count", "fraud_amount", "fraud_rate"],
+                                description=f"Measures: {', '.join([*aggregations.CUBE_MEASURES, *aggregations.CUBE_DERIVED])}"),
+    start: Optional[str] = Query(None, description="First date included (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, description="Last date included (YYYY-MM-DD)"),
+):
+    """
+    Fraud statistics rolled up to any combination of the cube dimensions,
+    e.g. ?dimensions=channel&dimensions=hour&dimensions=kyc_verified. Summed
+    from the precomputed rollups (rollups.py), never from the transactions.
+    """
+    if not rollups.ROLLUP_ENABLED:
+        return {"error": "The cube needs the rollups (ROLLUP_ENABLED=1)"}
+    dimensions = list(dict.fromkeys(d.strip() for d in dimensions if d.strip()))
+    measures = list(dict.fromkeys(m.strip() for m in measures if m.strip()))
+    try:
+        start_date = datetime.fromisoformat(start).date() if start else None
+        end_date = datetime.fromisoformat(end).date() if end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+    try:
+        cells = aggregations.run_cube(
+            get_collection(rollups.ROLLUP_COLLECTION), dimensions, measures,
+            match={"source": {"$in": list(rollups.ROLLUP_SOURCES)}}, start=start_date, end=end_date,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"dimensions": dimensions, "measures": measures, "start": start, "end": end,
+            "count": len(cells), "cells": cells}
+
+
+@router.get("/engine/memory")
+def engine_memory():
+    """Memory footprint of the in-memory columnar engine (ANALYTICS_ENGINE=columnar)."""
+    engine = columnar.get_engine()
+    if engine is None:
+        return {"enabled": False, "engine": columnar.ANALYTICS_ENGINE}
+    return dict(engine.memory_report(), enabled=True)
+
+
 # ------------------------------------------------------------------
 # NEW GEO ENDPOINTS FOR ACTIVITY MAP
 # ------------------------------------------------------------------
 
 
 @router.get("/geo/transactions")
+@cached()
 async def geo_transactions(
     start: Optional[str] = Query(None),
     end: Optional[str] = Query(None),
@@ -415,6 +322,7 @@ async def geo_transactions(
 
 
 @router.get("/geo/heatmap")
+@cached()
 async def geo_heatmap(
     start: Optional[str] = Query(None),
     end: Optional[str] = Query(None),
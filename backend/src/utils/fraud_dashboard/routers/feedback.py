@@ -1,11 +1,42 @@
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
+from bson import ObjectId
 from src.utils.fraud_dashboard.database import get_collection
+from src.utils.fraud_dashboard import write_behind
+from src.utils.fraud_dashboard.model_quality import record_feedback
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
+
+def link_feedback(prediction_id: str, actual_status: str) -> bool:
+    """
+    Stamp actual_status on the prediction and count it in its model
+    version's confusion matrix. False if the prediction is unknown.
+    """
+    if not ObjectId.is_valid(prediction_id):
+        return False
+    oid = ObjectId(prediction_id)
+    fields = {"actual_status": actual_status, "feedback_at": datetime.utcnow()}
+
+    # the prediction may still be waiting in the write-behind buffer
+    buffer = write_behind.get_buffer("predictions")
+    prediction = buffer.get_pending(oid) if buffer is not None else None
+    if prediction is None or not buffer.update_pending(oid, fields):
+        # returns the document as it was before the update
+        prediction = get_collection("predictions").find_one_and_update(
+            {"_id": oid},
+            {"$set": fields},
+            projection={"ml_fraud": 1, "is_fraud": 1, "model_version": 1, "actual_status": 1},
+        )
+        if prediction is None:
+            return False
+
+    record_feedback(prediction, actual_status, previous_status=prediction.get("actual_status"))
+    return True
+
+
 @router.post("/submit")
-async def submit_feedback(payload: dict):
+def submit_feedback(payload: dict):
     """
     Submit feedback on a prediction.
     
@@ -43,13 +74,17 @@ async def submit_feedback(payload: dict):
         }
         
         # Save to MongoDB
-        result = collection.insert_one(feedback_doc)
+        result = get_collection("feedback").insert_one(feedback_doc)
+
+        # Link the label to the prediction for the live model metrics
+        counted = link_feedback(str(payload["prediction_id"]), normalized_status)
         
         # Return success response
         return {
             "status": "success",
             "message": "Feedback submitted successfully",
             "feedback_id": str(result.inserted_id),
+            "counted_in_metrics": counted,
             "data": {
                 "prediction_id": feedback_doc["prediction_id"],
                 "actual_status": feedback_doc["actual_status"],
@@ -63,7 +98,7 @@ async def submit_feedback(payload: dict):
         raise HTTPException(status_code=500, detail=f"Error saving feedback: {str(e)}")
 
 @router.get("/stats")
-async def get_feedback_stats():
+def get_feedback_stats():
     """
     Get feedback statistics - count of fraud vs legit feedback
     """
@@ -85,7 +120,7 @@ async def get_feedback_stats():
             }
         ]
         
-        stats = list(collection.aggregate(pipeline))
+        stats = list(get_collection("feedback").aggregate(pipeline))
         
         # Convert to dictionary for easier frontend consumption
         feedback_stats = {"fraud": 0, "legit": 0}
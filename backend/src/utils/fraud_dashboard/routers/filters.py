@@ -43,6 +43,8 @@ if project_root not in sys.path:
 # --- THIS IMPORT IS NOW CORRECT ---
 # It imports the FUNCTION from the correct 'utilities' folder
 from src.utils.fraud_dashboard.database import get_collection
+from src.utils.fraud_dashboard.cache import cached
+from src.utils.fraud_dashboard import columnar
 # -----------------------------------
 
 router = APIRouter(prefix="/filter")
@@ -57,11 +59,18 @@ except Exception as e:
 # ---------------------------
 
 @router.get("/transactions")
+@cached()
 def filter_transactions(
     start_date: str = None,
     end_date: str = None,
     channel: str = None
 ):
+    engine = columnar.ready_engine()
+    if engine is not None:
+        if start_date and end_date:
+            return engine.filter_transactions(datetime.fromisoformat(start_date), datetime.fromisoformat(end_date), channel)
+        return engine.filter_transactions(channel=channel)
+
     if collection is None:
         return {"error": "Database connection failed"}
         
@@ -36,6 +36,8 @@ if project_root not in sys.path:
 # --- THIS IMPORT IS NOW CORRECT ---
 # It imports the FUNCTION from the correct 'utilities' folder
 from src.utils.fraud_dashboard.database import get_collection
+from src.utils.fraud_dashboard.cache import cached
+from src.utils.fraud_dashboard import columnar
 # -----------------------------------
 
 router = APIRouter(prefix="/insights")
@@ -50,7 +52,11 @@ except Exception as e:
 # ---------------------------
 
 @router.get("/transaction_amounts")
+@cached()
 def amount_insights():
+    engine = columnar.ready_engine()
+    if engine is not None:
+        return engine.amount_insights()
     if collection is None:
         return {"error": "Database connection failed"}
         
@@ -3,9 +3,7 @@
 
 import sys
 import os
-from fastapi import APIRouter, Depends
-import json
-from redis.client import Redis
+from fastapi import APIRouter
 
 # --- NEW PATH FIX ---
 # This code manually adds your project's root folder to the Python path
@@ -18,7 +16,10 @@ if project_root not in sys.path:
 
 # --- THESE IMPORTS ARE NOW CORRECT ---
 from src.utils.fraud_dashboard.database import get_collection
-from src.utils.fraud_dashboard.cache import get_redis_client, get_from_cache, set_in_cache
+from src.utils.fraud_dashboard.cache import cached
+from src.utils.fraud_dashboard import aggregations
+from src.utils.fraud_dashboard import rollups
+from src.utils.fraud_dashboard import columnar
 # from src.utils.utilities.helpers import get_db_last_update # This line is commented out as it's not used
 # -----------------------------------
 
@@ -34,26 +35,32 @@ except Exception as e:
 # ---------------------------
 
 @router.get("/stats")
-def overview_stats(cache: Redis = Depends(get_redis_client)):
-    
-    cache_key = "overview_stats"
-    
-    # --- 1. NEW CACHE LOGIC ---
-    # Try to get from Redis cache first
-    cached_data = get_from_cache(cache, cache_key)
-    if cached_data:
-        print("--- DEBUG: Overview stats found in cache ---")
-        return json.loads(cached_data)
-    # --------------------------
-
-    print("--- DEBUG: Overview stats not in cache, computing... ---")
+@cached()
+def overview_stats():
+    # Served from Redis until the data generation changes (cache.py)
     if collection is None:
         return {"error": "Database connection failed"}
 
     # --- 2. NEW DATABASE LOGIC ---
-    # Compute fresh data
-    total = collection.count_documents({})
-    fraud = collection.count_documents({"is_fraud": 1})
+    # Compute fresh data: from the columnar engine when it is loaded, summed
+    # from the rollups, or counted
+    engine = columnar.ready_engine()
+    if engine is not None:
+        facets = engine.facets(["total_transactions", "fraud_transactions"], sources=columnar.ENGINE_SOURCES)
+        stats = facets[aggregations.SUMMARY][0] if facets[aggregations.SUMMARY] else {}
+        total = stats.get("total_transactions", 0)
+        fraud = stats.get("fraud_transactions", 0)
+    elif rollups.ROLLUP_ENABLED:
+        facets = aggregations.run_facets(
+            get_collection(rollups.ROLLUP_COLLECTION), ["total_transactions", "fraud_transactions"],
+            match={"source": {"$in": list(rollups.ROLLUP_SOURCES)}}, rollup=True,
+        )
+        stats = facets[aggregations.SUMMARY][0] if facets[aggregations.SUMMARY] else {}
+        total = stats.get("total_transactions", 0)
+        fraud = stats.get("fraud_transactions", 0)
+    else:
+        total = collection.count_documents({})
+        fraud = collection.count_documents({"is_fraud": 1})
     legit = total - fraud
 
     if total == 0: # Avoid division by zero
@@ -68,9 +75,4 @@ def overview_stats(cache: Redis = Depends(get_redis_client)):
     }
     # ---------------------------
 
-    # --- 3. NEW CACHE LOGIC ---
-    # Store in Redis cache for 1 hour (3600 seconds)
-    set_in_cache(cache, cache_key, json.dumps(result), ttl_seconds=3600)
-    # --------------------------
-
     return result
\ No newline at end of file
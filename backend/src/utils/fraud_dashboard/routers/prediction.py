@@ -1,13 +1,14 @@
 import sys
 import os
+import numpy as np
 import pandas as pd
-import joblib
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Header, Response
 from pydantic import BaseModel
-from typing import Dict, List, Any
-from datetime import datetime
-import json
-from redis.client import Redis
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import threading
+import time
+from bson import ObjectId
 
 # -------------------------------------------
 # FIX PROJECT ROOT AND IMPORT PATHS
@@ -20,19 +21,33 @@ if project_root not in sys.path:
 
 # FIX IMPORTS
 from src.utils.fraud_dashboard.database import get_collection
-from src.utils.fraud_dashboard.cache import (
-    get_redis_client, get_from_cache, set_in_cache
-)
+from src.utils.fraud_dashboard.cache import get_redis_client
 from src.utils.fraud_dashboard.utils import convert_objectid
+from src.utils.fraud_dashboard.features import FEATURE_ORDER, get_pipeline
+from src.utils.fraud_dashboard.profiles import get_profile_store
+from src.utils.fraud_dashboard.velocity import get_velocity_store
+from src.utils.fraud_dashboard.rule_stats import get_rule_stats
+from src.utils.fraud_dashboard.rollups import get_rollup_writer, SOURCE_PREDICTIONS
+from src.utils.fraud_dashboard.model_registry import get_registry
+from src.utils.fraud_dashboard.model_quality import quality_by_version, compute_metrics
+from src.utils.fraud_dashboard.scoring_pool import ScoringPool, SCORING_MODE
+from src.utils.fraud_dashboard import shadow
+from src.utils.fraud_dashboard.idempotency import IdempotencyCache, RequestInProgress, request_key, IDEMPOTENCY_ENABLED
+from src.utils.fraud_dashboard import telemetry
+from src.utils.fraud_dashboard.batcher import MicroBatcher
+from src.utils.fraud_dashboard import write_behind
+from src.utils.fraud_dashboard import wal
+from src.utils.fraud_dashboard.explanations import (
+    ExplanationWorker, ExplanationCache, get_llm_client, explanation_signature,
+    build_signature_prompt, template_explanation,
+    EXPLANATION_PENDING, EXPLANATION_READY, EXPLANATION_SKIPPED, EXPLANATION_TEMPLATE,
+)
+
+from src.utils.fraud_dashboard.routers import rule_engine
 
 # -------------------------------------------
-# OPTIONAL: RULE ENGINE & ALERT SERVICE
+# OPTIONAL: ALERT SERVICE
 # -------------------------------------------
-try:
-    from . import rule_engine  # src.utils.fraud_dashboard.rule_engine
-except Exception:
-    rule_engine = None  # type: ignore
-
 try:
     from . import alert_service  # src.utils.fraud_dashboard.alert_service
 except Exception:
@@ -47,14 +62,21 @@ router = APIRouter(
 # -------------------------------------------
 # MODEL LOADING
 # -------------------------------------------
-model_path = os.path.join(project_root, "models", "random_forest_model.pkl")
+# Versioned, memory-mapped models; loaded on first use (warmed at startup)
+# and hot-swappable. INFERENCE_ENGINE="compiled" scores with the flattened
+# NumPy forest, "sklearn" with model.predict_proba.
+model_registry = get_registry()
 
-try:
-    model = joblib.load(model_path)
-    print("Random Forest model loaded successfully from:", model_path)
-except Exception as e:
-    print(f"CRITICAL ERROR loading model. {e}")
-    model = None
+# The compiled forest wins on latency for small inputs; sklearn's Cython
+# traversal is faster for large batches
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", 256))
+
+# Optional shared secret for the model admin endpoints
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
+
+# SCORING_MODE="process" runs the model in worker processes so scoring is
+# not serialized on this process's GIL
+scoring_pool = ScoringPool(compiled_max_rows=COMPILED_MAX_ROWS) if SCORING_MODE == "process" else None
 
 try:
     predictions_collection = get_collection("predictions")
@@ -62,13 +84,19 @@ except Exception as e:
     print(f"CRITICAL ERROR in prediction.py: Could not get 'predictions' collection. {e}")
     predictions_collection = None
 
+try:
+    transactions_collection = get_collection("transactions")
+except Exception as e:
+    print(f"CRITICAL ERROR in prediction.py: Could not get 'transactions' collection. {e}")
+    transactions_collection = None
 
-model_metrics = {
-    "accuracy_score": 0.913,
-    "precision_score": 0.33333,
-    "recall_score": 0.0349,
-    "f1_score": 0.0625,
-}
+# Single /predict records are queued and written in bulk off the request path
+# (None when WRITE_BEHIND_ENABLED=0)
+predictions_buffer = write_behind.get_buffer("predictions")
+
+
+# Upper bound on rows accepted by /predict_batch in one request
+MAX_BATCH_SIZE = 100_000
 
 
 # -------------------------------------------
@@ -83,228 +111,393 @@ class RawTransactionInput(BaseModel):
     timestamp: str
 
 
+class BatchTransactionInput(BaseModel):
+    """
+    Either a list of transactions (row layout) or a dict of equal-length
+    lists keyed by RawTransactionInput field name (columnar layout).
+    """
+    transactions: Optional[List[RawTransactionInput]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+
+
 # -------------------------------------------
 # FEATURE ENGINEERING
 # -------------------------------------------
-def transform_features(raw_input: RawTransactionInput) -> Dict:
-    dt = datetime.fromisoformat(raw_input.timestamp)
-
-    hour = dt.hour
-    day = dt.day
-    weekday = dt.weekday()
-
-    channel = raw_input.channel.lower()
-    engineered_features = {
-        "kyc_verified": raw_input.kyc_verified,
-        "account_age_days": raw_input.account_age_days,
-        "transaction_amount": raw_input.transaction_amount,
-        "hour": hour,
-        "day": day,
-        "weekday": weekday,
-        "channel_atm": 1 if channel == 'atm' else 0,
-        "channel_mobile": 1 if channel == 'mobile' else 0,
-        "channel_pos": 1 if channel == 'pos' else 0,
-        "channel_web": 1 if channel == 'web' else 0,
-        "avg_txn_per_customer": 0.12,
-        "txns_count_per_customer": 5,
-        "amt_deviation": 0.03,
-        "high_amount_flag": 1 if raw_input.transaction_amount > 10000 else 0,
-        "is_night": 1 if 0 <= hour <= 6 else 0,
-        "is_weekend": 1 if weekday >= 5 else 0,
-    }
-    return engineered_features
+def transform_features(raw_input: RawTransactionInput, profile: Optional[Dict] = None) -> Dict:
+    """Engineer the FEATURE_ORDER features for one transaction."""
+    row = raw_input.dict()
+    if profile:
+        row["avg_txn_per_customer"] = profile["avg_txn_amount"]
+        row["txns_count_per_customer"] = profile["txn_count"]
+    return get_pipeline().transform(pd.DataFrame([row])).to_dict("records")[0]
 
 
-# -------------------------------------------
-# GEMINI LLM EXPLANATION (FALLBACK)
-# -------------------------------------------
-import google.generativeai as genai
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+def transform_features_batch(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Engineer features for a whole batch. `frame` holds one row per
+    RawTransactionInput (plus optional customer aggregate columns); the
+    result is indexed like `frame` and ordered by FEATURE_ORDER.
+    """
+    return get_pipeline().transform(frame)
 
-gemini_model = genai.GenerativeModel("models/gemini-2.5-flash")
 
+def active_model():
+    """The serving model, or 503 if none could be loaded."""
+    current = model_registry.active()
+    if current is None:
+        raise HTTPException(status_code=503, detail="Model is not loaded.")
+    return current
 
-def generate_fraud_explanation(raw_input, engineered_features, is_fraud, risk_score):
-    ml_reason = engineered_features.get("ml_reason")
-    rule_reasons = engineered_features.get("rule_reasons", [])
 
-    ml_reason_text = ml_reason if ml_reason else ""
-    rule_reasons_text = "\n".join(f"- {r}" for r in rule_reasons) if rule_reasons else "None"
+def score_matrix(X: np.ndarray, current=None) -> np.ndarray:
+    """Fraud probability for each row of a FEATURE_ORDER matrix."""
+    current = current or active_model()
+    if scoring_pool is not None and scoring_pool.running:
+        return scoring_pool.score(X, current)
+    return current.predict_fraud_proba(X, COMPILED_MAX_ROWS)
 
-    prompt = f"""
-You are an experienced fraud analyst. Create a detailed yet concise explanation
-based only on the facts below. Never invent additional data.
 
-Summary:
-- Final Verdict: {is_fraud}
-- Risk Score: {risk_score:.2f}
-- ML Reason: "{ml_reason_text if ml_reason_text else "None"}"
-- Rule Reasons:
-{rule_reasons_text}
+def start_scoring_pool():
+    """Start the worker processes once the serving model is loaded (off the startup path)."""
+    if scoring_pool is not None:
+        threading.Thread(target=lambda: scoring_pool.start(model_registry.active()),
+                         name="scoring-pool-start", daemon=True).start()
 
-Response requirements (PLAIN TEXT ONLY):
-1) Start with one sentence summarizing the outcome and confidence.
-2) Add a "Key Drivers:" section in plain text (no bullet symbols). List each driver on a new line starting with a dash (-), but do not use markdown or asterisks.
-3) Add an "Assessment:" section (max two sentences) explaining why the verdict matches the risk score and how rules/ML agree or conflict.
-4) Add a "Next Actions:" section with 1–2 concrete actions. If verdict is False and no indicators fired, say "No additional action required."
-5) Do NOT use markdown formatting, headings, asterisks, or numbered/bullet lists. Plain text only.
 
-Strict rules:
-- Do not change the verdict or risk score values.
-- Do not reference internal system names or models.
-- Only use the provided reasons and transaction context.
-"""
+def stop_scoring_pool():
+    if scoring_pool is not None:
+        scoring_pool.stop()
 
 
-    try:
-        response = gemini_model.generate_content(prompt)
-        text = response.text.strip()
-        # hard-strip any stray markdown bullets if model still adds them
-        text = text.replace("*", "")
-        return text
-    except Exception as e:
-        return f"LLM explanation failed: {e}"
+# -------------------------------------------
+# SHADOW (CHALLENGER) SCORING
+# -------------------------------------------
+# SHADOW_MODEL_VERSION names a registry version scored off the request path
+shadow_scorer = shadow.ShadowScorer(
+    model_registry, shadow.SHADOW_MODEL_VERSION, compiled_max_rows=COMPILED_MAX_ROWS
+) if shadow.SHADOW_MODEL_VERSION else None
+
 
+def start_shadow_scorer():
+    if shadow_scorer is not None:
+        shadow_scorer.start()
+
+
+def stop_shadow_scorer():
+    if shadow_scorer is not None:
+        shadow_scorer.stop()
+
+
+def score_rows_versioned(X: np.ndarray) -> List[Tuple[float, str]]:
+    """(fraud probability, model version) per row, all from one model snapshot."""
+    current = active_model()
+    return [(float(score), current.version) for score in score_matrix(X, current)]
 
 
 # -------------------------------------------
-# METRICS ENDPOINT
+# MICRO-BATCHING
 # -------------------------------------------
-@router.get("/metrics")
-def get_metrics(cache: Redis = Depends(get_redis_client)):
-    cache_key = "model_metrics"
-    cached_data = get_from_cache(cache, cache_key)
+# Concurrent /predict calls are coalesced into one model call
+MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING_ENABLED", "1") == "1"
+
+micro_batcher = MicroBatcher(
+    score_rows_versioned,
+    max_batch_size=int(os.getenv("MICRO_BATCH_MAX_SIZE", 64)),
+    max_wait_ms=float(os.getenv("MICRO_BATCH_WAIT_MS", 2.0)),
+    # with worker processes, keep one batch in flight per worker
+    max_inflight=scoring_pool.workers if scoring_pool is not None else 1,
+) if MICRO_BATCHING_ENABLED else None
+
 
-    if cached_data:
-        return json.loads(cached_data)
+async def start_micro_batcher():
+    if micro_batcher is not None:
+        await micro_batcher.start()
+        print(f"Micro-batcher started (batch <= {micro_batcher.max_batch_size}, "
+              f"window {micro_batcher.max_wait_s * 1000:.1f} ms).")
 
-    set_in_cache(cache, cache_key, json.dumps(model_metrics), ttl_seconds=3600)
-    return model_metrics
+
+async def stop_micro_batcher():
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+
+
+def score_one(x: np.ndarray) -> Tuple[float, str]:
+    """
+    (fraud probability, model version) of a single row, through the
+    micro-batcher when it is running.
+    """
+    if micro_batcher is not None and micro_batcher.running and not micro_batcher.in_loop_thread():
+        try:
+            return micro_batcher.submit_threadsafe(x)
+        except Exception as e:
+            print(f"ERROR in micro-batcher, scoring directly: {e}")
+    return score_rows_versioned(x)[0]
 
 
 # -------------------------------------------
-# LEGACY BUSINESS RULES (KEPT + COMBINED WITH RULE ENGINE)
+# CUSTOMER PROFILES
 # -------------------------------------------
-def apply_business_rules(transaction: RawTransactionInput, engineered_features: Dict):
+def observe_customer(transaction: RawTransactionInput) -> Tuple[Optional[Dict], Dict]:
     """
-    Returns:
-    - rule_triggered (bool)
-    - reasons (list of strings)
-    - rule_score (0–1)
+    Fold this transaction into the customer's running profile.
+    Returns the profile before the update (for rules comparing against
+    the customer's history) and after it (for the model features, which
+    include the current transaction just like the training aggregates).
     """
+    store = get_profile_store()
+    prior = store.get(transaction.customer_id)
+    clipped_amount = float(get_pipeline().clip_amount(transaction.transaction_amount))
+    return prior, store.update(transaction.customer_id, clipped_amount)
 
-    reasons: List[str] = []
-    rule_triggered = False
-    score = 0.0
 
-    amt = transaction.transaction_amount
-    kyc = transaction.kyc_verified
-    channel = transaction.channel.lower()
-    age = transaction.account_age_days
-    hour = engineered_features["hour"]
+def observe_velocity(transaction: RawTransactionInput) -> Dict[str, float]:
+    """Add this transaction to the customer's velocity windows and return the counts including it."""
+    try:
+        return get_velocity_store().update(
+            transaction.customer_id, transaction.transaction_amount, transaction.timestamp
+        )
+    except Exception as e:
+        print(f"ERROR updating customer velocity: {e}")
+        return {}
+
+
+def bootstrap_customer_profiles() -> int:
+    """Load every customer's profile from MongoDB in bulk (called at startup)."""
+    try:
+        count = get_profile_store().bootstrap(
+            transactions_collection,
+            predictions_collection,
+            amount_clip_upper=get_pipeline().params["amount_clip_upper"],
+        )
+        print(f"Customer profiles bootstrapped for {count} customers.")
+        return count
+    except Exception as e:
+        print(f"ERROR bootstrapping customer profiles: {e}")
+        return 0
+
+
+# -------------------------------------------
+# LLM EXPLANATIONS (BACKGROUND)
+# -------------------------------------------
+llm_client = get_llm_client()
+
+explanation_cache = ExplanationCache(
+    max_entries=int(os.getenv("EXPLANATION_CACHE_SIZE", 1024)),
+    redis_client=get_redis_client(),
+    ttl_seconds=int(os.getenv("EXPLANATION_CACHE_TTL_S", 86400)),
+)
 
-    # Rule 1: High amount deviation (simple threshold)
-    if amt > max(5 * engineered_features["avg_txn_per_customer"], 1000):
-        rule_triggered = True
-        score += 0.4
-        reasons.append("Amount is more than 5× usual customer pattern.")
 
-    # Rule 2: No KYC + high risk channel
-    if kyc == 0 and channel in ["international", "web"]:
-        rule_triggered = True
-        score += 0.3
-        reasons.append("Unverified customer attempting risky channel transaction.")
+def store_explanation(key, status: str, text: Optional[str]):
+    """
+    Write a finished explanation back onto its prediction record.
+    `key` is (prediction_id, signature); LLM results are cached per signature.
+    """
+    prediction_id, signature = key
+    if status == EXPLANATION_READY:
+        explanation_cache.set(signature, text)
+    fields = {
+        "explanation": text,
+        "explanation_status": status,
+        "explained_at": datetime.now(),
+    }
+    # the record may still be waiting in the write-behind buffer
+    if predictions_buffer is not None and predictions_buffer.update_pending(prediction_id, fields):
+        return
+    wal.update_or_log("predictions", {"_id": prediction_id}, fields)
+
+
+explanation_worker = ExplanationWorker(
+    llm_client,
+    store_explanation,
+    max_workers=int(os.getenv("EXPLANATION_WORKERS", 4)),
+    max_pending=int(os.getenv("EXPLANATION_MAX_PENDING", 1000)),
+    timeout_s=float(os.getenv("EXPLANATION_TIMEOUT_S", 20)),
+)
 
-    # Rule 3: Odd hours transaction (2AM–4AM)
-    if 2 <= hour <= 4:
-        rule_triggered = True
-        score += 0.2
-        reasons.append("Transaction made at unusual time (2AM–4AM).")
 
-    # Rule 4: New accounts making sudden high-value payments
-    if age < 5 and amt > 10000:
-        rule_triggered = True
-        score += 0.3
-        reasons.append("New account attempting high-value transaction.")
+def shutdown_explanation_worker():
+    explanation_worker.shutdown(wait=False)
 
-    return rule_triggered, reasons, min(score, 1.0)
+
+def save_prediction(record: Dict[str, Any]):
+    """
+    Queue a prediction record for a bulk write, or insert it directly.
+    Either way it lands in the local WAL if MongoDB cannot take it.
+    """
+    if predictions_buffer is not None:
+        predictions_buffer.enqueue(record)
+    else:
+        wal.insert_or_log("predictions", [record])
 
 
 # -------------------------------------------
-# PREDICTION ENDPOINT
+# METRICS ENDPOINT
 # -------------------------------------------
-@router.post("/predict")
-def predict_and_save(transaction: RawTransactionInput):
-    if model is None:
-        raise HTTPException(status_code=503, detail="Model is not loaded.")
-    if predictions_collection is None:
-        raise HTTPException(status_code=503, detail="Database is not available.")
+@router.get("/metrics")
+def get_metrics():
+    """
+    Accuracy, precision, recall and F1 of the serving model version from
+    analyst feedback, plus the same for every version that has feedback.
+    """
+    try:
+        by_version = quality_by_version()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Model metrics unavailable: {e}")
+    active = model_registry.active_version()
+    metrics = by_version.get(active) or compute_metrics({})
+    return dict(metrics, model_version=active, by_version=by_version)
+
+
+@router.get("/models")
+def get_models():
+    """Registered model versions with their metadata, and the one serving."""
+    stats = model_registry.stats()
+    stats["registered"] = [model_registry.metadata(v) for v in stats["versions"]]
+    return stats
+
+
+@router.post("/models/{version}/activate")
+def activate_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Hot-swap the serving model; in-flight requests finish on the previous one."""
+    if MODEL_ADMIN_TOKEN and x_admin_token != MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    if version not in model_registry.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{version}'.")
+    try:
+        loaded = model_registry.activate(version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not load model {version}: {e}")
+    return {"active": loaded.describe()}
 
-    # 1. Feature engineering
-    engineered_features = transform_features(transaction)
-    payload = transaction.dict()
 
-    # 2. ML prediction
-    feature_order = [
-        'kyc_verified', 'account_age_days', 'transaction_amount', 'hour', 'day',
-        'weekday', 'channel_atm', 'channel_mobile', 'channel_pos',
-        'channel_web', 'avg_txn_per_customer', 'txns_count_per_customer',
-        'amt_deviation', 'high_amount_flag', 'is_night', 'is_weekend'
-    ]
-    input_df = pd.DataFrame([engineered_features])[feature_order]
-
-    prediction_raw = model.predict(input_df)
-    prediction_proba = model.predict_proba(input_df)
-
-    ml_fraud = bool(prediction_raw[0])
-    ml_score = float(prediction_proba[0][1])
-
-    # 3. Legacy business rules
-    legacy_triggered, legacy_rule_reasons, legacy_rule_score = apply_business_rules(
-        transaction,
-        engineered_features
-    )
+@router.get("/batcher/stats")
+def get_batcher_stats():
+    """Micro-batcher batch size and queueing delay metrics."""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return micro_batcher.stats()
+
+
+@router.get("/shadow/compare")
+def compare_shadow_scores(challenger_version: Optional[str] = None, hours: Optional[float] = None):
+    """
+    Champion vs shadow challenger: score agreement, latency per model and
+    the rate at which the challenger would flip the final decision.
+    """
+    since = datetime.now() - timedelta(hours=hours) if hours else None
+    try:
+        comparisons = shadow.compare(get_collection(shadow.SHADOW_COLLECTION), challenger_version, since)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Shadow scores unavailable: {e}")
+    return {
+        "live": shadow_scorer.stats() if shadow_scorer is not None else {"enabled": False},
+        "comparisons": comparisons,
+    }
+
 
-    # 4. New rule_engine rules
-    rule_triggers: List[str] = []
-    rule_details: List[Dict[str, Any]] = []
-    engine_rule_score = 0.0
+@router.get("/scoring_pool/stats")
+def get_scoring_pool_stats():
+    """Process-pool scoring calls, fallbacks and round-trip time."""
+    if scoring_pool is None:
+        return {"enabled": False}
+    return scoring_pool.stats()
 
-    if rule_engine:
+
+# -------------------------------------------
+# RULES (routers/rule_engine.py) + HYBRID DECISION
+# -------------------------------------------
+def evaluate_rule_layers(payload: Dict, engineered_features: Dict,
+                         customer_profile: Optional[Dict] = None,
+                         velocity: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Evaluate the business and rule-engine rules for one transaction:
+    rule_triggers, rule_details, rule_reasons, the combined rule_score and
+    the rule_set_version they came from.
+    """
+    # one snapshot, even if rule_store swaps in a new version meanwhile
+    rule_set = rule_engine.get_rule_set()
+    stats = get_rule_stats()
+    timings = [0.0] * len(rule_set.rules) if stats is not None and stats.should_time() else None
+    with telemetry.stage("rules"):
         try:
-            rule_triggers, rule_details = rule_engine.evaluate_rules(
-                raw_input=payload,
-                engineered_features=engineered_features,
-                customer_profile=None,   # extend later if you have profile
+            result = rule_set.evaluate_row(
+                rule_engine.row_inputs(payload, engineered_features, customer_profile, velocity), timings
             )
+            if stats is not None:
+                stats.record_evaluations(rule_set.codes, 1, timings)
+        except Exception as e:
+            print(f"ERROR evaluating rules: {e}")
+            result = rule_engine.empty_result()
+    result["rule_set_version"] = rule_set.version
+    return result
+
 
-            # derive numeric score from severities
-            sev_map = {
-                getattr(rule_engine, "HIGH_RISK_RULE_SEVERITY", "high"): 0.5,
-                getattr(rule_engine, "MEDIUM_RISK_RULE_SEVERITY", "medium"): 0.3,
-                getattr(rule_engine, "LOW_RISK_RULE_SEVERITY", "low"): 0.1,
-            }
-            for d in rule_details:
-                sev = d.get("severity")
-                engine_rule_score += sev_map.get(sev, 0.1)
-
-            if engine_rule_score > 1.0:
-                engine_rule_score = 1.0
+def evaluate_rule_layers_batch(frame: pd.DataFrame, engineered: pd.DataFrame,
+                               customer_profiles: List[Optional[Dict]],
+                               velocities: Optional[List[Dict]] = None) -> List[Dict[str, Any]]:
+    """evaluate_rule_layers for a whole batch in one vectorized pass."""
+    rule_set = rule_engine.get_rule_set()
+    stats = get_rule_stats()
+    timings = [0.0] * len(rule_set.rules) if stats is not None else None
+    with telemetry.stage("rules"):
+        try:
+            results = rule_set.evaluate_batch(
+                rule_engine.batch_inputs(frame, engineered, customer_profiles, rule_set.fields, velocities),
+                timings,
+            )
+            if stats is not None:
+                stats.record_evaluations(rule_set.codes, len(frame), timings, batch=True)
         except Exception as e:
-            print(f"ERROR evaluating rule_engine: {e}")
-            rule_triggers, rule_details, engine_rule_score = [], [], 0.0
+            print(f"ERROR evaluating rules: {e}")
+            results = [rule_engine.empty_result() for _ in range(len(frame))]
+    for result in results:
+        result["rule_set_version"] = rule_set.version
+    return results
+
 
-    # 5. Combine rule reasons + scores
-    engine_rule_reasons = [d.get("reason", "") for d in rule_details if d.get("reason")]
-    rule_reasons: List[str] = legacy_rule_reasons + engine_rule_reasons
+def record_rule_hits(rule_results: List[Dict[str, Any]], verdicts: List[Dict[str, Any]], ml_scores: List[float]):
+    """Count which rules fired against the final verdicts and ML scores (rule_stats.py)."""
+    stats = get_rule_stats()
+    if stats is not None:
+        stats.record_hits([r.get("fired_rules", ()) for r in rule_results],
+                          [v["is_fraud"] for v in verdicts], ml_scores)
 
-    rule_score = max(legacy_rule_score, engine_rule_score)
 
-    # 6. Hybrid final decision
-    final_score = max(ml_score, rule_score)
+def record_rollups(timestamps, engineered, verdicts: List[Dict[str, Any]]):
+    """
+    Add scored transactions to the dashboard rollups (rollups.py): one
+    engineered feature dict, or a batch's engineered frame, with its verdicts.
+    """
+    writer = get_rollup_writer()
+    if writer is None:
+        return
+    try:
+        if isinstance(engineered, pd.DataFrame):
+            frame = engineered.assign(timestamp=list(timestamps), is_fraud=[v["is_fraud"] for v in verdicts])
+            writer.add_frame(frame, SOURCE_PREDICTIONS)
+        else:
+            writer.add(SOURCE_PREDICTIONS, timestamps, engineered, verdicts[0]["is_fraud"])
+    except Exception as e:
+        print(f"ERROR: failed to add predictions to the rollups: {e}")
+
+
+def ml_decision(ml_score: float) -> bool:
+    # RandomForest.predict is argmax over predict_proba, so the ML verdict
+    # is read off the probability instead of traversing the forest twice.
+    return bool(ml_score > 0.5)
+
+
+def build_verdict(ml_score: float, rules: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Hybrid final decision: the ML probability and the rule score are
+    combined by taking the max, and the reasons are assembled for display.
+    """
+    ml_fraud = ml_decision(ml_score)
+
+    final_score = max(ml_score, rules["rule_score"])
     final_fraud = final_score >= 0.50
 
-    # 7. ML reason + combined reasons
     ml_reason = (
         "ML model predicted high fraud probability."
         if ml_fraud
@@ -313,7 +506,7 @@ def predict_and_save(transaction: RawTransactionInput):
 
     # Rule reasons = ONLY actual rule messages (empty list if none)
     # let the frontend decide how to display “no rules”
-    rule_reasons = rule_reasons  # already built above
+    rule_reasons = rules["rule_reasons"]
 
     # Combined reasons = ML + rules
     combined_reasons: List[str] = []
@@ -324,62 +517,409 @@ def predict_and_save(transaction: RawTransactionInput):
     else:
         combined_reasons.append("No rule-based alerts were triggered.")
 
-    # 8. Explanation (Gemini, plain text)
-    engineered_features_for_llm = dict(engineered_features)
-    engineered_features_for_llm["ml_reason"] = ml_reason
-    engineered_features_for_llm["rule_reasons"] = rule_reasons
-
-    explanation = generate_fraud_explanation(
-        payload,
-        engineered_features_for_llm,
-        final_fraud,
-        final_score
-    )
-
-    # 9. Build API result
-    result = {
+    return {
         "is_fraud": final_fraud,
         "risk_score": final_score,
         "ml_reason": ml_reason,
         "rule_reasons": rule_reasons,          # no fake "No rules..." string
         "combined_reasons": combined_reasons,  # ML + rules
-        "explanation": explanation,
     }
 
 
-    # 10. Save prediction record
+def build_record(payload: Dict, verdict: Dict[str, Any], rules: Dict[str, Any],
+                 processed_at: datetime, model_version: Optional[str] = None,
+                 explanation_status: str = EXPLANATION_SKIPPED,
+                 explanation: Optional[str] = None, ml_score: Optional[float] = None) -> Dict[str, Any]:
     record = payload.copy()
-    record["is_fraud"] = final_fraud
-    record["risk_score"] = final_score
-    record["ml_reason"] = ml_reason
-    record["rule_reasons"] = rule_reasons
-    record["combined_reasons"] = combined_reasons
-    record["rule_triggers"] = rule_triggers
-    record["rule_details"] = rule_details
-    record["processed_at"] = datetime.now()
+    record["is_fraud"] = verdict["is_fraud"]
+    record["risk_score"] = verdict["risk_score"]
+    # the model's own decision, before rules are combined in (model quality is measured on it)
+    if ml_score is not None:
+        record["ml_score"] = float(ml_score)
+        record["ml_fraud"] = ml_decision(ml_score)
+    record["ml_reason"] = verdict["ml_reason"]
+    record["rule_reasons"] = verdict["rule_reasons"]
+    record["combined_reasons"] = verdict["combined_reasons"]
+    record["rule_triggers"] = rules["rule_triggers"]
+    record["rule_details"] = rules["rule_details"]
+    record["processed_at"] = processed_at
+    record["model_version"] = model_version
+    record["rule_set_version"] = rules.get("rule_set_version")
     record["explanation"] = explanation
+    record["explanation_status"] = explanation_status
+    return record
+
+
+def build_alert(transaction, verdict: Dict[str, Any], rules: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Alert document fields for high-risk verdicts, None otherwise."""
+    if not (verdict["risk_score"] > 0.75 or verdict["is_fraud"]):
+        return None
+    # use rule_triggers if available, else fall back to text rule_reasons
+    return {
+        "transaction_id": f"{transaction.customer_id}_{transaction.timestamp}",
+        "customer_id": transaction.customer_id,
+        "risk_score": verdict["risk_score"],
+        "reasons": rules["rule_triggers"] or verdict["rule_reasons"],
+        "details": rules["rule_details"],
+    }
+
+
+# -------------------------------------------
+# PREDICTION ENDPOINT
+# -------------------------------------------
+# Retried / duplicated transactions get the stored result instead of a rescore
+idempotency_cache = IdempotencyCache(redis_client=get_redis_client()) if IDEMPOTENCY_ENABLED else None
+
 
-    predictions_collection.insert_one(record)
+@router.post("/predict")
+def predict_and_save(transaction: RawTransactionInput, response: Response,
+                     idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """
+    Score one transaction. Repeats of a transaction (same Idempotency-Key,
+    or same customer / timestamp / amount / channel) return the first result.
+    """
+    if idempotency_cache is None:
+        return score_and_save(transaction)
 
-    # 11. Save fraud alert via alert_service when high risk
+    key = request_key(idempotency_key, transaction.dict())
     try:
-        if alert_service and (final_score > 0.75 or final_fraud):
-            transaction_id = f"{transaction.customer_id}_{transaction.timestamp}"
-            # use rule_triggers if available, else fall back to text rule_reasons
-            reasons_for_alert = rule_triggers or rule_reasons
-            alert_service.save_alert(
-                transaction_id=transaction_id,
-                customer_id=transaction.customer_id,
-                risk_score=final_score,
-                reasons=reasons_for_alert,
-                details=rule_details,
+        result, replayed = idempotency_cache.run(key, lambda: score_and_save(transaction))
+    except RequestInProgress:
+        raise HTTPException(status_code=409, detail="Request in progress; retry later.")
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+        result = refresh_explanation(result)
+    return result
+
+
+def refresh_explanation(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A replayed result was stored before its background explanation finished:
+    fill in the explanation from the signature cache or the prediction record.
+    """
+    if result.get("explanation_status") != EXPLANATION_PENDING:
+        return result
+    explanation = explanation_cache.get(explanation_signature(
+        result["is_fraud"], result["risk_score"], result["ml_reason"], result["rule_reasons"]
+    ))
+    if explanation is not None:
+        return dict(result, explanation=explanation, explanation_status=EXPLANATION_READY)
+
+    try:
+        doc = find_explanation(ObjectId(result["prediction_id"]))
+    except Exception as e:
+        print(f"ERROR: failed to read explanation for {result.get('prediction_id')}: {e}")
+        doc = None
+    if doc is None or doc.get("explanation_status", EXPLANATION_PENDING) == EXPLANATION_PENDING:
+        return result
+    return dict(result, explanation=doc.get("explanation"), explanation_status=doc["explanation_status"])
+
+
+def score_and_save(transaction: RawTransactionInput) -> Dict[str, Any]:
+    active_model()
+
+    # 1. Customer profile + feature engineering
+    with telemetry.stage("customer_profile"):
+        prior_profile, profile = observe_customer(transaction)
+    with telemetry.stage("velocity"):
+        velocity = observe_velocity(transaction)
+    with telemetry.stage("transform_features"):
+        engineered_features = transform_features(transaction, profile)
+    payload = transaction.dict()
+
+    # 2. ML prediction
+    with telemetry.stage("model"):
+        X = np.array([[engineered_features[f] for f in FEATURE_ORDER]], dtype=np.float64)
+        model_start = time.perf_counter()
+        ml_score, model_version = score_one(X)
+        model_ms = (time.perf_counter() - model_start) * 1000.0
+
+    # 3. Rules (business + rule engine) and hybrid decision
+    rules = evaluate_rule_layers(payload, engineered_features, prior_profile, velocity)
+    verdict = build_verdict(ml_score, rules)
+    record_rule_hits([rules], [verdict], [ml_score])
+    record_rollups(payload["timestamp"], engineered_features, [verdict])
+
+    # 4. Explanation: served from the signature cache when possible,
+    #    otherwise generated by the LLM in the background
+    with telemetry.stage("explanation_cache"):
+        signature = explanation_signature(
+            verdict["is_fraud"], verdict["risk_score"], verdict["ml_reason"], verdict["rule_reasons"]
+        )
+        explanation = explanation_cache.get(signature)
+    explanation_status = EXPLANATION_READY if explanation is not None else EXPLANATION_PENDING
+
+    # 5. Save prediction record
+    with telemetry.stage("save_prediction"):
+        record = build_record(payload, verdict, rules, datetime.now(), model_version, explanation_status, explanation,
+                              ml_score=ml_score)
+        record["_id"] = ObjectId()
+        save_prediction(record)
+
+    if shadow_scorer is not None:
+        shadow_scorer.submit([record["_id"]], X, [ml_score], [rules["rule_score"]],
+                             model_version, [verdict["is_fraud"]], model_ms)
+
+    if explanation is None:
+        with telemetry.stage("explanation_submit"):
+            fallback = template_explanation(
+                verdict["is_fraud"], verdict["risk_score"], verdict["ml_reason"], verdict["rule_reasons"]
             )
+            if not explanation_worker.submit((record["_id"], signature), build_signature_prompt(signature), fallback):
+                # worker queue is full: answer with the deterministic template right away
+                explanation, explanation_status = fallback, EXPLANATION_TEMPLATE
+                store_explanation((record["_id"], signature), explanation_status, explanation)
+
+    # 6. Build API result
+    result = dict(verdict)
+    result["prediction_id"] = str(record["_id"])
+    result["model_version"] = model_version
+    result["rule_set_version"] = rules.get("rule_set_version")
+    result["explanation"] = explanation
+    result["explanation_status"] = explanation_status
+
+    # 7. Save fraud alert via alert_service when high risk
+    try:
+        alert = build_alert(transaction, verdict, rules)
+        if alert_service and alert:
+            with telemetry.stage("save_alert"):
+                alert_service.save_alert(**alert)
     except Exception as e:
         print(f"ERROR: failed to save alert via alert_service: {e}")
 
     return result
 
 
+def _batch_transactions(batch: BatchTransactionInput) -> List[RawTransactionInput]:
+    """Normalize the row or columnar batch layout into validated transactions."""
+    if batch.transactions is not None and batch.columns is not None:
+        raise HTTPException(status_code=400, detail="Send either 'transactions' or 'columns', not both.")
+
+    if batch.columns is not None:
+        fields = list(RawTransactionInput.__fields__)
+        missing = [f for f in fields if f not in batch.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing columns: {missing}")
+        lengths = {len(batch.columns[f]) for f in fields}
+        if len(lengths) > 1:
+            raise HTTPException(status_code=400, detail="All columns must have the same length.")
+        try:
+            return [
+                RawTransactionInput(**dict(zip(fields, row)))
+                for row in zip(*(batch.columns[f] for f in fields))
+            ]
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Invalid columnar batch: {e}")
+
+    return batch.transactions or []
+
+
+@router.post("/predict_batch")
+def predict_batch(batch: BatchTransactionInput):
+    """
+    Score many transactions in one request: features are engineered for
+    the whole batch, the model runs a single predict_proba pass and all
+    records are written with one insert_many. Results keep input order.
+    """
+    # one model snapshot for the whole batch, even if a swap happens meanwhile
+    current = active_model()
+
+    transactions = _batch_transactions(batch)
+    if not transactions:
+        return {"count": 0, "results": []}
+    if len(transactions) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} transactions.")
+
+    # 1. Customer profiles (in input order, so repeat customers within the
+    #    batch see each other) + feature engineering for the whole batch
+    payloads = [t.dict() for t in transactions]
+    prior_profiles: List[Optional[Dict]] = []
+    velocities: List[Dict] = []
+    frame = pd.DataFrame(payloads)
+    avg_txn, txn_count = [], []
+    for transaction in transactions:
+        prior, profile = observe_customer(transaction)
+        prior_profiles.append(prior)
+        velocities.append(observe_velocity(transaction))
+        avg_txn.append(profile["avg_txn_amount"])
+        txn_count.append(profile["txn_count"])
+    frame["avg_txn_per_customer"] = avg_txn
+    frame["txns_count_per_customer"] = txn_count
+    try:
+        engineered = transform_features_batch(frame)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Could not engineer features: {e}")
+
+    # 2. One ML pass
+    X = engineered.to_numpy(np.float64)
+    model_start = time.perf_counter()
+    ml_scores = score_matrix(X, current)
+    model_ms_per_row = (time.perf_counter() - model_start) * 1000.0 / len(X)
+
+    # 3. Rules for the whole batch + hybrid decision per row
+    processed_at = datetime.now()
+    results: List[Dict[str, Any]] = []
+    records: List[Dict[str, Any]] = []
+    alerts: List[Dict[str, Any]] = []
+    rule_scores: List[float] = []
+    batch_rules = evaluate_rule_layers_batch(frame, engineered, prior_profiles, velocities)
+
+    for transaction, payload, ml_score, rules in zip(transactions, payloads, ml_scores, batch_rules):
+        verdict = build_verdict(float(ml_score), rules)
+        rule_scores.append(rules["rule_score"])
+
+        # LLM explanations are not generated per row for batch scoring
+        result = dict(verdict)
+        result["model_version"] = current.version
+        result["rule_set_version"] = rules.get("rule_set_version")
+        result["explanation"] = None
+        result["explanation_status"] = EXPLANATION_SKIPPED
+        results.append(result)
+        record = build_record(payload, verdict, rules, processed_at, current.version, ml_score=float(ml_score))
+        record["_id"] = ObjectId()
+        records.append(record)
+
+        alert = build_alert(transaction, verdict, rules)
+        if alert:
+            alerts.append(alert)
+    record_rule_hits(batch_rules, results, ml_scores.tolist())
+    record_rollups(frame["timestamp"], engineered, results)
+
+    # 4. One bulk write (ordered, so stored order matches input order),
+    #    logged locally instead if MongoDB is unavailable
+    wal.insert_or_log("predictions", records, ordered=True)
+    for result, record in zip(results, records):
+        result["prediction_id"] = str(record["_id"])
+
+    if shadow_scorer is not None:
+        shadow_scorer.submit([r["_id"] for r in records], X, ml_scores, rule_scores,
+                             current.version, [r["is_fraud"] for r in records], model_ms_per_row)
+
+    try:
+        if alert_service and alerts:
+            alert_service.save_alerts(alerts)
+    except Exception as e:
+        print(f"ERROR: failed to save alerts via alert_service: {e}")
+
+    return {"count": len(results), "results": results}
+
+
+# -------------------------------------------
+# PROMETHEUS COLLECTOR (read at scrape time)
+# -------------------------------------------
+def _telemetry_samples():
+    ec = explanation_cache.stats()
+    lookups = [(("explanation", "hit"), ec["local_hits"] + ec["redis_hits"]), (("explanation", "miss"), ec["misses"])]
+    if idempotency_cache is not None:
+        ic = idempotency_cache.stats()
+        lookups += [(("idempotency", "hit"), ic["hits"] + ic["coalesced"]), (("idempotency", "miss"), ic["misses"])]
+    yield ("fraud_component_cache_lookups_total", "counter",
+           "Lookups in component caches (explanations, idempotency).", ("cache", "result"), lookups)
+
+    worker = explanation_worker.stats()
+    yield ("fraud_explanation_in_flight", "gauge", "Explanations queued for or waiting on the LLM.", (),
+           [((), worker["in_flight"])])
+
+    if micro_batcher is not None:
+        mb = micro_batcher.stats()
+        yield ("fraud_micro_batches_total", "counter", "Model batches run by the micro-batcher.", (),
+               [((), mb["batches"])])
+        yield ("fraud_micro_batch_requests_total", "counter", "Rows scored through the micro-batcher.", (),
+               [((), mb["requests"])])
+
+    buffers = write_behind.all_stats()
+    yield ("fraud_write_behind_queued", "gauge", "Documents waiting in a write-behind buffer.", ("collection",),
+           [((name, ), b["queued"]) for name, b in buffers.items()])
+    yield ("fraud_write_behind_documents_total", "counter", "Write-behind documents by outcome.",
+           ("collection", "outcome"),
+           [((name, outcome), b[key]) for name, b in buffers.items()
+            for outcome, key in (("written", "written"), ("dropped", "dropped"),
+                                 ("failed", "failed"), ("spilled", "spilled_to_wal"))])
+    yield ("fraud_write_behind_flush_seconds_avg", "gauge", "Average write-behind flush latency.", ("collection",),
+           [((name, ), b["avg_flush_ms"] / 1000.0) for name, b in buffers.items()])
+
+    vs = get_velocity_store().stats()
+    yield ("fraud_velocity_customers", "gauge", "Customers with in-memory velocity windows.", (),
+           [((), vs["customers"])])
+
+    log = wal.get_wal()
+    if log is not None:
+        ws = log.stats()
+        yield ("fraud_wal_backlog_bytes", "gauge", "Bytes waiting in the local write-ahead log.", (),
+               [((), ws["bytes"])])
+
+
+telemetry.register_collector(_telemetry_samples)
+
+
+@router.get("/idempotency/stats")
+def get_idempotency_stats():
+    """Replayed, coalesced and computed /predict requests."""
+    if idempotency_cache is None:
+        return {"enabled": False}
+    return idempotency_cache.stats()
+
+
+@router.get("/explanations/stats")
+def get_explanation_stats():
+    """Explanation cache hit/miss counters and background worker state."""
+    return {
+        "cache": explanation_cache.stats(),
+        "worker": explanation_worker.stats(),
+    }
+
+
+@router.get("/write_behind/stats")
+def get_write_behind_stats():
+    """Queue depth, flush latency and dropped/failed write counters per buffered collection."""
+    log = wal.get_wal()
+    return {
+        "enabled": write_behind.WRITE_BEHIND_ENABLED,
+        "buffers": write_behind.all_stats(),
+        "wal": log.stats() if log is not None else {"enabled": False},
+    }
+
+
+@router.get("/velocity/stats")
+def get_velocity_stats():
+    """Velocity windows, tracked customers, evictions and approximate memory."""
+    return get_velocity_store().stats()
+
+
+def find_explanation(prediction_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """explanation / explanation_status of a prediction, from the write-behind buffer or MongoDB."""
+    doc = None
+    if predictions_buffer is not None:
+        doc = predictions_buffer.get_pending(prediction_id)
+    if doc is None and predictions_collection is not None:
+        doc = predictions_collection.find_one(
+            {"_id": prediction_id},
+            {"explanation": 1, "explanation_status": 1},
+        )
+    return doc
+
+
+@router.get("/{prediction_id}/explanation")
+def get_prediction_explanation(prediction_id: str):
+    """Explanation of a prediction and its status (pending / ready / template / skipped)."""
+    if predictions_collection is None:
+        raise HTTPException(status_code=503, detail="Database is not available.")
+    if not ObjectId.is_valid(prediction_id):
+        raise HTTPException(status_code=400, detail="Invalid prediction id.")
+
+    doc = find_explanation(ObjectId(prediction_id))
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Prediction not found.")
+
+    return {
+        "prediction_id": prediction_id,
+        # records written before explanations went async carry no status
+        "explanation_status": doc.get("explanation_status")
+        or (EXPLANATION_READY if doc.get("explanation") else EXPLANATION_SKIPPED),
+        "explanation": doc.get("explanation"),
+    }
+
+
 @router.get("/history")
 def get_prediction_history(page: int = 1, limit: int = 25):
     if predictions_collection is None:
@@ -1,5 +1,49 @@
 # src/utils/fraud_dashboard/rule_engine.py
-from typing import Dict, List, Tuple
+#
+# Fraud rules as data. Each rule is a dict:
+#
+#   {"code": "ODD_HOUR_TXN",
+#    "layer": "engine",                 # "business" or "engine", see below
+#    "conditions": [{"field": "hour", "op": "between", "threshold": [2, 4]}],
+#    "severity": "medium",
+#    "weight": 0.3,                     # added to the layer's score when it fires
+#    "reason": "Transaction at odd hour: {hour}:00"}
+#
+# A rule fires when all of its conditions hold. A threshold is a constant,
+# a list (for "in", "not_in" and "between"), or another field scaled and
+# floored: {"field": "avg_txn_per_customer", "times": 5, "at_least": 1000}
+# means max(5 * avg_txn_per_customer, 1000). Reasons are format strings
+# over the row's fields.
+#
+# A row's fields are the engineered features, overridden by the raw
+# transaction fields of the same name (so amounts and ages are unscaled),
+# with channel lower-cased, plus prior_avg_txn_amount / prior_txn_count
+# from the customer's profile before this transaction (NaN / 0 if unknown)
+# and the customer's velocity, txn_count_<window> / txn_amount_<window>
+# including this transaction (velocity.py; 0 if not given).
+#
+# compile_rules() turns the definitions into a RuleSet that evaluates a
+# whole batch as NumPy boolean masks (evaluate_batch), or one row with plain
+# comparisons (evaluate_row); given a `timings` list, both add each rule's
+# evaluation time to it. Both return per row:
+#   rule_triggers / rule_details  codes and {rule, reason, severity} of the
+#                                 "engine" rules that fired
+#   rule_reasons                  reasons of the "business" rules, then of
+#                                 the "engine" rules
+#   rule_score                    each layer's weights summed and capped at
+#                                 1.0; the larger of the two
+#   fired_rules                   codes of every rule that fired
+import math
+import operator
+import string
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.fraud_dashboard.features import FEATURE_ORDER
+from src.utils.fraud_dashboard.velocity import VELOCITY_FIELDS, VELOCITY_COUNT_FIELDS, zero_velocity
 
 # Example config / thresholds (tune these to your data)
 AVG_TXN_MULTIPLIER_THRESHOLD = 5.0   # > 5x average => suspicious
@@ -8,72 +52,427 @@ ODD_HOUR_END = 4
 HIGH_RISK_RULE_SEVERITY = "high"
 MEDIUM_RISK_RULE_SEVERITY = "medium"
 LOW_RISK_RULE_SEVERITY = "low"
+SEVERITY_WEIGHTS = {
+    HIGH_RISK_RULE_SEVERITY: 0.5,
+    MEDIUM_RISK_RULE_SEVERITY: 0.3,
+    LOW_RISK_RULE_SEVERITY: 0.1,
+}
+
+BUSINESS_LAYER = "business"
+ENGINE_LAYER = "engine"
+LAYERS = (BUSINESS_LAYER, ENGINE_LAYER)
+
+RAW_FIELDS = ("customer_id", "kyc_verified", "account_age_days", "transaction_amount", "channel", "timestamp")
+PRIOR_AVG_FIELD = "prior_avg_txn_amount"
+PRIOR_COUNT_FIELD = "prior_txn_count"
+KNOWN_FIELDS = (frozenset(FEATURE_ORDER) | frozenset(RAW_FIELDS) | {PRIOR_AVG_FIELD, PRIOR_COUNT_FIELD}
+                | frozenset(VELOCITY_FIELDS))
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    # ---- business rules (previously apply_business_rules in prediction.py) ----
+    {
+        "code": "AMOUNT_VS_USUAL_PATTERN",
+        "layer": BUSINESS_LAYER,
+        "conditions": [{"field": "transaction_amount", "op": ">",
+                        "threshold": {"field": "avg_txn_per_customer", "times": 5, "at_least": 1000}}],
+        "severity": HIGH_RISK_RULE_SEVERITY,
+        "weight": 0.4,
+        "reason": "Amount is more than 5× usual customer pattern.",
+    },
+    {
+        "code": "UNVERIFIED_RISKY_CHANNEL",
+        "layer": BUSINESS_LAYER,
+        "conditions": [{"field": "kyc_verified", "op": "==", "threshold": 0},
+                       {"field": "channel", "op": "in", "threshold": ["international", "web"]}],
+        "severity": MEDIUM_RISK_RULE_SEVERITY,
+        "weight": 0.3,
+        "reason": "Unverified customer attempting risky channel transaction.",
+    },
+    {
+        "code": "UNUSUAL_HOUR",
+        "layer": BUSINESS_LAYER,
+        "conditions": [{"field": "hour", "op": "between", "threshold": [2, 4]}],
+        "severity": LOW_RISK_RULE_SEVERITY,
+        "weight": 0.2,
+        "reason": "Transaction made at unusual time (2AM–4AM).",
+    },
+    {
+        "code": "NEW_ACCOUNT_HIGH_VALUE",
+        "layer": BUSINESS_LAYER,
+        "conditions": [{"field": "account_age_days", "op": "<", "threshold": 5},
+                       {"field": "transaction_amount", "op": ">", "threshold": 10000}],
+        "severity": MEDIUM_RISK_RULE_SEVERITY,
+        "weight": 0.3,
+        "reason": "New account attempting high-value transaction.",
+    },
+    # ---- rule engine rules ----
+    {
+        "code": "HIGH_AMOUNT_VS_AVG",
+        "layer": ENGINE_LAYER,
+        "conditions": [{"field": PRIOR_AVG_FIELD, "op": ">", "threshold": 0},
+                       {"field": "transaction_amount", "op": ">",
+                        "threshold": {"field": PRIOR_AVG_FIELD, "times": AVG_TXN_MULTIPLIER_THRESHOLD}}],
+        "severity": HIGH_RISK_RULE_SEVERITY,
+        "weight": SEVERITY_WEIGHTS[HIGH_RISK_RULE_SEVERITY],
+        "reason": ("Transaction amount {transaction_amount} is > "
+                   f"{AVG_TXN_MULTIPLIER_THRESHOLD}x customer's avg {{{PRIOR_AVG_FIELD}}}"),
+    },
+    {
+        "code": "INTERNATIONAL_NO_KYC",
+        "layer": ENGINE_LAYER,
+        "conditions": [{"field": "channel", "op": "in", "threshold": ["international", "intl", "wire"]},
+                       {"field": "kyc_verified", "op": "==", "threshold": 0}],
+        "severity": HIGH_RISK_RULE_SEVERITY,
+        "weight": SEVERITY_WEIGHTS[HIGH_RISK_RULE_SEVERITY],
+        "reason": "International channel with KYC not verified",
+    },
+    {
+        "code": "ODD_HOUR_TXN",
+        "layer": ENGINE_LAYER,
+        "conditions": [{"field": "hour", "op": "between", "threshold": [ODD_HOUR_START, ODD_HOUR_END]}],
+        "severity": MEDIUM_RISK_RULE_SEVERITY,
+        "weight": SEVERITY_WEIGHTS[MEDIUM_RISK_RULE_SEVERITY],
+        "reason": "Transaction at odd hour: {hour}:00",
+    },
+    {
+        "code": "NEW_ACCOUNT_HIGH_AMOUNT",
+        "layer": ENGINE_LAYER,
+        "conditions": [{"field": "account_age_days", "op": "<", "threshold": 7},
+                       {"field": "transaction_amount", "op": ">", "threshold": 1000}],
+        "severity": MEDIUM_RISK_RULE_SEVERITY,
+        "weight": SEVERITY_WEIGHTS[MEDIUM_RISK_RULE_SEVERITY],
+        "reason": "Account age {account_age_days} days and amount {transaction_amount} is high for new account",
+    },
+    {
+        "code": "ABSOLUTE_HIGH_AMOUNT",
+        "layer": ENGINE_LAYER,
+        "conditions": [{"field": "transaction_amount", "op": ">", "threshold": 200000}],  # absolute extreme
+        "severity": HIGH_RISK_RULE_SEVERITY,
+        "weight": SEVERITY_WEIGHTS[HIGH_RISK_RULE_SEVERITY],
+        "reason": "Transaction amount {transaction_amount} exceeds absolute threshold",
+    },
+]
+
+# op -> (scalar function, vectorized function)
+_COMPARISONS = {
+    ">": (operator.gt, np.greater),
+    ">=": (operator.ge, np.greater_equal),
+    "<": (operator.lt, np.less),
+    "<=": (operator.le, np.less_equal),
+    "==": (operator.eq, np.equal),
+    "!=": (operator.ne, np.not_equal),
+}
+OPERATORS = tuple(_COMPARISONS) + ("in", "not_in", "between")
+
+
+# -------------------------------------------
+# COMPILATION
+# -------------------------------------------
+class Condition:
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.field = spec.get("field")
+        self.op = spec.get("op")
+        threshold = spec.get("threshold")
+        if self.field not in KNOWN_FIELDS:
+            raise ValueError(f"Unknown field '{self.field}'")
+        if self.op not in OPERATORS:
+            raise ValueError(f"Unknown operator '{self.op}' (expected one of {OPERATORS})")
+
+        self.ref_field: Optional[str] = None
+        self.times = 1.0
+        self.at_least: Optional[float] = None
+        if isinstance(threshold, dict):
+            if self.op not in _COMPARISONS:
+                raise ValueError(f"Operator '{self.op}' needs a constant threshold")
+            self.ref_field = threshold.get("field")
+            if self.ref_field not in KNOWN_FIELDS:
+                raise ValueError(f"Unknown threshold field '{self.ref_field}'")
+            self.times = float(threshold.get("times", 1.0))
+            self.at_least = float(threshold["at_least"]) if threshold.get("at_least") is not None else None
+        elif self.op == "between":
+            if not isinstance(threshold, (list, tuple)) or len(threshold) != 2:
+                raise ValueError("'between' needs a [low, high] threshold")
+        elif self.op in ("in", "not_in"):
+            if not isinstance(threshold, (list, tuple)):
+                raise ValueError(f"'{self.op}' needs a list threshold")
+        elif threshold is None:
+            raise ValueError(f"Condition on '{self.field}' has no threshold")
+        self.threshold = threshold
+        self._values = frozenset(threshold) if self.op in ("in", "not_in") else None
+        self.matches = self._compile_scalar()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return (self.field,) if self.ref_field is None else (self.field, self.ref_field)
+
+    def _compile_scalar(self):
+        """row -> bool for single-row evaluation, with the operator resolved up front."""
+        field = self.field
+        if self.op == "between":
+            low, high = self.threshold
+            return lambda row: low <= row[field] <= high
+        if self.op == "in":
+            values = self._values
+            return lambda row: row[field] in values
+        if self.op == "not_in":
+            values = self._values
+            return lambda row: row[field] not in values
+        compare = _COMPARISONS[self.op][0]
+        if self.ref_field is None:
+            threshold = self.threshold
+            return lambda row: compare(row[field], threshold)
+        ref_field, times, at_least = self.ref_field, self.times, self.at_least
+        if at_least is None:
+            return lambda row: compare(row[field], row[ref_field] * times)
+        return lambda row: compare(row[field], max(row[ref_field] * times, at_least))
+
+    def mask(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        values = columns[self.field]
+        if self.op == "between":
+            return (values >= self.threshold[0]) & (values <= self.threshold[1])
+        if self.op == "in":
+            return np.isin(values, list(self._values))
+        if self.op == "not_in":
+            return ~np.isin(values, list(self._values))
+        threshold = self.threshold
+        if self.ref_field is not None:
+            threshold = columns[self.ref_field] * self.times
+            if self.at_least is not None:
+                threshold = np.maximum(threshold, self.at_least)
+        return np.asarray(_COMPARISONS[self.op][1](values, threshold), dtype=bool)
+
+
+class Rule:
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.code = spec.get("code")
+        self.layer = spec.get("layer", ENGINE_LAYER)
+        self.severity = spec.get("severity", LOW_RISK_RULE_SEVERITY)
+        self.reason = spec.get("reason") or ""
+        if not self.code:
+            raise ValueError("Rule needs a code")
+        if self.layer not in LAYERS:
+            raise ValueError(f"Rule {self.code}: unknown layer '{self.layer}' (expected one of {LAYERS})")
+        if self.severity not in SEVERITY_WEIGHTS:
+            raise ValueError(f"Rule {self.code}: unknown severity '{self.severity}'")
+        weight = spec.get("weight")
+        self.weight = float(SEVERITY_WEIGHTS[self.severity] if weight is None else weight)
+        if not spec.get("conditions"):
+            raise ValueError(f"Rule {self.code} has no conditions")
+        try:
+            self.conditions = [Condition(c) for c in spec["conditions"]]
+        except ValueError as e:
+            raise ValueError(f"Rule {self.code}: {e}")
+        self.reason_fields = tuple(
+            name for _, name, _, _ in string.Formatter().parse(self.reason) if name
+        )
+        unknown = [f for f in self.reason_fields if f not in KNOWN_FIELDS]
+        if unknown:
+            raise ValueError(f"Rule {self.code}: unknown fields in reason: {unknown}")
+        self.matches = self._compile_scalar()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple({f for c in self.conditions for f in c.fields} | set(self.reason_fields))
+
+    def _compile_scalar(self):
+        """row -> bool: all conditions, short-circuiting like chained `and`."""
+        checks = [c.matches for c in self.conditions]
+        if len(checks) == 1:
+            return checks[0]
+        if len(checks) == 2:
+            first, second = checks
+            return lambda row: first(row) and second(row)
+        return lambda row: all(check(row) for check in checks)
+
+    def mask(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        result = self.conditions[0].mask(columns)
+        for condition in self.conditions[1:]:
+            result = result & condition.mask(columns)
+        return result
+
+    def reason_for(self, row: Dict[str, Any]) -> str:
+        return self.reason.format_map(row) if self.reason_fields else self.reason
+
+
+class RuleSet:
+
+    def __init__(self, rules: Sequence[Rule], version: Optional[int] = None):
+        self.rules = list(rules)
+        self.version = version
+        self.codes = [rule.code for rule in self.rules]
+        self.fields = sorted({f for rule in self.rules for f in rule.fields})
+        self._reason_fields = sorted({f for rule in self.rules for f in rule.reason_fields})
+
+    @staticmethod
+    def _result(fired: Sequence[Rule], reasons: Sequence[str], rule_score: float) -> Dict[str, Any]:
+        business_reasons: List[str] = []
+        rule_triggers: List[str] = []
+        rule_details: List[Dict[str, Any]] = []
+        for rule, reason in zip(fired, reasons):
+            if rule.layer == BUSINESS_LAYER:
+                business_reasons.append(reason)
+            else:
+                rule_triggers.append(rule.code)
+                rule_details.append({"rule": rule.code, "reason": reason, "severity": rule.severity})
+        engine_reasons = [d["reason"] for d in rule_details if d["reason"]]
+        return {
+            "rule_triggers": rule_triggers,
+            "rule_details": rule_details,
+            "rule_reasons": business_reasons + engine_reasons,
+            "rule_score": rule_score,
+            "fired_rules": [rule.code for rule in fired],
+        }
+
+    def evaluate_row(self, row: Dict[str, Any], timings: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Rule results for one row of fields (see row_inputs)."""
+        if timings is None:
+            fired = [rule for rule in self.rules if rule.matches(row)]
+        else:
+            fired = []
+            for i, rule in enumerate(self.rules):
+                start = time.perf_counter()
+                hit = rule.matches(row)
+                timings[i] += time.perf_counter() - start
+                if hit:
+                    fired.append(rule)
+        business_score = engine_score = 0.0
+        for rule in fired:
+            if rule.layer == BUSINESS_LAYER:
+                business_score += rule.weight
+            else:
+                engine_score += rule.weight
+        rule_score = max(min(business_score, 1.0), min(engine_score, 1.0))
+        return self._result(fired, [rule.reason_for(row) for rule in fired], rule_score)
+
+    def masks(self, columns: Dict[str, np.ndarray], n: int, timings: Optional[List[float]] = None) -> np.ndarray:
+        """(rules x rows) boolean matrix of which rule fired on which row."""
+        if not self.rules:
+            return np.zeros((0, n), dtype=bool)
+        if timings is None:
+            return np.vstack([np.broadcast_to(rule.mask(columns), (n,)) for rule in self.rules])
+        rows = []
+        for i, rule in enumerate(self.rules):
+            start = time.perf_counter()
+            rows.append(np.broadcast_to(rule.mask(columns), (n,)))
+            timings[i] += time.perf_counter() - start
+        return np.vstack(rows)
+
+    def rule_scores(self, fired: np.ndarray) -> np.ndarray:
+        """rule_score of every row from the masks() matrix."""
+        n = fired.shape[1]
+        business_score, engine_score = np.zeros(n), np.zeros(n)
+        for rule, mask in zip(self.rules, fired):
+            score = business_score if rule.layer == BUSINESS_LAYER else engine_score
+            score += np.where(mask, rule.weight, 0.0)
+        return np.maximum(np.minimum(business_score, 1.0), np.minimum(engine_score, 1.0))
+
+    def evaluate_batch(self, columns: Dict[str, np.ndarray],
+                       timings: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Rule results for every row of a batch of field columns (see batch_inputs)."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        fired = self.masks(columns, n, timings)
+        rule_scores = self.rule_scores(fired).tolist()
+
+        # Python scalars, as the single-row path formats them
+        values = {f: columns[f].tolist() for f in self._reason_fields}
+        results = []
+        for i, hits in enumerate(fired.T.tolist()):
+            rules = [rule for rule, hit in zip(self.rules, hits) if hit]
+            reasons = [
+                rule.reason.format_map({f: values[f][i] for f in rule.reason_fields}) if rule.reason_fields
+                else rule.reason
+                for rule in rules
+            ]
+            results.append(self._result(rules, reasons, rule_scores[i]))
+        return results
+
+
+def compile_rules(definitions: Sequence[Dict[str, Any]], version: Optional[int] = None) -> RuleSet:
+    """Validate rule definitions and build a RuleSet; raises ValueError on a bad rule."""
+    rules = [Rule(spec) for spec in definitions]
+    codes = [rule.code for rule in rules]
+    duplicates = sorted({c for c in codes if codes.count(c) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate rule codes: {duplicates}")
+    return RuleSet(rules, version)
+
+
+# -------------------------------------------
+# INPUTS
+# -------------------------------------------
+def row_inputs(raw_input: Dict, engineered_features: Dict, customer_profile: Optional[Dict] = None,
+               velocity: Optional[Dict] = None) -> Dict[str, Any]:
+    """Rule fields for one transaction."""
+    row = dict(engineered_features)
+    for field in RAW_FIELDS:
+        if field in raw_input:
+            row[field] = raw_input[field]
+    row["channel"] = str(raw_input.get("channel") or "").lower()
+    avg = customer_profile.get("avg_txn_amount") if customer_profile else None
+    row[PRIOR_AVG_FIELD] = float(avg) if avg is not None else math.nan
+    row[PRIOR_COUNT_FIELD] = int(customer_profile.get("txn_count", 0)) if customer_profile else 0
+    row.update(velocity or zero_velocity())
+    return row
+
+
+def batch_inputs(raw: pd.DataFrame, engineered: pd.DataFrame, customer_profiles: Sequence[Optional[Dict]],
+                 fields: Sequence[str], velocities: Optional[Sequence[Optional[Dict]]] = None) -> Dict[str, np.ndarray]:
+    """Rule field columns for a batch: `raw` has one row per transaction, `engineered` its features."""
+    columns: Dict[str, np.ndarray] = {}
+    for field in fields:
+        if field == "channel":
+            columns[field] = raw["channel"].fillna("").astype(str).str.lower().to_numpy(dtype=object)
+        elif field == PRIOR_AVG_FIELD:
+            columns[field] = np.array(
+                [p["avg_txn_amount"] if p and p.get("avg_txn_amount") is not None else math.nan
+                 for p in customer_profiles], dtype=np.float64)
+        elif field == PRIOR_COUNT_FIELD:
+            columns[field] = np.array([int(p.get("txn_count", 0)) if p else 0 for p in customer_profiles],
+                                      dtype=np.int64)
+        elif field in VELOCITY_FIELDS:
+            dtype = np.int64 if field in VELOCITY_COUNT_FIELDS else np.float64
+            if velocities is None:
+                columns[field] = np.zeros(len(raw), dtype=dtype)
+            else:
+                columns[field] = np.array([v.get(field, 0) if v else 0 for v in velocities], dtype=dtype)
+        elif field in RAW_FIELDS and field in raw.columns:
+            columns[field] = raw[field].to_numpy()
+        else:
+            columns[field] = engineered[field].to_numpy()
+    return columns
+
+
+def empty_result() -> Dict[str, Any]:
+    return {"rule_triggers": [], "rule_details": [], "rule_reasons": [], "rule_score": 0.0, "fired_rules": []}
+
+
+# -------------------------------------------
+# ACTIVE RULE SET
+# -------------------------------------------
+# version 0 = the built-in DEFAULT_RULES; rule_store.py swaps in the
+# versioned rule set stored in MongoDB
+_rule_set = compile_rules(DEFAULT_RULES, version=0)
+
+
+def get_rule_set() -> RuleSet:
+    return _rule_set
+
+
+def set_rule_set(rule_set: RuleSet):
+    """Swap the active rule set; callers already holding the old one finish with it."""
+    global _rule_set
+    _rule_set = rule_set
+
 
-def evaluate_rules(raw_input: Dict, engineered_features: Dict, customer_profile: Dict = None) -> Tuple[List[str], List[Dict]]:
+def evaluate_rules(raw_input: Dict, engineered_features: Dict, customer_profile: Dict = None,
+                   velocity: Dict = None) -> Tuple[List[str], List[Dict]]:
     """
-    Evaluate business rules and return:
+    Evaluate the rule engine rules for one transaction and return:
       - list of triggered rule keys (strings)
       - list of structured triggers with reason and severity
+    `velocity` is the customer's velocity from velocity.py, if known.
     """
-    triggers = []
-    triggered_details = []
-
-    amount = raw_input.get("transaction_amount", engineered_features.get("transaction_amount"))
-    hour = engineered_features.get("hour")
-    channel = (raw_input.get("channel") or "").lower()
-    kyc = raw_input.get("kyc_verified")
-    account_age = raw_input.get("account_age_days", 0)
-
-    # Placeholder: if you have historical avg per customer, pass via customer_profile
-    avg_txn_customer = None
-    if customer_profile and "avg_txn_amount" in customer_profile:
-        avg_txn_customer = customer_profile["avg_txn_amount"]
-
-    # Rule 1: Very large transaction vs average (if avg known)
-    if avg_txn_customer and avg_txn_customer > 0:
-        if amount > avg_txn_customer * AVG_TXN_MULTIPLIER_THRESHOLD:
-            triggers.append("HIGH_AMOUNT_VS_AVG")
-            triggered_details.append({
-                "rule": "HIGH_AMOUNT_VS_AVG",
-                "reason": f"Transaction amount {amount} is > {AVG_TXN_MULTIPLIER_THRESHOLD}x customer's avg {avg_txn_customer}",
-                "severity": HIGH_RISK_RULE_SEVERITY
-            })
-
-    # Rule 2: channel international + KYC not verified
-    if channel in ("international", "intl", "wire") and (kyc == 0 or kyc == "No" or kyc is False):
-        triggers.append("INTERNATIONAL_NO_KYC")
-        triggered_details.append({
-            "rule": "INTERNATIONAL_NO_KYC",
-            "reason": "International channel with KYC not verified",
-            "severity": HIGH_RISK_RULE_SEVERITY
-        })
-
-    # Rule 3: odd hour transaction (2AM-4AM)
-    if isinstance(hour, int) and (ODD_HOUR_START <= hour <= ODD_HOUR_END):
-        triggers.append("ODD_HOUR_TXN")
-        triggered_details.append({
-            "rule": "ODD_HOUR_TXN",
-            "reason": f"Transaction at odd hour: {hour}:00",
-            "severity": MEDIUM_RISK_RULE_SEVERITY
-        })
-
-    # Rule 4: very new account making transaction
-    if account_age is not None and account_age < 7 and amount > 1000:
-        triggers.append("NEW_ACCOUNT_HIGH_AMOUNT")
-        triggered_details.append({
-            "rule": "NEW_ACCOUNT_HIGH_AMOUNT",
-            "reason": f"Account age {account_age} days and amount {amount} is high for new account",
-            "severity": MEDIUM_RISK_RULE_SEVERITY
-        })
-
-    # Rule 5: high amount absolute threshold
-    if amount is not None and amount > 200000:  # absolute extreme
-        triggers.append("ABSOLUTE_HIGH_AMOUNT")
-        triggered_details.append({
-            "rule": "ABSOLUTE_HIGH_AMOUNT",
-            "reason": f"Transaction amount {amount} exceeds absolute threshold",
-            "severity": HIGH_RISK_RULE_SEVERITY
-        })
-
-    # You can append more rules here.
-    return triggers, triggered_details
+    result = get_rule_set().evaluate_row(row_inputs(raw_input, engineered_features, customer_profile, velocity))
+    return result["rule_triggers"], result["rule_details"]
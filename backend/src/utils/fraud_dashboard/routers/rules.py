@@ -0,0 +1,202 @@
+# src/utils/fraud_dashboard/routers/rules.py
+#
+# CRUD for the versioned fraud rules (rule_store.py). Every change bumps the
+# rule set version; running workers pick it up within RULES_POLL_INTERVAL_S.
+# Rules use the rule_engine definition format, e.g.
+#
+#   {"code": "LARGE_WIRE", "layer": "engine", "severity": "high",
+#    "conditions": [{"field": "channel", "op": "in", "threshold": ["wire"]},
+#                   {"field": "transaction_amount", "op": ">", "threshold": 50000}],
+#    "reason": "Wire transfer of {transaction_amount}"}
+
+import os
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, HTTPException, Header
+from pydantic import BaseModel
+
+from src.utils.fraud_dashboard import backtest
+from src.utils.fraud_dashboard.routers import rule_engine
+from src.utils.fraud_dashboard.rule_store import get_rule_store, RuleExists, RuleNotFound
+from src.utils.fraud_dashboard.rule_stats import get_rule_stats
+
+router = APIRouter(prefix="/rules", tags=["Rules"])
+
+# Optional shared secret for changing rules
+RULES_ADMIN_TOKEN = os.getenv("RULES_ADMIN_TOKEN", os.getenv("MODEL_ADMIN_TOKEN"))
+
+
+class RuleCondition(BaseModel):
+    field: str
+    op: str
+    threshold: Any
+
+
+class RuleDefinition(BaseModel):
+    code: str
+    layer: str = rule_engine.ENGINE_LAYER
+    conditions: List[RuleCondition]
+    severity: str = rule_engine.LOW_RISK_RULE_SEVERITY
+    weight: Optional[float] = None  # defaults to the severity's weight
+    reason: str = ""
+    enabled: bool = True
+    order: Optional[int] = None  # evaluation / reason order; defaults to last
+
+
+class BacktestRequest(BaseModel):
+    dataset: str = "raw"  # a backtest.DATASETS name
+    rules: Optional[List[RuleDefinition]] = None  # candidate rules; default: the stored ones
+
+
+def _check_token(token: Optional[str]):
+    if RULES_ADMIN_TOKEN and token != RULES_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+def _spec(rule: RuleDefinition) -> dict:
+    spec = rule.dict()
+    spec["conditions"] = [c.dict() for c in rule.conditions]
+    return spec
+
+
+@router.get("/")
+def list_rules():
+    """All stored rules (enabled or not) and the version serving in this worker."""
+    store = get_rule_store()
+    try:
+        rules = store.list_rules()
+        version = store.stored_version()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rules unavailable: {e}")
+    return {"version": version, "active_version": rule_engine.get_rule_set().version, "rules": rules}
+
+
+@router.get("/active")
+def get_active_rules():
+    """The compiled rule set this worker is evaluating."""
+    return get_rule_store().stats()
+
+
+@router.get("/versions")
+def get_rule_versions(limit: int = 50):
+    """Change history, newest version first."""
+    try:
+        return {"versions": get_rule_store().history(limit)}
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rules unavailable: {e}")
+
+
+@router.post("/validate")
+def validate_rule(rule: RuleDefinition):
+    """Check a rule definition without saving it."""
+    try:
+        rule_engine.compile_rules([_spec(rule)])
+    except ValueError as e:
+        return {"is_valid": False, "errors": [str(e)]}
+    return {"is_valid": True, "errors": []}
+
+
+@router.get("/stats")
+def get_rule_stats_report():
+    """
+    Per-rule evaluations, hits, hits ending in a fraud verdict, agreement
+    with the ML model and evaluation cost, summed over all workers. Active
+    rules come first, most hits first; rules with no hits are dead weight.
+    """
+    stats = get_rule_stats()
+    if stats is None:
+        return {"enabled": False}
+    active = rule_engine.get_rule_set()
+    try:
+        rules = stats.report(active.codes)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rule stats unavailable: {e}")
+    return {"enabled": True, "rule_set_version": active.version, "flushes": stats.flushes,
+            "last_error": stats.last_error, "rules": rules}
+
+
+@router.delete("/stats")
+def reset_rule_stats(x_admin_token: Optional[str] = Header(None)):
+    """Start counting from zero (e.g. after retuning the rules)."""
+    _check_token(x_admin_token)
+    stats = get_rule_stats()
+    if stats is None:
+        return {"enabled": False}
+    try:
+        stats.reset()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not reset rule stats: {e}")
+    return {"enabled": True, "reset": True}
+
+
+@router.post("/backtest")
+def backtest_rules(request: BacktestRequest):
+    """
+    Replay a labelled dataset through candidate rules (or the stored ones)
+    and report hits, precision, recall and overlap per rule.
+    """
+    if request.dataset not in backtest.DATASETS:
+        raise HTTPException(status_code=400, detail=f"Unknown dataset (expected one of {list(backtest.DATASETS)}).")
+    if request.rules is not None:
+        definitions = [_spec(rule) for rule in request.rules if rule.enabled]
+        version = None
+    else:
+        try:
+            version, definitions = get_rule_store().load_version()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Rules unavailable: {e}")
+    try:
+        report = backtest.run(request.dataset, definitions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    report["rule_set_version"] = version
+    return report
+
+
+@router.get("/{code}")
+def get_rule(code: str):
+    try:
+        return get_rule_store().get_rule(code)
+    except RuleNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown rule '{code}'.")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rules unavailable: {e}")
+
+
+@router.post("/")
+def create_rule(rule: RuleDefinition, x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    try:
+        return get_rule_store().create_rule(_spec(rule))
+    except RuleExists:
+        raise HTTPException(status_code=409, detail=f"Rule '{rule.code}' already exists.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not save rule: {e}")
+
+
+@router.put("/{code}")
+def update_rule(code: str, rule: RuleDefinition, x_admin_token: Optional[str] = Header(None)):
+    """Replace a rule's definition (the code in the path wins)."""
+    _check_token(x_admin_token)
+    try:
+        return get_rule_store().update_rule(code, _spec(rule))
+    except RuleNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown rule '{code}'.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not save rule: {e}")
+
+
+@router.delete("/{code}")
+def delete_rule(code: str, x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    try:
+        version = get_rule_store().delete_rule(code)
+    except RuleNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown rule '{code}'.")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not delete rule: {e}")
+    return {"deleted": code, "version": version}
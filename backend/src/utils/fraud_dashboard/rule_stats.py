@@ -0,0 +1,234 @@
+# src/utils/fraud_dashboard/rule_stats.py
+#
+# Per-rule counters for spotting dead, noisy or expensive rules:
+#
+#   evaluations       rows the rule was evaluated on
+#   hits              rows it fired on
+#   fraud_hits        hits whose final verdict was fraud
+#   ml_fraud_hits     hits the model alone also scored as fraud (> 0.5)
+#   ml_score_sum      sum of the model score over hits (for the mean)
+#   row_timed / row_seconds      sampled single-row evaluations and their time
+#   batch_rows / batch_seconds   rows evaluated by /predict_batch and their time
+#
+# Counts are added in process without I/O and flushed every
+# RULE_STATS_FLUSH_INTERVAL_S as one $inc upsert per rule into the rule_stats
+# collection (_id = rule code), so every worker adds to the same totals. If
+# a flush fails the counts are kept for the next one. One /predict in
+# RULE_STATS_TIMING_EVERY times each rule; /predict_batch times each rule's
+# mask on every call.
+
+import sys
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo import UpdateOne
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.database import get_collection
+
+RULE_STATS_ENABLED = os.getenv("RULE_STATS_ENABLED", "1") == "1"
+RULE_STATS_COLLECTION = "rule_stats"
+RULE_STATS_FLUSH_INTERVAL_S = float(os.getenv("RULE_STATS_FLUSH_INTERVAL_S", 10))
+RULE_STATS_TIMING_EVERY = int(os.getenv("RULE_STATS_TIMING_EVERY", 32))
+
+COUNTERS = (
+    "evaluations", "hits", "fraud_hits", "ml_fraud_hits", "ml_score_sum",
+    "row_timed", "row_seconds", "batch_rows", "batch_seconds",
+)
+EVALUATIONS, HITS, FRAUD_HITS, ML_FRAUD_HITS, ML_SCORE_SUM = range(5)
+ROW_TIMED, ROW_SECONDS, BATCH_ROWS, BATCH_SECONDS = range(5, 9)
+
+
+def summarize(code: str, counts: Dict[str, float], last_hit_at: Optional[datetime] = None,
+              active: bool = False) -> Dict[str, Any]:
+    """Counters of one rule plus the rates derived from them."""
+    hits, evaluations = counts.get("hits", 0), counts.get("evaluations", 0)
+    row_timed, batch_rows = counts.get("row_timed", 0), counts.get("batch_rows", 0)
+    return {
+        "code": code,
+        "active": active,
+        "evaluations": int(evaluations),
+        "hits": int(hits),
+        "fraud_hits": int(counts.get("fraud_hits", 0)),
+        "ml_fraud_hits": int(counts.get("ml_fraud_hits", 0)),
+        "hit_rate": hits / evaluations if evaluations else 0.0,
+        # share of hits that ended as a fraud verdict / that the model agreed with
+        "fraud_rate_on_hits": counts.get("fraud_hits", 0) / hits if hits else None,
+        "ml_agreement": counts.get("ml_fraud_hits", 0) / hits if hits else None,
+        "avg_ml_score_on_hits": counts.get("ml_score_sum", 0.0) / hits if hits else None,
+        "avg_row_eval_us": counts.get("row_seconds", 0.0) * 1e6 / row_timed if row_timed else None,
+        "avg_batch_eval_us_per_row": counts.get("batch_seconds", 0.0) * 1e6 / batch_rows if batch_rows else None,
+        "last_hit_at": last_hit_at,
+    }
+
+
+class RuleStats:
+
+    def __init__(self, flush_interval_s: float = RULE_STATS_FLUSH_INTERVAL_S,
+                 timing_every: int = RULE_STATS_TIMING_EVERY):
+        self.flush_interval_s = flush_interval_s
+        self.timing_every = max(int(timing_every), 1)
+        self._pending: Dict[str, List[float]] = {}
+        self._last_hit: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.flushes = 0
+        self.last_error: Optional[str] = None
+
+    def _counters(self, code: str) -> List[float]:
+        counters = self._pending.get(code)
+        if counters is None:
+            counters = self._pending[code] = [0] * len(COUNTERS)
+        return counters
+
+    # ---------- recording (request path) ----------
+    def should_time(self) -> bool:
+        """True for one single-row evaluation in timing_every."""
+        self._calls += 1  # unlocked: an occasional lost increment only shifts the sample
+        return self._calls % self.timing_every == 0
+
+    def record_evaluations(self, codes: Sequence[str], rows: int = 1,
+                           timings: Optional[Sequence[float]] = None, batch: bool = False):
+        """The rules `codes` were evaluated on `rows` rows, taking `timings` seconds each if timed."""
+        count_i, seconds_i = (BATCH_ROWS, BATCH_SECONDS) if batch else (ROW_TIMED, ROW_SECONDS)
+        with self._lock:
+            for i, code in enumerate(codes):
+                counters = self._counters(code)
+                counters[EVALUATIONS] += rows
+                if timings is not None:
+                    counters[count_i] += rows
+                    counters[seconds_i] += timings[i]
+
+    def record_hits(self, fired: Sequence[Sequence[str]], final_fraud: Sequence[bool], ml_scores: Sequence[float]):
+        """Per row: the codes of the rules that fired, the final verdict and the ML score."""
+        now = datetime.now()
+        with self._lock:
+            for hits, is_fraud, ml_score in zip(fired, final_fraud, ml_scores):
+                for code in hits:
+                    counters = self._counters(code)
+                    counters[HITS] += 1
+                    counters[ML_SCORE_SUM] += ml_score
+                    if is_fraud:
+                        counters[FRAUD_HITS] += 1
+                    if ml_score > 0.5:
+                        counters[ML_FRAUD_HITS] += 1
+                    self._last_hit[code] = now
+
+    # ---------- flushing ----------
+    def _take(self):
+        with self._lock:
+            pending, last_hit = self._pending, self._last_hit
+            self._pending, self._last_hit = {}, {}
+        return pending, last_hit
+
+    def _restore(self, pending: Dict[str, List[float]], last_hit: Dict[str, datetime]):
+        with self._lock:
+            for code, counters in pending.items():
+                current = self._counters(code)
+                for i, value in enumerate(counters):
+                    current[i] += value
+            for code, at in last_hit.items():
+                if code not in self._last_hit or self._last_hit[code] < at:
+                    self._last_hit[code] = at
+
+    def flush(self) -> int:
+        """Add the pending counts to MongoDB; returns the number of rules written."""
+        pending, last_hit = self._take()
+        if not pending:
+            return 0
+        now = datetime.now()
+        ops = []
+        for code, counters in pending.items():
+            increments = {name: counters[i] for i, name in enumerate(COUNTERS) if counters[i]}
+            if not increments:
+                continue
+            update: Dict[str, Any] = {
+                "$inc": increments,
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"since": now},
+            }
+            if code in last_hit:
+                update["$max"] = {"last_hit_at": last_hit[code]}
+            ops.append(UpdateOne({"_id": code}, update, upsert=True))
+        if not ops:
+            return 0
+        try:
+            get_collection(RULE_STATS_COLLECTION).bulk_write(ops, ordered=False)
+        except Exception as e:
+            if str(e) != self.last_error:
+                print(f"ERROR flushing rule stats, keeping them for the next flush. {e}")
+            self.last_error = str(e)
+            self._restore(pending, last_hit)
+            return 0
+        self.flushes += 1
+        self.last_error = None
+        return len(ops)
+
+    def start(self):
+        if self.flush_interval_s <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rule-stats-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_s):
+            self.flush()
+
+    # ---------- reading ----------
+    def report(self, active_codes: Sequence[str]) -> List[Dict[str, Any]]:
+        """Stored totals plus this worker's unflushed counts, for every rule seen or active."""
+        totals: Dict[str, Dict[str, float]] = {}
+        last_hit: Dict[str, Optional[datetime]] = {}
+        for doc in get_collection(RULE_STATS_COLLECTION).find():
+            totals[doc["_id"]] = {name: doc.get(name, 0) for name in COUNTERS}
+            last_hit[doc["_id"]] = doc.get("last_hit_at")
+        with self._lock:
+            for code, counters in self._pending.items():
+                current = totals.setdefault(code, {})
+                for name, value in zip(COUNTERS, counters):
+                    current[name] = current.get(name, 0) + value
+            for code, at in self._last_hit.items():
+                if last_hit.get(code) is None or last_hit[code] < at:
+                    last_hit[code] = at
+        active = set(active_codes)
+        for code in active:
+            totals.setdefault(code, {})
+        rules = [summarize(code, counts, last_hit.get(code), code in active) for code, counts in totals.items()]
+        return sorted(rules, key=lambda r: (not r["active"], -r["hits"], r["code"]))
+
+    def reset(self):
+        """Drop all stored and pending counts."""
+        self._take()
+        get_collection(RULE_STATS_COLLECTION).delete_many({})
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_stats: Optional[RuleStats] = None
+
+
+def get_rule_stats() -> Optional[RuleStats]:
+    """The process's rule counters, or None when RULE_STATS_ENABLED=0."""
+    global _stats
+    if _stats is None and RULE_STATS_ENABLED:
+        _stats = RuleStats()
+    return _stats
@@ -0,0 +1,268 @@
+# src/utils/fraud_dashboard/rule_store.py
+#
+# Versioned fraud rules in MongoDB, compiled once and cached in memory.
+#
+#   rules          one document per rule: the rule_engine definition plus
+#                  _id (= code), enabled, order, version, updated_at
+#   rules_meta     {"_id": "active", "version": N}; bumped by every change
+#   rules_history  one entry per version: action, code and the rule after it
+#
+# Every worker keeps the compiled RuleSet of version N in rule_engine and
+# polls rules_meta (a single _id lookup) every RULES_POLL_INTERVAL_S. Only
+# when N changes does it read the rules, compile them and swap the
+# reference, so predictions never read MongoDB for rules. The worker that
+# makes a change reloads immediately. A rule set that fails to compile is
+# never swapped in; the previous one keeps serving.
+#
+# On first use an empty rules collection is seeded with
+# rule_engine.DEFAULT_RULES as version 1. Without MongoDB the built-in
+# defaults serve as version 0.
+
+import sys
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.database import get_collection
+from src.utils.fraud_dashboard.routers import rule_engine
+
+RULES_COLLECTION = "rules"
+META_COLLECTION = "rules_meta"
+HISTORY_COLLECTION = "rules_history"
+META_ID = "active"
+RULES_POLL_INTERVAL_S = float(os.getenv("RULES_POLL_INTERVAL_S", 5))
+
+# stored alongside the definition, not part of it
+_STORAGE_FIELDS = ("_id", "enabled", "order", "version", "created_at", "updated_at")
+
+
+class RuleNotFound(KeyError):
+    pass
+
+
+class RuleExists(ValueError):
+    pass
+
+
+def definition(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """The rule_engine definition of a stored rule document."""
+    return {k: v for k, v in doc.items() if k not in _STORAGE_FIELDS}
+
+
+def public(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """A stored rule as returned by the API."""
+    return {k: v for k, v in doc.items() if k != "_id"}
+
+
+class RuleStore:
+
+    def __init__(self, poll_interval_s: float = RULES_POLL_INTERVAL_S):
+        self.poll_interval_s = poll_interval_s
+        self._lock = threading.Lock()  # serializes reloads in this process
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.loaded_at: Optional[datetime] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    # ---------- collections ----------
+    @staticmethod
+    def _rules():
+        return get_collection(RULES_COLLECTION)
+
+    @staticmethod
+    def _meta():
+        return get_collection(META_COLLECTION)
+
+    def stored_version(self) -> int:
+        doc = self._meta().find_one({"_id": META_ID}, {"version": 1})
+        return int(doc["version"]) if doc else 0
+
+    def _seed(self):
+        """Store DEFAULT_RULES as version 1 if there are no rules yet (safe to race)."""
+        if self._meta().find_one({"_id": META_ID}) is not None:
+            return
+        now = datetime.now()
+        for order, spec in enumerate(rule_engine.DEFAULT_RULES):
+            doc = dict(spec, _id=spec["code"], enabled=True, order=(order + 1) * 10,
+                       version=1, created_at=now, updated_at=now)
+            try:
+                self._rules().insert_one(doc)
+            except DuplicateKeyError:
+                pass
+        try:
+            self._meta().insert_one({"_id": META_ID, "version": 1, "updated_at": now})
+            get_collection(HISTORY_COLLECTION).insert_one(
+                {"version": 1, "action": "seed", "code": None, "rule": None, "at": now}
+            )
+            print("Seeded the rules collection with the default rules (version 1).")
+        except DuplicateKeyError:
+            pass
+
+    # ---------- loading ----------
+    def load_version(self):
+        """(version, enabled definitions) read consistently: retried if a change lands mid-read."""
+        for _ in range(3):
+            version = self.stored_version()
+            docs = list(self._rules().find({"enabled": True}).sort("order", 1))
+            if self.stored_version() == version:
+                return version, [definition(d) for d in docs]
+        return version, [definition(d) for d in docs]
+
+    def refresh(self, force: bool = False) -> bool:
+        """Swap in the stored rule set if its version changed. True if a new set was loaded."""
+        with self._lock:
+            try:
+                current = rule_engine.get_rule_set().version
+                if not force and self.loaded_at is not None and self.stored_version() == current:
+                    return False
+                self._seed()
+                version, definitions = self.load_version()
+                compiled = rule_engine.compile_rules(definitions, version=version)
+            except Exception as e:
+                if str(e) != self.last_error:
+                    print(f"ERROR loading rules, keeping version {rule_engine.get_rule_set().version}. {e}")
+                self.last_error = str(e)
+                return False
+            rule_engine.set_rule_set(compiled)
+            self.loaded_at = datetime.now()
+            self.reloads += 1
+            self.last_error = None
+        print(f"Rule set version {version} loaded ({len(compiled.rules)} rules).")
+        return True
+
+    def start(self):
+        """Load the stored rules now and poll for new versions in the background."""
+        self.refresh()
+        if self.poll_interval_s <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="rule-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval_s):
+            self.refresh()
+
+    # ---------- changes ----------
+    def _check(self, replaced_code: Optional[str] = None, new_doc: Optional[Dict[str, Any]] = None):
+        """Compile the rule set as it would be after a change; raises ValueError if invalid."""
+        docs = [d for d in self._rules().find({"enabled": True}) if d["_id"] != replaced_code]
+        if new_doc is not None and new_doc.get("enabled", True):
+            docs.append(new_doc)
+        docs.sort(key=lambda d: d.get("order", 0))
+        rule_engine.compile_rules([definition(d) for d in docs])
+
+    def _bump(self, action: str, code: str, rule: Optional[Dict[str, Any]]) -> int:
+        now = datetime.now()
+        meta = self._meta().find_one_and_update(
+            {"_id": META_ID},
+            {"$inc": {"version": 1}, "$set": {"updated_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        version = int(meta["version"])
+        get_collection(HISTORY_COLLECTION).insert_one(
+            {"version": version, "action": action, "code": code, "rule": rule, "at": now}
+        )
+        if rule is not None:
+            self._rules().update_one({"_id": code}, {"$set": {"version": version}})
+        return version
+
+    def list_rules(self) -> List[Dict[str, Any]]:
+        self._seed()
+        return [public(d) for d in self._rules().find().sort("order", 1)]
+
+    def get_rule(self, code: str) -> Dict[str, Any]:
+        doc = self._rules().find_one({"_id": code})
+        if doc is None:
+            raise RuleNotFound(code)
+        return public(doc)
+
+    def create_rule(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        self._seed()
+        code = spec.get("code")
+        rule_engine.compile_rules([definition(spec)])
+        if self._rules().find_one({"_id": code}, {"_id": 1}) is not None:
+            raise RuleExists(code)
+        now = datetime.now()
+        last = self._rules().find_one(sort=[("order", -1)])
+        doc = dict(spec, _id=code, enabled=spec.get("enabled", True),
+                   order=spec.get("order") if spec.get("order") is not None else (last or {}).get("order", 0) + 10,
+                   created_at=now, updated_at=now)
+        self._check(new_doc=doc)
+        try:
+            self._rules().insert_one(doc)
+        except DuplicateKeyError:
+            raise RuleExists(code)
+        doc["version"] = self._bump("create", code, public(doc))
+        self.refresh()
+        return public(doc)
+
+    def update_rule(self, code: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        existing = self._rules().find_one({"_id": code})
+        if existing is None:
+            raise RuleNotFound(code)
+        spec = dict(spec, code=code)
+        rule_engine.compile_rules([definition(spec)])
+        doc = dict(spec, _id=code, enabled=spec.get("enabled", True),
+                   order=spec.get("order") if spec.get("order") is not None else existing.get("order", 0),
+                   created_at=existing.get("created_at"), updated_at=datetime.now())
+        self._check(replaced_code=code, new_doc=doc)
+        self._rules().replace_one({"_id": code}, doc)
+        doc["version"] = self._bump("update", code, public(doc))
+        self.refresh()
+        return public(doc)
+
+    def delete_rule(self, code: str) -> int:
+        if self._rules().delete_one({"_id": code}).deleted_count == 0:
+            raise RuleNotFound(code)
+        version = self._bump("delete", code, None)
+        self.refresh()
+        return version
+
+    def history(self, limit: int = 50) -> List[Dict[str, Any]]:
+        cursor = get_collection(HISTORY_COLLECTION).find({}, {"_id": 0}).sort("version", -1).limit(limit)
+        return list(cursor)
+
+    def stats(self) -> Dict[str, Any]:
+        active = rule_engine.get_rule_set()
+        return {
+            "version": active.version,
+            "rules": [rule.code for rule in active.rules],
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "polling": self._thread is not None and self._thread.is_alive(),
+            "poll_interval_s": self.poll_interval_s,
+            "last_error": self.last_error,
+        }
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_store: Optional[RuleStore] = None
+
+
+def get_rule_store() -> RuleStore:
+    global _store
+    if _store is None:
+        _store = RuleStore()
+    return _store
@@ -0,0 +1,217 @@
+# src/utils/fraud_dashboard/scoring_pool.py
+#
+# Process pool for CPU-bound model scoring. Request threads keep doing the
+# request work, but the forest traversal runs in worker processes so it is
+# not serialized on the API process's GIL. Each worker opens the registry
+# version with mmap_mode="r" (model_registry.LoadedModel), so all workers
+# share one copy of the model through the page cache. Feature matrices go
+# in as float32 arrays (the trees compare in float32 anyway) and fraud
+# probabilities come back as one float64 array per call.
+#
+# In-flight work is bounded to `workers * queue_depth` matrices; when the
+# pool is saturated (or broken) the caller scores in-process instead of
+# queueing without limit.
+
+import sys
+import os
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+SCORING_MODE = os.getenv("SCORING_MODE", "inline").lower()  # "inline" or "process"
+SCORING_POOL_WORKERS = int(os.getenv("SCORING_POOL_WORKERS", os.cpu_count() or 2))
+SCORING_POOL_QUEUE_DEPTH = int(os.getenv("SCORING_POOL_QUEUE_DEPTH", 4))
+SCORING_POOL_SUBMIT_TIMEOUT_S = float(os.getenv("SCORING_POOL_SUBMIT_TIMEOUT_S", 0.05))
+SCORING_POOL_RESULT_TIMEOUT_S = float(os.getenv("SCORING_POOL_RESULT_TIMEOUT_S", 5))
+# larger matrices (/predict_batch) are split so every worker gets a share
+SCORING_POOL_CHUNK_ROWS = int(os.getenv("SCORING_POOL_CHUNK_ROWS", 4096))
+# forkserver/spawn keep the API process's threads (write-behind, WAL,
+# watchers) out of the children; the model is shared through mmap either way
+SCORING_POOL_START_METHOD = os.getenv(
+    "SCORING_POOL_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+# -------------------------------------------
+# WORKER PROCESS SIDE
+# -------------------------------------------
+_worker_models: Dict[str, object] = {}
+_worker_compiled_max_rows = 256
+
+
+def _worker_model(version: str, directory: str, compile_model: bool):
+    model = _worker_models.get(version)
+    if model is None:
+        from src.utils.fraud_dashboard.model_registry import LoadedModel, METADATA_FILE
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        model = LoadedModel(version, directory, metadata, compile_model)
+        # keep the previous version around for requests still using it
+        while len(_worker_models) >= 2:
+            _worker_models.pop(next(iter(_worker_models)))
+        _worker_models[version] = model
+    return model
+
+
+def _init_worker(version: Optional[str], directory: Optional[str], compile_model: bool, compiled_max_rows: int):
+    global _worker_compiled_max_rows
+    _worker_compiled_max_rows = compiled_max_rows
+    if version is not None:
+        _worker_model(version, directory, compile_model)
+
+
+def _score_in_worker(version: str, directory: str, compile_model: bool, X: np.ndarray) -> np.ndarray:
+    model = _worker_model(version, directory, compile_model)
+    return model.predict_fraud_proba(X, _worker_compiled_max_rows)
+
+
+# -------------------------------------------
+# API PROCESS SIDE
+# -------------------------------------------
+class ScoringPool:
+
+    def __init__(self, workers: int = SCORING_POOL_WORKERS,
+                 queue_depth: int = SCORING_POOL_QUEUE_DEPTH,
+                 submit_timeout_s: float = SCORING_POOL_SUBMIT_TIMEOUT_S,
+                 result_timeout_s: float = SCORING_POOL_RESULT_TIMEOUT_S,
+                 start_method: str = SCORING_POOL_START_METHOD,
+                 chunk_rows: int = SCORING_POOL_CHUNK_ROWS,
+                 compiled_max_rows: int = 256):
+        self.workers = max(1, workers)
+        self.queue_depth = max(1, queue_depth)
+        self.submit_timeout_s = submit_timeout_s
+        self.result_timeout_s = result_timeout_s
+        self.start_method = start_method
+        self.chunk_rows = max(1, chunk_rows)
+        self.compiled_max_rows = compiled_max_rows
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers * self.queue_depth)
+
+        # metrics
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows = 0
+        self.inline_fallbacks = 0
+        self.errors = 0
+        self.total_roundtrip_s = 0.0
+
+    def start(self, current=None):
+        """Create the worker processes; `current` (a LoadedModel) is preloaded in each."""
+        with self._executor_lock:
+            if self._executor is not None:
+                return
+            version = current.version if current is not None else None
+            directory = current.directory if current is not None else None
+            compile_model = current.compiled is not None if current is not None else True
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(version, directory, compile_model, self.compiled_max_rows),
+            )
+            # spin every worker up now instead of on the first requests
+            for _ in range(self.workers):
+                self._executor.submit(int, 0)
+        print(f"Scoring pool started: {self.workers} worker processes ({self.start_method}).")
+
+    def stop(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def score(self, X: np.ndarray, current) -> np.ndarray:
+        """
+        Fraud probability per row of X with the LoadedModel `current`,
+        computed in worker processes while slots are free, else in-process.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        chunks = np.array_split(X, -(-len(X) // self.chunk_rows)) if len(X) > self.chunk_rows else [X]
+        start = time.perf_counter()
+        # submit every chunk first so the workers run them in parallel
+        pending = [(chunk, self._submit(chunk, current)) for chunk in chunks]
+        scores = [self._result(chunk, future, current) for chunk, future in pending]
+        with self._lock:
+            self.calls += 1
+            self.rows += len(X)
+            self.total_roundtrip_s += time.perf_counter() - start
+        return scores[0] if len(scores) == 1 else np.concatenate(scores)
+
+    def _submit(self, X: np.ndarray, current):
+        executor = self._executor
+        if executor is None or not self._slots.acquire(timeout=self.submit_timeout_s):
+            return None
+        try:
+            future = executor.submit(_score_in_worker, current.version, current.directory,
+                                     current.compiled is not None, X)
+        except Exception as e:
+            self._slots.release()
+            self._fail(e, executor, current)
+            return None
+        # the slot stays taken until the worker is done with the task, even
+        # when the caller stopped waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, X: np.ndarray, future, current) -> np.ndarray:
+        if future is not None:
+            try:
+                return future.result(timeout=self.result_timeout_s)
+            except Exception as e:
+                # scored in-process below: drop the task if no worker picked it up yet
+                future.cancel()
+                self._fail(e, self._executor, current)
+        with self._lock:
+            self.inline_fallbacks += 1
+        return current.predict_fraud_proba(X, self.compiled_max_rows)
+
+    def _fail(self, error: Exception, executor: Optional[ProcessPoolExecutor], current):
+        with self._lock:
+            self.errors += 1
+        print(f"ERROR in scoring pool, scoring in-process: {error}")
+        if executor is not None:
+            self._restart_if_broken(executor, current)
+
+    def _restart_if_broken(self, executor: ProcessPoolExecutor, current):
+        # a worker that died (e.g. OOM-killed) breaks the whole executor
+        if not getattr(executor, "_broken", False):
+            return
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.start(current)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "running": self.running,
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "chunk_rows": self.chunk_rows,
+                "start_method": self.start_method,
+                "calls": self.calls,
+                "rows": self.rows,
+                "inline_fallbacks": self.inline_fallbacks,
+                "errors": self.errors,
+                "avg_roundtrip_ms": self.total_roundtrip_s * 1000.0 / self.calls if self.calls else 0.0,
+            }
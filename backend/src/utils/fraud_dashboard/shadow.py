@@ -0,0 +1,296 @@
+# src/utils/fraud_dashboard/shadow.py
+#
+# Shadow scoring: a challenger model (any registry version, e.g. an XGBoost
+# model registered with src/utils/train_challenger.py) scores the same
+# engineered features as the serving model, on a background thread, so it
+# never adds latency to /predict. Requests only append to a bounded queue
+# and move on; when the queue is full the row is dropped from the
+# comparison, not waited for.
+#
+# Each scored row is stored in `shadow_scores` next to the champion's score
+# and decision for that prediction:
+#
+#   {prediction_id, champion_version, challenger_version,
+#    champion_score, challenger_score, rule_score,
+#    champion_fraud, challenger_fraud, champion_ms, challenger_ms, scored_at}
+#
+# challenger_fraud is the hybrid decision the challenger would have made with
+# the same rule score, so comparing it to champion_fraud gives the decision
+# flip rate of promoting it.
+
+import sys
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard import wal
+
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION", "")  # empty disables shadow scoring
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", 1.0))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", 2000))
+SHADOW_MAX_BATCH = int(os.getenv("SHADOW_MAX_BATCH", 256))
+SHADOW_COLLECTION = "shadow_scores"
+# same cut-off as build_verdict
+DECISION_THRESHOLD = 0.5
+LATENCY_WINDOW = 2048
+
+
+def _percentile(values, q: float) -> float:
+    return float(np.percentile(np.fromiter(values, dtype=np.float64), q)) if values else 0.0
+
+
+class ShadowScorer:
+
+    def __init__(self, registry, version: str, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 queue_size: int = SHADOW_QUEUE_SIZE, max_batch: int = SHADOW_MAX_BATCH,
+                 compiled_max_rows: int = 256):
+        self.registry = registry
+        self.version = version
+        self.sample_rate = sample_rate
+        self.max_batch = max(1, max_batch)
+        self.compiled_max_rows = compiled_max_rows
+        self.challenger = None
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # metrics
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._champion_ms = deque(maxlen=LATENCY_WINDOW)
+        self._challenger_ms = deque(maxlen=LATENCY_WINDOW)
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self.challenger is not None
+
+    # ---------- request side ----------
+    def submit(self, prediction_ids: List[Any], X: np.ndarray, champion_scores, rule_scores,
+               champion_version: str, champion_fraud, champion_ms: float) -> bool:
+        """
+        Queue rows of a FEATURE_ORDER matrix for the challenger. Never
+        blocks; returns False if the rows were sampled out or dropped.
+        `champion_ms` is the champion's scoring time per row.
+        """
+        if self._thread is None or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return False
+        item = {
+            "prediction_ids": list(prediction_ids),
+            "X": X,
+            "champion_scores": np.asarray(champion_scores, dtype=np.float64),
+            "rule_scores": np.asarray(rule_scores, dtype=np.float64),
+            "champion_fraud": np.asarray(champion_fraud, dtype=bool),
+            "champion_version": champion_version,
+            "champion_ms": champion_ms,
+        }
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(item["prediction_ids"])
+            return False
+        with self._lock:
+            self.submitted += len(item["prediction_ids"])
+        return True
+
+    # ---------- background side ----------
+    def _load_challenger(self) -> bool:
+        try:
+            self.challenger = self.registry.load(self.version)
+            print(f"Shadow scoring with challenger model {self.version}.")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"ERROR: could not load challenger model {self.version}, shadow scoring disabled. {e}")
+            return False
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        try:
+            items = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        rows = len(items[0]["prediction_ids"])
+        while rows < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item["prediction_ids"])
+        return items
+
+    def _run(self):
+        if not self._load_challenger():
+            self._thread = None
+            return
+        while not self._stop.is_set():
+            items = self._drain()
+            if not items:
+                continue
+            try:
+                self._score(items)
+            except Exception as e:
+                with self._lock:
+                    self.errors += sum(len(item["prediction_ids"]) for item in items)
+                    self.last_error = str(e)
+                print(f"ERROR in shadow scoring: {e}")
+
+    def _score(self, items: List[Dict[str, Any]]):
+        X = np.concatenate([item["X"] for item in items]) if len(items) > 1 else items[0]["X"]
+        start = time.perf_counter()
+        challenger_scores = self.challenger.predict_fraud_proba(X, self.compiled_max_rows)
+        challenger_ms = (time.perf_counter() - start) * 1000.0 / len(X)
+
+        scored_at = datetime.now()
+        docs = []
+        offset = 0
+        for item in items:
+            n = len(item["prediction_ids"])
+            scores = np.asarray(challenger_scores[offset:offset + n], dtype=np.float64)
+            offset += n
+            challenger_fraud = np.maximum(scores, item["rule_scores"]) >= DECISION_THRESHOLD
+            for i, prediction_id in enumerate(item["prediction_ids"]):
+                docs.append({
+                    "prediction_id": prediction_id,
+                    "champion_version": item["champion_version"],
+                    "challenger_version": self.challenger.version,
+                    "champion_score": float(item["champion_scores"][i]),
+                    "challenger_score": float(scores[i]),
+                    "rule_score": float(item["rule_scores"][i]),
+                    "champion_fraud": bool(item["champion_fraud"][i]),
+                    "challenger_fraud": bool(challenger_fraud[i]),
+                    "champion_ms": item["champion_ms"],
+                    "challenger_ms": challenger_ms,
+                    "scored_at": scored_at,
+                })
+        wal.insert_or_log(SHADOW_COLLECTION, docs)
+
+        with self._lock:
+            self.scored += len(docs)
+            for item in items:
+                self._champion_ms.append(item["champion_ms"])
+            self._challenger_ms.append(challenger_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            champion_ms = list(self._champion_ms)
+            challenger_ms = list(self._challenger_ms)
+            return {
+                "enabled": True,
+                "running": self.running,
+                "challenger_version": self.version,
+                "sample_rate": self.sample_rate,
+                "queued": self._queue.qsize(),
+                "submitted": self.submitted,
+                "scored": self.scored,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "champion_ms_per_row": {"avg": float(np.mean(champion_ms)) if champion_ms else 0.0,
+                                        "p99": _percentile(champion_ms, 99)},
+                "challenger_ms_per_row": {"avg": float(np.mean(challenger_ms)) if challenger_ms else 0.0,
+                                          "p99": _percentile(challenger_ms, 99)},
+            }
+
+
+# -------------------------------------------
+# COMPARISON
+# -------------------------------------------
+def compare(collection, challenger_version: Optional[str] = None, since: Optional[datetime] = None) -> List[Dict]:
+    """
+    Champion vs challenger over the stored shadow scores, one entry per
+    (champion_version, challenger_version) pair, aggregated in MongoDB.
+    """
+    match: Dict[str, Any] = {}
+    if challenger_version:
+        match["challenger_version"] = challenger_version
+    if since is not None:
+        match["scored_at"] = {"$gte": since}
+
+    def count_if(condition):
+        return {"$sum": {"$cond": [condition, 1, 0]}}
+
+    champion_model_fraud = {"$gte": ["$champion_score", DECISION_THRESHOLD]}
+    challenger_model_fraud = {"$gte": ["$challenger_score", DECISION_THRESHOLD]}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"champion": "$champion_version", "challenger": "$challenger_version"},
+            "n": {"$sum": 1},
+            "sum_x": {"$sum": "$champion_score"},
+            "sum_y": {"$sum": "$challenger_score"},
+            "sum_xx": {"$sum": {"$multiply": ["$champion_score", "$champion_score"]}},
+            "sum_yy": {"$sum": {"$multiply": ["$challenger_score", "$challenger_score"]}},
+            "sum_xy": {"$sum": {"$multiply": ["$champion_score", "$challenger_score"]}},
+            "sum_abs_diff": {"$sum": {"$abs": {"$subtract": ["$challenger_score", "$champion_score"]}}},
+            "model_agree": count_if({"$eq": [champion_model_fraud, challenger_model_fraud]}),
+            "to_fraud": count_if({"$and": [{"$eq": ["$champion_fraud", False]}, {"$eq": ["$challenger_fraud", True]}]}),
+            "to_legit": count_if({"$and": [{"$eq": ["$champion_fraud", True]}, {"$eq": ["$challenger_fraud", False]}]}),
+            "champion_ms": {"$avg": "$champion_ms"},
+            "challenger_ms": {"$avg": "$challenger_ms"},
+            "first": {"$min": "$scored_at"},
+            "last": {"$max": "$scored_at"},
+        }},
+    ]
+
+    comparisons = []
+    for g in collection.aggregate(pipeline):
+        n = g["n"]
+        cov = g["sum_xy"] / n - (g["sum_x"] / n) * (g["sum_y"] / n)
+        var_x = g["sum_xx"] / n - (g["sum_x"] / n) ** 2
+        var_y = g["sum_yy"] / n - (g["sum_y"] / n) ** 2
+        correlation = cov / (var_x * var_y) ** 0.5 if var_x > 0 and var_y > 0 else None
+        comparisons.append({
+            "champion_version": g["_id"]["champion"],
+            "challenger_version": g["_id"]["challenger"],
+            "samples": n,
+            "score_agreement": {
+                "mean_abs_diff": g["sum_abs_diff"] / n,
+                "correlation": correlation,
+                "champion_mean_score": g["sum_x"] / n,
+                "challenger_mean_score": g["sum_y"] / n,
+                "model_decision_agreement": g["model_agree"] / n,
+            },
+            "decision_flips": {
+                "flip_rate": (g["to_fraud"] + g["to_legit"]) / n,
+                "legit_to_fraud": g["to_fraud"],
+                "fraud_to_legit": g["to_legit"],
+            },
+            "latency_ms_per_row": {"champion": g["champion_ms"], "challenger": g["challenger_ms"]},
+            "first_scored_at": g["first"],
+            "last_scored_at": g["last"],
+        })
+    return comparisons
@@ -0,0 +1,289 @@
+# src/utils/fraud_dashboard/velocity.py
+#
+# Per-customer transaction velocity: how many transactions a customer made,
+# and for how much, in each of the VELOCITY_WINDOWS (1 minute, 1 hour and
+# 24 hours by default), the current transaction included. The rules see them
+# as txn_count_<window> / txn_amount_<window>, e.g.
+#
+#   {"code": "BURST_1M", "conditions": [{"field": "txn_count_1m", "op": ">=", "threshold": 5}], ...}
+#
+# Windows are timed by the transaction timestamps, so replayed or batched
+# history counts the same as live traffic.
+#
+# In memory every window is a ring of VELOCITY_BUCKETS time buckets with
+# running totals. A transaction moves the ring forward to its bucket,
+# clearing at most VELOCITY_BUCKETS expired buckets, and adds itself, so an
+# update (which also returns the counts) is O(1). Counts are exact to one
+# bucket: with 30 buckets, 2 s / 2 min / 48 min for the default windows.
+# Customers are kept least recently seen first and evicted once idle for
+# longer than the longest window, or beyond VELOCITY_MAX_CUSTOMERS.
+#
+# With VELOCITY_STORE_REDIS=1 each customer is a Redis sorted set of its
+# transactions (score = timestamp) shared by all workers, trimmed to the
+# longest window and VELOCITY_REDIS_MAX_EVENTS entries and expired when idle.
+# One Lua call adds the transaction and sums the windows over the entries
+# kept, so the cost is bounded by that cap rather than constant.
+
+import sys
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+VELOCITY_KEY_PREFIX = "velocity:"
+VELOCITY_REDIS_ENABLED = os.getenv("VELOCITY_STORE_REDIS", "0") == "1"
+VELOCITY_WINDOWS = os.getenv("VELOCITY_WINDOWS", "1m,1h,24h")
+VELOCITY_BUCKETS = int(os.getenv("VELOCITY_BUCKETS", 30))
+VELOCITY_MAX_CUSTOMERS = int(os.getenv("VELOCITY_MAX_CUSTOMERS", 50_000))
+VELOCITY_REDIS_MAX_EVENTS = int(os.getenv("VELOCITY_REDIS_MAX_EVENTS", 1000))
+
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Add one transaction to the customer's sorted set, trim it and sum every window.
+# KEYS[1] = customer key; ARGV = ts, member, max events, window seconds...
+# (longest last). Members are "<amount>:<nonce>".
+_VELOCITY_LUA = """
+local ts = tonumber(ARGV[1])
+local max_events = tonumber(ARGV[3])
+local horizon = tonumber(ARGV[#ARGV])
+redis.call('ZADD', KEYS[1], ts, ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. string.format('%.17g', ts - horizon))
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -max_events - 1)
+redis.call('EXPIRE', KEYS[1], math.ceil(horizon))
+local counts, sums = {}, {}
+for i = 4, #ARGV do
+    counts[i] = 0
+    sums[i] = 0
+end
+local events = redis.call('ZRANGEBYSCORE', KEYS[1], '(' .. string.format('%.17g', ts - horizon),
+                          string.format('%.17g', ts), 'WITHSCORES')
+for j = 1, #events, 2 do
+    local age = ts - tonumber(events[j + 1])
+    local amount = tonumber(string.match(events[j], '^([^:]+)')) or 0
+    for i = 4, #ARGV do
+        if age < tonumber(ARGV[i]) then
+            counts[i] = counts[i] + 1
+            sums[i] = sums[i] + amount
+        end
+    end
+end
+local out = {}
+for i = 4, #ARGV do
+    table.insert(out, string.format('%d', counts[i]))
+    table.insert(out, string.format('%.17g', sums[i]))
+end
+return out
+"""
+
+
+def parse_windows(spec: str) -> List[Tuple[str, int]]:
+    """'1m,1h,24h' -> [("1m", 60), ("1h", 3600), ("24h", 86400)], shortest first."""
+    windows = []
+    for name in (part.strip() for part in spec.split(",")):
+        if not name:
+            continue
+        try:
+            seconds = int(name[:-1]) * _UNIT_SECONDS[name[-1]]
+        except (KeyError, ValueError):
+            raise ValueError(f"Bad velocity window '{name}' (expected e.g. 30s, 1m, 1h, 24h)")
+        if seconds <= 0:
+            raise ValueError(f"Bad velocity window '{name}'")
+        windows.append((name, seconds))
+    return sorted(windows, key=lambda w: w[1])
+
+
+def count_field(window: str) -> str:
+    return f"txn_count_{window}"
+
+
+def amount_field(window: str) -> str:
+    return f"txn_amount_{window}"
+
+
+WINDOWS = parse_windows(VELOCITY_WINDOWS)
+VELOCITY_FIELDS: Tuple[str, ...] = tuple(
+    field for name, _ in WINDOWS for field in (count_field(name), amount_field(name))
+)
+VELOCITY_COUNT_FIELDS = frozenset(count_field(name) for name, _ in WINDOWS)
+
+
+def zero_velocity() -> Dict[str, float]:
+    """Velocity of a customer without recent transactions."""
+    return {field: 0 for field in VELOCITY_FIELDS}
+
+
+def event_time(timestamp) -> float:
+    """Epoch seconds of a transaction timestamp (ISO 8601 string or datetime); now if unparsable."""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return time.time()
+
+
+class _Ring:
+    """One window of one customer: per-bucket counts and amounts and their totals."""
+
+    __slots__ = ("slots", "head", "count", "amount")
+
+    def __init__(self, buckets: int, head: int):
+        self.slots = array("d", bytes(16 * buckets))  # counts in [0, buckets), amounts in [buckets, 2 * buckets)
+        self.head = head  # index of the newest bucket
+        self.count = 0
+        self.amount = 0.0
+
+    def add(self, index: int, buckets: int, amount: float):
+        gap = index - self.head
+        if gap >= buckets:
+            self.slots = array("d", bytes(16 * buckets))
+            self.count, self.amount = 0, 0.0
+            self.head = index
+        elif gap > 0:
+            slots = self.slots
+            for i in range(self.head + 1, index + 1):
+                slot = i % buckets
+                self.count -= int(slots[slot])
+                self.amount -= slots[buckets + slot]
+                slots[slot] = slots[buckets + slot] = 0.0
+            if self.count == 0:
+                self.amount = 0.0  # no float drift once the window is empty
+            self.head = index
+        elif gap <= -buckets:
+            return  # older than the window
+        slot = index % buckets
+        self.slots[slot] += 1
+        self.slots[buckets + slot] += amount
+        self.count += 1
+        self.amount += amount
+
+
+class _Customer:
+
+    __slots__ = ("rings", "seen_at")
+
+    def __init__(self, rings: List[_Ring], seen_at: float):
+        self.rings = rings
+        self.seen_at = seen_at
+
+
+class VelocityStore:
+    """
+    customer_id -> transaction counts and amounts over the sliding windows.
+    """
+
+    def __init__(self, windows: Sequence[Tuple[str, int]] = WINDOWS, buckets: int = VELOCITY_BUCKETS,
+                 max_customers: int = VELOCITY_MAX_CUSTOMERS, redis_client=None,
+                 redis_max_events: int = VELOCITY_REDIS_MAX_EVENTS):
+        self.windows = list(windows)
+        self.buckets = max(int(buckets), 1)
+        self.max_customers = max_customers
+        self.horizon = max(seconds for _, seconds in self.windows)
+        self._widths = [seconds / self.buckets for _, seconds in self.windows]
+        self._fields = [(count_field(name), amount_field(name)) for name, _ in self.windows]
+        # least recently seen first
+        self._customers: "OrderedDict[str, _Customer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._script = redis_client.register_script(_VELOCITY_LUA) if redis_client else None
+        self._redis_args = [redis_max_events] + [seconds for _, seconds in self.windows]
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def _redis_update(self, customer_id: str, amount: float, ts: float) -> Dict[str, float]:
+        member = f"{amount!r}:{uuid.uuid4().hex[:12]}"
+        values = self._script(keys=[VELOCITY_KEY_PREFIX + customer_id], args=[repr(ts), member] + self._redis_args)
+        velocity = {}
+        for (count_name, amount_name), count, total in zip(self._fields, values[0::2], values[1::2]):
+            velocity[count_name] = int(count)
+            velocity[amount_name] = float(total)
+        return velocity
+
+    def update(self, customer_id: str, amount: float, timestamp) -> Dict[str, float]:
+        """Add one transaction and return the customer's velocity including it."""
+        ts = event_time(timestamp)
+        amount = float(amount)
+        if self._script is not None:
+            try:
+                return self._redis_update(customer_id, amount, ts)
+            except Exception as e:
+                print(f"Error updating velocity of '{customer_id}' in Redis: {e}")
+
+        now = time.monotonic()
+        velocity = {}
+        with self._lock:
+            customer = self._customers.get(customer_id)
+            if customer is None:
+                rings = [_Ring(self.buckets, int(ts // width)) for width in self._widths]
+                customer = self._customers[customer_id] = _Customer(rings, now)
+            else:
+                self._customers.move_to_end(customer_id)
+                customer.seen_at = now
+            for ring, width, (count_name, amount_name) in zip(customer.rings, self._widths, self._fields):
+                ring.add(int(ts // width), self.buckets, amount)
+                velocity[count_name] = ring.count
+                velocity[amount_name] = ring.amount
+            self._evict(now)
+        return velocity
+
+    def _evict(self, now: float):
+        """Drop customers idle for longer than the longest window, then any beyond capacity."""
+        customers = self._customers
+        while customers:
+            oldest = next(iter(customers.values()))
+            if len(customers) > self.max_customers:
+                self.evicted_capacity += 1
+            elif now - oldest.seen_at > self.horizon:
+                self.evicted_idle += 1
+            else:
+                break
+            customers.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._customers.clear()
+
+    def stats(self) -> Dict:
+        ring_bytes = sys.getsizeof(array("d", bytes(16 * self.buckets))) + sys.getsizeof(_Ring(self.buckets, 0))
+        per_customer = ring_bytes * len(self.windows) + sys.getsizeof(_Customer([], 0.0)) + 100  # + dict entry
+        return {
+            "backend": "redis" if self._script is not None else "memory",
+            "windows": {name: seconds for name, seconds in self.windows},
+            "buckets": self.buckets,
+            "customers": len(self._customers),
+            "max_customers": self.max_customers,
+            "evicted_idle": self.evicted_idle,
+            "evicted_capacity": self.evicted_capacity,
+            "approx_memory_bytes": per_customer * len(self._customers),
+        }
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_store: Optional[VelocityStore] = None
+
+
+def get_velocity_store() -> VelocityStore:
+    global _store
+    if _store is None:
+        redis_client = None
+        if VELOCITY_REDIS_ENABLED:
+            from src.utils.fraud_dashboard.cache import get_redis_client
+            redis_client = get_redis_client()
+        _store = VelocityStore(redis_client=redis_client)
+    return _store
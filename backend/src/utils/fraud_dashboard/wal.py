@@ -0,0 +1,377 @@
+# src/utils/fraud_dashboard/wal.py
+#
+# Append-only, segmented local log for prediction / alert writes that could
+# not reach MongoDB (database down, or too slow to keep up with the
+# write-behind queue). Each line is one Extended-JSON entry (an insert or an
+# $set update). A background replayer drains sealed segments oldest-first
+# with ordered bulk_write calls and deletes each segment once it is fully
+# in MongoDB. While a backlog exists new writes are appended to the log too,
+# so MongoDB receives everything in the order it was produced.
+#
+# Several workers may share WAL_DIR. Segments are named
+# wal-<process start ms>-<pid>-<seq>.log, so no two processes ever append to
+# the same file, and names sort in the order they were written per process.
+# A writer holds an exclusive fcntl lock on its open segment (taken before the
+# file gets its .log name) until it seals it; any replayer only drains a
+# segment whose lock it can take, so a segment another process still writes
+# is never read or deleted. Segments left by a crashed worker are unlocked
+# and drained by whichever worker replays next.
+
+import sys
+import os
+import glob
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locks: each process replays only its own segments
+    fcntl = None
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import ObjectId, json_util
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+WAL_ENABLED = os.getenv("WAL_ENABLED", "1") == "1"
+WAL_DIR = os.getenv("WAL_DIR", os.path.join(project_root, "data", "wal"))
+WAL_SEGMENT_MAX_BYTES = int(os.getenv("WAL_SEGMENT_MAX_BYTES", 16 * 1024 * 1024))
+WAL_FSYNC = os.getenv("WAL_FSYNC", "0") == "1"
+WAL_REPLAY_BATCH = int(os.getenv("WAL_REPLAY_BATCH", 1000))
+WAL_REPLAY_INTERVAL_S = float(os.getenv("WAL_REPLAY_INTERVAL_S", 5))
+
+SEGMENT_PATTERN = "wal-*.log"
+DUPLICATE_KEY = 11000
+
+
+def _lock_segment(f) -> bool:
+    """Take the exclusive lock on an open segment without waiting; False if another writer/replayer has it."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class WriteAheadLog:
+
+    def __init__(self, directory: str = WAL_DIR,
+                 segment_max_bytes: int = WAL_SEGMENT_MAX_BYTES,
+                 fsync: bool = WAL_FSYNC,
+                 replay_batch: int = WAL_REPLAY_BATCH,
+                 replay_interval_s: float = WAL_REPLAY_INTERVAL_S):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self.replay_batch = replay_batch
+        self.replay_interval_s = replay_interval_s
+        # unique per process, and increasing across restarts that reuse a pid
+        self.prefix = f"wal-{int(time.time() * 1000):013d}-{os.getpid()}-"
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_path: Optional[str] = None
+        self._file_bytes = 0
+        self._next_seq = 1
+        # this process's segments not yet replayed: new writes queue behind them
+        self._own_segments: List[str] = []
+
+        self._get_collection: Optional[Callable[[str], Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+        # metrics
+        self.appended = 0
+        self.replayed = 0
+        self.skipped_duplicates = 0
+        self.corrupt_lines = 0
+        self.replay_errors = 0
+        self.last_replay_error: Optional[str] = None
+
+    # ---------- segments ----------
+    def _segments(self) -> List[str]:
+        """Every segment in the directory, of any process, oldest process first."""
+        segments = sorted(glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)))
+        if fcntl is None:
+            segments = [p for p in segments if os.path.basename(p).startswith(self.prefix)]
+        return segments
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.directory, f"{self.prefix}{self._next_seq:010d}.log"))
+        self._next_seq += 1
+        # locked under a temporary name, so no replayer can claim it before we hold it
+        temp = path + ".tmp"
+        f = open(temp, "ab")
+        _lock_segment(f)
+        os.rename(temp, path)
+        self._file = f
+        self._file_path = path
+        self._file_bytes = 0
+        self._own_segments.append(path)
+
+    def _seal(self):
+        """Close the active segment, releasing its lock, so a replayer may drain it (caller holds the lock)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def has_backlog(self) -> bool:
+        """True while segments this process wrote are waiting to be replayed."""
+        if self._own_segments and self._file is None:
+            self._own_segments = [p for p in self._own_segments if os.path.exists(p)]
+        return bool(self._own_segments)
+
+    # ---------- append ----------
+    def _append_entries(self, entries: List[Dict]):
+        data = b"".join(
+            json_util.dumps(entry, json_options=json_util.CANONICAL_JSON_OPTIONS).encode("utf-8") + b"\n"
+            for entry in entries
+        )
+        with self._lock:
+            if self._file is None or self._file_bytes >= self.segment_max_bytes:
+                self._seal()
+                self._open_segment()
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file_bytes += len(data)
+            self.appended += len(entries)
+        self._wake.set()
+
+    def append(self, collection_name: str, docs: List[Dict]):
+        """Log documents to insert. Each gets a client-side _id so replay is idempotent."""
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        self._append_entries([{"c": collection_name, "op": "insert", "doc": doc} for doc in docs])
+
+    def append_update(self, collection_name: str, filter_: Dict, fields: Dict):
+        """Log a {"$set": fields} update, replayed after every insert logged before it."""
+        self._append_entries([{"c": collection_name, "op": "update", "filter": filter_, "set": fields}])
+
+    # ---------- replay ----------
+    def start_replayer(self, get_collection: Callable[[str], Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        self._get_collection = get_collection
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="wal-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+        with self._lock:
+            self._seal()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._own_segments or self._segments():
+                try:
+                    self.replay()
+                    self.last_replay_error = None
+                except Exception as e:
+                    # log once per outage, not on every retry
+                    if self.last_replay_error is None:
+                        print(f"WARNING: WAL replay paused, retrying every {self.replay_interval_s}s: {e}")
+                    self.replay_errors += 1
+                    self.last_replay_error = str(e)
+            self._wake.wait(timeout=self.replay_interval_s)
+            self._wake.clear()
+
+    def replay(self) -> int:
+        """
+        Drain every segment no other process holds into MongoDB, oldest
+        first; raises if MongoDB fails mid-way.
+        """
+        total = 0
+        with self._lock:
+            # seal our active segment once it is the only one of ours left,
+            # so the backlog can drain and direct writes resume
+            if self._file is not None and \
+                    [p for p in self._own_segments if os.path.exists(p)] == [self._file_path]:
+                self._seal()
+            active = self._file_path if self._file is not None else None
+        blocked = set()  # writers whose older segment is busy: keep their order
+        for path in self._segments():
+            writer = os.path.basename(path).rsplit("-", 1)[0]
+            if writer in blocked or os.path.abspath(path) == active:
+                blocked.add(writer)
+                continue
+            count = self._replay_if_free(path)
+            if count is None:
+                blocked.add(writer)
+                continue
+            total += count
+            if self._stop.is_set():
+                break
+        return total
+
+    def _replay_if_free(self, path: str) -> Optional[int]:
+        """Replay and delete one segment; None while another process has it locked."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return 0  # drained by another worker
+        with f:
+            if not _lock_segment(f):
+                return None  # still being written, or being replayed elsewhere
+            if os.fstat(f.fileno()).st_nlink == 0:
+                return 0  # deleted by a replayer that held the lock before us
+            count = self._replay_segment(path)
+            os.remove(path)
+        return count
+
+    def _read_segment(self, path: str) -> List[Dict]:
+        entries = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entries.append(json_util.loads(line))
+                except Exception:
+                    # a torn final line from a crash mid-append
+                    self.corrupt_lines += 1
+                    print(f"WARNING: skipping unreadable WAL line in {os.path.basename(path)}")
+        return entries
+
+    def _replay_segment(self, path: str) -> int:
+        entries = self._read_segment(path)
+        # consecutive entries for the same collection go out as one ordered bulk_write
+        start = 0
+        while start < len(entries):
+            name = entries[start]["c"]
+            end = start
+            while end < len(entries) and end - start < self.replay_batch and entries[end]["c"] == name:
+                end += 1
+            ops = [
+                InsertOne(e["doc"]) if e["op"] == "insert" else UpdateOne(e["filter"], {"$set": e["set"]})
+                for e in entries[start:end]
+            ]
+            self._bulk_write(name, ops)
+            start = end
+        self.replayed += len(entries)
+        return len(entries)
+
+    def _bulk_write(self, collection_name: str, ops: List):
+        collection = self._get_collection(collection_name)
+        while ops:
+            try:
+                collection.bulk_write(ops, ordered=True)
+                return
+            except BulkWriteError as e:
+                # documents already written before a crash or an interrupted replay
+                error = e.details["writeErrors"][0]
+                if error.get("code") != DUPLICATE_KEY:
+                    raise
+                self.skipped_duplicates += 1
+                ops = ops[error["index"] + 1:]
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict:
+        segments = self._segments()
+        return {
+            "directory": self.directory,
+            "backlog": self.has_backlog(),
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(p) for p in segments),
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "skipped_duplicates": self.skipped_duplicates,
+            "corrupt_lines": self.corrupt_lines,
+            "replay_errors": self.replay_errors,
+            "last_replay_error": self.last_replay_error,
+            "replayer_running": self._thread is not None and self._thread.is_alive(),
+        }
+
+
+# -------------------------------------------
+# SHARED INSTANCE
+# -------------------------------------------
+_wal: Optional[WriteAheadLog] = None
+_wal_lock = threading.Lock()
+
+
+def _default_get_collection(collection_name: str):
+    from src.utils.fraud_dashboard.database import get_collection
+    return get_collection(collection_name)
+
+
+def get_wal() -> Optional[WriteAheadLog]:
+    """Shared log of this process, or None when WAL_ENABLED=0. start_wal() starts its replayer."""
+    global _wal
+    if not WAL_ENABLED:
+        return None
+    with _wal_lock:
+        if _wal is None:
+            _wal = WriteAheadLog()
+        return _wal
+
+
+def start_wal():
+    """Start replaying logged writes (called from the app startup hook)."""
+    log = get_wal()
+    if log is not None:
+        log.start_replayer(_default_get_collection)
+
+
+def stop_wal():
+    if _wal is not None:
+        _wal.stop()
+
+
+def insert_or_log(collection_name: str, docs: List[Dict], ordered: bool = False) -> bool:
+    """
+    Insert documents into MongoDB, or append them to the WAL when MongoDB
+    fails or a backlog is still being replayed. Returns False only when the
+    documents could be written nowhere.
+    """
+    wal = get_wal()
+    if wal is not None:
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        if wal.has_backlog():
+            wal.append(collection_name, docs)
+            return True
+    try:
+        _default_get_collection(collection_name).insert_many(docs, ordered=ordered)
+        return True
+    except Exception as e:
+        if wal is None:
+            print(f"ERROR: could not write {len(docs)} documents to '{collection_name}': {e}")
+            return False
+        print(f"WARNING: MongoDB write to '{collection_name}' failed, logging {len(docs)} documents to the WAL: {e}")
+        # documents that did make it in are skipped as duplicates on replay
+        wal.append(collection_name, docs)
+        return True
+
+
+def update_or_log(collection_name: str, filter_: Dict, fields: Dict) -> bool:
+    """$set update that falls back to the WAL like insert_or_log."""
+    wal = get_wal()
+    if wal is not None and wal.has_backlog():
+        wal.append_update(collection_name, filter_, fields)
+        return True
+    try:
+        _default_get_collection(collection_name).update_one(filter_, {"$set": fields})
+        return True
+    except Exception as e:
+        if wal is None:
+            print(f"ERROR: could not update '{collection_name}': {e}")
+            return False
+        wal.append_update(collection_name, filter_, fields)
+        return True
@@ -0,0 +1,275 @@
+# src/utils/fraud_dashboard/write_behind.py
+#
+# Write-behind buffers for documents written on the request path
+# (prediction records, fraud alerts). Requests enqueue documents; a
+# background thread per collection flushes them with unordered insert_many
+# once `max_batch` documents are waiting or `flush_interval_s` has passed.
+# The queue is bounded: when MongoDB is slow the flusher falls behind, the
+# queue fills and enqueue blocks for at most `put_timeout_s`. Documents that
+# still do not fit, and batches MongoDB rejects, are appended to the local
+# write-ahead log (wal.py) when one is configured, otherwise dropped and
+# counted.
+
+import sys
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+
+# --- PATH FIX ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- END OF PATH FIX ---
+
+from src.utils.fraud_dashboard.wal import WriteAheadLog, get_wal
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "1") == "1"
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", 500))
+WRITE_BEHIND_FLUSH_INTERVAL_S = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_S", 0.5))
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", 20000))
+WRITE_BEHIND_PUT_TIMEOUT_S = float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT_S", 0.05))
+
+
+class WriteBehindBuffer:
+
+    def __init__(self, name: str, get_collection: Callable[[], Any],
+                 max_batch: int = WRITE_BEHIND_MAX_BATCH,
+                 flush_interval_s: float = WRITE_BEHIND_FLUSH_INTERVAL_S,
+                 max_queue: int = WRITE_BEHIND_MAX_QUEUE,
+                 put_timeout_s: float = WRITE_BEHIND_PUT_TIMEOUT_S,
+                 wal: Optional[WriteAheadLog] = None):
+        self.name = name
+        self._get_collection = get_collection
+        self._wal = wal
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self.put_timeout_s = put_timeout_s
+
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+        # documents not yet handed to MongoDB, by _id, so late updates can be
+        # applied in memory; `_flushing` is set while an insert_many is running
+        self._pending: Dict[Any, Dict] = {}
+        self._pending_lock = threading.Lock()
+        self._flushed = threading.Condition(self._pending_lock)
+        self._flushing = False
+
+        # metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.spilled = 0
+        self.flushes = 0
+        self.total_flush_s = 0.0
+        self.max_flush_s = 0.0
+        self._recent_flush_ms = deque(maxlen=1024)
+
+    # ---------- lifecycle ----------
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_s: float = 10.0):
+        """Stop the flusher after writing everything still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+        # anything enqueued after the thread exited
+        self._flush_batch(self._drain(self._queue.qsize()))
+
+    # ---------- producer side ----------
+    def enqueue(self, doc: Dict) -> bool:
+        """Queue a document; False if it was dropped because the queue stayed full."""
+        self.start()
+        doc_id = doc.setdefault("_id", ObjectId())
+        with self._pending_lock:
+            self._pending[doc_id] = doc
+        try:
+            self._queue.put(doc, timeout=self.put_timeout_s)
+        except queue.Full:
+            with self._pending_lock:
+                self._pending.pop(doc_id, None)
+            if self._spill([doc]):
+                return True
+            with self._pending_lock:
+                self.dropped += 1
+            print(f"WARNING: write-behind queue '{self.name}' full, dropped a document")
+            return False
+        with self._pending_lock:
+            self.enqueued += 1
+        return True
+
+    def update_pending(self, doc_id, fields: Dict) -> bool:
+        """
+        Apply `fields` to a document that has not been written yet.
+        Returns False if the document already went to MongoDB; in that case
+        this waits for any in-progress flush so a follow-up update_one finds it.
+        """
+        with self._pending_lock:
+            doc = self._pending.get(doc_id)
+            if doc is not None:
+                doc.update(fields)
+                return True
+            while self._flushing:
+                self._flushed.wait(timeout=5.0)
+            return False
+
+    def get_pending(self, doc_id) -> Optional[Dict]:
+        with self._pending_lock:
+            doc = self._pending.get(doc_id)
+            return dict(doc) if doc is not None else None
+
+    # ---------- flusher ----------
+    def _drain(self, limit: int) -> List[Dict]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.max_batch and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush_batch(batch)
+        # shutdown: write whatever is left
+        while not self._queue.empty():
+            self._flush_batch(self._drain(self.max_batch))
+
+    def _flush_batch(self, batch: List[Dict]):
+        if not batch:
+            return
+        with self._pending_lock:
+            self._flushing = True
+            for doc in batch:
+                self._pending.pop(doc.get("_id"), None)
+
+        start = time.perf_counter()
+        if self._wal is not None and self._wal.has_backlog():
+            # keep MongoDB in write order until the log has been replayed
+            self._spill(batch)
+            written = 0
+        else:
+            try:
+                self._get_collection().insert_many(batch, ordered=False)
+                written = len(batch)
+            except Exception as e:
+                written = self._handle_failure(batch, e)
+        elapsed = time.perf_counter() - start
+
+        with self._pending_lock:
+            self._flushing = False
+            self._flushed.notify_all()
+            self.flushes += 1
+            self.written += written
+            self.total_flush_s += elapsed
+            self.max_flush_s = max(self.max_flush_s, elapsed)
+            self._recent_flush_ms.append(elapsed * 1000.0)
+
+    def _spill(self, docs: List[Dict]) -> bool:
+        """Append documents to the write-ahead log; False if there is none or it failed."""
+        if self._wal is None:
+            return False
+        try:
+            self._wal.append(self.name, docs)
+        except Exception as e:
+            print(f"ERROR: could not append {len(docs)} '{self.name}' documents to the WAL: {e}")
+            return False
+        with self._pending_lock:
+            self.spilled += len(docs)
+        return True
+
+    def _handle_failure(self, batch: List[Dict], error: Exception) -> int:
+        """Count what made it in (unordered inserts can partially succeed) and log or lose the rest."""
+        details = getattr(error, "details", None) or {}
+        written = int(details.get("nInserted", 0))
+        # the whole batch goes to the log; documents already inserted are skipped on replay
+        if self._spill(batch):
+            print(f"WARNING: write-behind flush of '{self.name}' failed, batch logged to the WAL: {error}")
+            return written
+        lost = len(batch) - written
+        with self._pending_lock:
+            self.failed += lost
+        print(f"ERROR: write-behind flush of '{self.name}' failed, {lost} documents lost: {error}")
+        return written
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict:
+        with self._pending_lock:
+            recent = np.array(self._recent_flush_ms) if self._recent_flush_ms else None
+            return {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "spilled_to_wal": self.spilled,
+                "flushes": self.flushes,
+                "avg_flush_ms": self.total_flush_s * 1000.0 / self.flushes if self.flushes else 0.0,
+                "max_flush_ms": self.max_flush_s * 1000.0,
+                "p99_flush_ms": float(np.percentile(recent, 99)) if recent is not None else 0.0,
+                "avg_batch_size": self.written / self.flushes if self.flushes else 0.0,
+            }
+
+
+# -------------------------------------------
+# SHARED BUFFERS (one per collection)
+# -------------------------------------------
+_buffers: Dict[str, WriteBehindBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_buffer(collection_name: str) -> Optional[WriteBehindBuffer]:
+    """Buffer for a collection, or None when write-behind is disabled."""
+    if not WRITE_BEHIND_ENABLED:
+        return None
+    with _buffers_lock:
+        buffer = _buffers.get(collection_name)
+        if buffer is None:
+            from src.utils.fraud_dashboard.database import get_collection
+            buffer = WriteBehindBuffer(collection_name, lambda: get_collection(collection_name), wal=get_wal())
+            _buffers[collection_name] = buffer
+        return buffer
+
+
+def stop_all(timeout_s: float = 10.0):
+    """Flush and stop every buffer (called on shutdown)."""
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+    for buffer in buffers:
+        buffer.stop(timeout_s)
+
+
+def all_stats() -> Dict[str, Dict]:
+    with _buffers_lock:
+        return {name: buffer.stats() for name, buffer in _buffers.items()}
@@ -10,6 +10,11 @@ DATABASE_NAME = "bfsidata"
 COLLECTION_NAME = "transactions"
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.fraud_dashboard import rollups
+from src.utils.fraud_dashboard.cache import bump_data_generation
 
 PROCESSED_FILE_PATH = os.path.join(PROJECT_ROOT, "data", "processed", "transactions_processed.csv")
 
@@ -73,6 +78,18 @@ def insert_data_to_collection(collection, df):
     except Exception as e:
         print(f"ERROR: During data insertion.")
         print(f"Details: {e}")
+        return False
+    return True
+
+def update_rollups(collection, df):
+    """Replaces the dashboard rollups of the transactions source with sums over the new data."""
+    try:
+        print(f"Updating '{rollups.ROLLUP_COLLECTION}' collection...")
+        keys = rollups.replace_source(collection.database[rollups.ROLLUP_COLLECTION], df, rollups.SOURCE_TRANSACTIONS)
+        print(f"Rolled up {len(df)} records into {keys} documents.")
+    except Exception as e:
+        print(f"ERROR: During rollup update. Run 'python src/utils/fraud_dashboard/rollups.py rebuild' to recompute them.")
+        print(f"Details: {e}")
 
 def main():
     
@@ -87,7 +104,14 @@ def main():
 
     collection, client = connect_to_mongo()
     df = load_data_from_csv()
-    insert_data_to_collection(collection, df)
+    if insert_data_to_collection(collection, df):
+        update_rollups(collection, df)
+        # drops every cached API response computed from the old data
+        generation = bump_data_generation()
+        if generation is None:
+            print("WARNING: Redis unavailable, cached API responses were not invalidated.")
+        else:
+            print(f"Data generation is now {generation}.")
     
     client.close()
     print("MongoDB connection closed.")
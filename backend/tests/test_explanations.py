@@ -0,0 +1,198 @@
+# backend/tests/test_explanations.py
+#
+# ExplanationWorker status transitions with StubLLMClient, and the
+# GET /prediction/{id}/explanation endpoint for every status.
+
+import os
+import sys
+import threading
+
+import pytest
+from bson import ObjectId
+
+# --- PATH FIX ---
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+from src.utils.fraud_dashboard.explanations import (
+    ExplanationWorker, StubLLMClient, get_llm_client, template_explanation,
+    EXPLANATION_PENDING, EXPLANATION_READY, EXPLANATION_FAILED,
+    EXPLANATION_SKIPPED, EXPLANATION_TEMPLATE,
+)
+
+TIMEOUT_S = 0.1
+
+
+class RecordStore:
+    """Prediction records keyed by id; `store` is the worker's on_result callback."""
+
+    def __init__(self):
+        self.records = {}
+        self.done = threading.Event()
+
+    def add(self) -> ObjectId:
+        prediction_id = ObjectId()
+        self.records[prediction_id] = {
+            "_id": prediction_id,
+            "explanation": None,
+            "explanation_status": EXPLANATION_PENDING,
+        }
+        return prediction_id
+
+    def store(self, key, status, text):
+        self.records[key].update({"explanation": text, "explanation_status": status})
+        self.done.set()
+
+
+def run_worker(client, fallback=None):
+    """Submit one explanation for a pending record and return the record once it is written back."""
+    store = RecordStore()
+    worker = ExplanationWorker(client, store.store, max_workers=1, timeout_s=TIMEOUT_S)
+    try:
+        prediction_id = store.add()
+        assert store.records[prediction_id]["explanation_status"] == EXPLANATION_PENDING
+        assert worker.submit(prediction_id, "prompt", fallback)
+        assert store.done.wait(5), "worker never delivered a result"
+        return store.records[prediction_id], worker.stats()
+    finally:
+        worker.shutdown(wait=True)
+
+
+FALLBACK = template_explanation(True, 0.91, "High model score", ["Amount above limit"])
+
+
+# -------------------------------------------
+# WORKER
+# -------------------------------------------
+def test_pending_to_ready():
+    record, stats = run_worker(StubLLMClient(text="**Looks** fraudulent."), FALLBACK)
+    assert record["explanation_status"] == EXPLANATION_READY
+    assert record["explanation"] == "Looks fraudulent."
+    assert stats["completed"] == 1 and stats["failed"] == 0
+
+
+def test_timeout_delivers_template():
+    record, stats = run_worker(StubLLMClient(text="too late", delay_s=TIMEOUT_S * 3), FALLBACK)
+    assert record["explanation_status"] == EXPLANATION_TEMPLATE
+    assert record["explanation"] == FALLBACK
+    assert stats["timed_out"] == 1 and stats["failed"] == 1
+
+
+def test_timeout_without_fallback_fails():
+    record, stats = run_worker(StubLLMClient(text="too late", delay_s=TIMEOUT_S * 3))
+    assert record["explanation_status"] == EXPLANATION_FAILED
+    assert "timeout" in record["explanation"]
+    assert stats["timed_out"] == 1
+
+
+def test_failure_delivers_template():
+    record, stats = run_worker(StubLLMClient(fail=True), FALLBACK)
+    assert record["explanation_status"] == EXPLANATION_TEMPLATE
+    assert record["explanation"] == FALLBACK
+    assert stats["failed"] == 1 and stats["timed_out"] == 0
+
+
+def test_failure_without_fallback_fails():
+    record, _ = run_worker(StubLLMClient(fail=True))
+    assert record["explanation_status"] == EXPLANATION_FAILED
+    assert "stub LLM failure" in record["explanation"]
+
+
+def test_missing_client_delivers_template():
+    record, stats = run_worker(None, FALLBACK)
+    assert record["explanation_status"] == EXPLANATION_TEMPLATE
+    assert record["explanation"] == FALLBACK
+    assert stats["failed"] == 0
+
+
+def test_stub_client_only_when_configured(monkeypatch):
+    monkeypatch.setenv("LLM_CLIENT", "stub")
+    assert isinstance(get_llm_client(), StubLLMClient)
+
+    import src.utils.fraud_dashboard.explanations as explanations
+
+    def broken_gemini():
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setenv("LLM_CLIENT", "gemini")
+    monkeypatch.setattr(explanations, "GeminiClient", broken_gemini)
+    assert get_llm_client() is None
+
+
+# -------------------------------------------
+# GET /prediction/{id}/explanation
+# -------------------------------------------
+class FakePredictions:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+
+@pytest.fixture(scope="module")
+def prediction_router():
+    # no MongoDB, Redis or LLM needed: fail fast and keep everything in-process
+    os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:1")
+    os.environ.setdefault("MONGO_DB_NAME", "fraud_dashboard_test")
+    os.environ.setdefault("MONGO_SERVER_SELECTION_TIMEOUT_MS", "100")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "1")
+    os.environ.setdefault("WRITE_BEHIND_ENABLED", "0")
+    os.environ.setdefault("LLM_CLIENT", "stub")
+    from src.utils.fraud_dashboard.routers import prediction
+    return prediction
+
+
+@pytest.fixture
+def client(prediction_router, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    docs = [
+        {"_id": ObjectId(), "explanation": None, "explanation_status": EXPLANATION_PENDING},
+        {"_id": ObjectId(), "explanation": "LLM text", "explanation_status": EXPLANATION_READY},
+        {"_id": ObjectId(), "explanation": FALLBACK, "explanation_status": EXPLANATION_TEMPLATE},
+        {"_id": ObjectId(), "explanation": "LLM explanation failed: boom", "explanation_status": EXPLANATION_FAILED},
+        {"_id": ObjectId(), "explanation": None, "explanation_status": EXPLANATION_SKIPPED},
+        # written before explanations went async
+        {"_id": ObjectId(), "explanation": "legacy text"},
+    ]
+    monkeypatch.setattr(prediction_router, "predictions_collection", FakePredictions(docs))
+    monkeypatch.setattr(prediction_router, "predictions_buffer", None)
+
+    app = FastAPI()
+    app.include_router(prediction_router.router)
+    test_client = TestClient(app)
+    test_client.docs = docs
+    return test_client
+
+
+def test_explanation_endpoint_statuses(client):
+    expected = [
+        (EXPLANATION_PENDING, None),
+        (EXPLANATION_READY, "LLM text"),
+        (EXPLANATION_TEMPLATE, FALLBACK),
+        (EXPLANATION_FAILED, "LLM explanation failed: boom"),
+        (EXPLANATION_SKIPPED, None),
+        (EXPLANATION_READY, "legacy text"),
+    ]
+    for doc, (status, text) in zip(client.docs, expected):
+        response = client.get(f"/prediction/{doc['_id']}/explanation")
+        assert response.status_code == 200
+        assert response.json() == {
+            "prediction_id": str(doc["_id"]),
+            "explanation_status": status,
+            "explanation": text,
+        }
+
+
+def test_explanation_endpoint_unknown_id(client):
+    response = client.get(f"/prediction/{ObjectId()}/explanation")
+    assert response.status_code == 404
+
+
+def test_explanation_endpoint_invalid_id(client):
+    response = client.get("/prediction/not-an-id/explanation")
+    assert response.status_code == 400